@@ -4,17 +4,406 @@ import time
 import io
 import matplotlib.pyplot as plt
 from io import StringIO, BytesIO
-import os
-import tempfile
 
 # Import resume screeners
-from serial_resume_screener import process_resumes_serial
-from parallel_resume_screener import process_resumes_parallel
-from utils import parse_resume_text
+from serial_resume_screener import process_resumes_serial, iter_resumes_serial
+from parallel_resume_screener import process_resumes_parallel, iter_resumes_parallel, job_version
+from utils import format_results, extract_job_terms, DEFAULT_WEIGHTS
+from feature_store import get_feature_store, process_resumes_from_store
+from execution_planner import plan_execution, finish_plan
+from resume_cache import get_default_cache, content_key
+from instrumentation import collect_stage_timings, stage_table
+from ranking import TopKRanker
+from near_duplicates import find_near_duplicates
+from result_export import export_frame, columnar_export_available
+from resume_archives import ARCHIVE_EXTENSIONS, MEMBER_TYPES, iter_archive
+from pipeline_executor import ScreeningPipeline, extract_texts
+from screening_service import ServiceError, screen_with_service, service_address
 
 # Set page title
 st.set_page_config(page_title="Resume Screening App", layout="wide")
 
+def stream_results(results_iter, resumes, scored, duplicate_of=None, update_interval=0.25):
+    """
+    Consume a streaming screener, showing a live leaderboard, progress bar and
+    throughput while results arrive.
+
+    The screener is given only the files that still need scoring, under their
+    upload hash as the name. Each result is stored in `scored` as soon as it
+    arrives, so a cancelled run keeps the work it already did. Near-duplicates
+    are never sent to the screener; they are shown with the result of their
+    representative as soon as it is scored.
+
+    Clicking "Cancel" reruns the script, which interrupts this loop; closing
+    the generator then stops the screener from submitting more work.
+
+    Args:
+        results_iter (generator): iter_resumes_serial / iter_resumes_parallel
+        resumes (list): All resumes of the run, with 'name' and 'key'
+        scored (dict): upload hash -> result of the files already scored
+        duplicate_of (dict, optional): When deduplicating, the upload hash of
+            each near-duplicate -> upload hash of the resume whose result it takes
+        update_interval (float): Seconds between display refreshes
+
+    Returns:
+        tuple: (DataFrame with results for every resume, execution time in seconds)
+    """
+    names = {resume['key']: resume['name'] for resume in resumes}
+    total = len(names)
+    deduplicate = duplicate_of is not None
+    duplicate_of = duplicate_of or {}
+    copies = {}
+    for key, representative in duplicate_of.items():
+        copies.setdefault(representative, []).append(key)
+
+    def result_for(key):
+        # The result shown for a file, marked with its near-duplicate group when deduplicating
+        representative = duplicate_of.get(key)
+        if representative is not None:
+            return dict(scored[representative], file_name=names[key], duplicate_of=names[representative],
+                        duplicates=0)
+        result = dict(scored[key], file_name=names[key])
+        if deduplicate:
+            result.update(duplicate_of='', duplicates=len(copies.get(key, ())))
+        return result
+
+    progress_bar = st.progress(0.0, text="Scoring resumes...")
+    cancel_slot = st.empty()
+    cancel_slot.button("Cancel", key="cancel_run")
+    status = st.empty()
+    leaderboard = st.empty()
+
+    leaders = TopKRanker(10)
+    done = 0
+    for index, key in enumerate(names):
+        if duplicate_of.get(key, key) in scored:
+            leaders.offer(result_for(key), index)
+            done += 1
+    new = 0
+    start_time = time.time()
+    last_update = 0.0
+    try:
+        for result in results_iter:
+            key = result.pop('file_name')
+            scored[key] = result
+            for shown in [key] + copies.get(key, []):
+                leaders.offer(result_for(shown), total + new)
+                new += 1
+            now = time.time()
+            if now - last_update >= update_interval or done + new == total:
+                last_update = now
+                progress_bar.progress((done + new) / total, text=f"Scored {done + new}/{total} resumes")
+                status.write(f"Throughput: {new / (now - start_time):.1f} resumes/s")
+                leaderboard.dataframe(format_results(leaders.results()))
+    finally:
+        results_iter.close()
+    execution_time = time.time() - start_time
+
+    for placeholder in (progress_bar, cancel_slot, status, leaderboard):
+        placeholder.empty()
+    return format_results([dict(result_for(resume['key']), file_name=resume['name'])
+                           for resume in resumes]), execution_time
+
+@st.cache_data(show_spinner=False)
+def cached_job_keywords(job_description, phrase_matching=False):
+    return extract_job_terms(job_description, phrase_matching)
+
+def upload_key(resume_file):
+    """
+    Hash an uploaded resume file.
+
+    Args:
+        resume_file (UploadedFile): Uploaded resume
+
+    Returns:
+        str: Content hash of the file (see resume_cache.content_key)
+    """
+    return content_key(resume_file.getvalue(), resume_file.name.split('.')[-1].lower())
+
+def parse_uploads(resume_files, upload_keys):
+    """
+    Turn uploaded files into resume dicts, parsing each distinct file only
+    once per session.
+
+    ZIP and tar archives are read one member at a time, without extracting
+    them to disk; each .txt/.pdf member becomes a resume named
+    "<archive>/<member>". New PDFs are parsed on the warm pool, where the
+    per-file limits can stop a pathological file; one that is stopped is
+    scored with an empty text and reported.
+
+    Args:
+        resume_files (list): Uploaded resume files and archives
+        upload_keys (list): upload_key() of each file
+
+    Returns:
+        list: Dictionaries with 'text', 'name' and 'key' (the content hash)
+    """
+    texts = st.session_state.setdefault('resume_texts', {})
+    archives = st.session_state.setdefault('archive_members', {})
+
+    # Files without a text in this session, under their upload hash
+    new = {}
+    names = {}
+
+    def add(name, content, file_type):
+        key = content_key(content, file_type)
+        if key not in texts:
+            new[key] = {'name': key, 'content': content, 'type': file_type}
+            names.setdefault(key, name)
+        return key
+
+    for resume_file, key in zip(resume_files, upload_keys):
+        file_type = resume_file.name.split('.')[-1].lower()
+        if file_type in MEMBER_TYPES:
+            if key not in texts:
+                add(resume_file.name, resume_file.getvalue(), file_type)
+        elif key not in archives or any(member_key not in texts for _, member_key in archives[key]):
+            resume_file.seek(0)
+            archives[key] = [(member['name'], add(member['name'], member['content'],
+                                                  member['name'].rsplit('.', 1)[-1].lower()))
+                             for member in iter_archive(resume_file, resume_file.name)]
+            if not archives[key]:
+                st.warning(f"No TXT or PDF resumes could be read from {resume_file.name}.")
+
+    parsed, skipped = extract_texts(new.values(), get_default_cache())
+    texts.update(parsed)
+    if skipped:
+        st.warning("Scored as empty after exceeding the per-file limits: " + ", ".join(
+            f"{names[key]} ({reason})" for key, reason in skipped.items()))
+
+    resumes = []
+    for resume_file, key in zip(resume_files, upload_keys):
+        if resume_file.name.split('.')[-1].lower() not in MEMBER_TYPES:
+            resumes.extend({'text': texts.get(member_key, ''), 'name': name, 'key': member_key}
+                           for name, member_key in archives[key])
+        else:
+            resumes.append({'text': texts.get(key, ''), 'name': resume_file.name, 'key': key})
+    return resumes
+
+def upload_resumes(resume_files, upload_keys):
+    """
+    Like parse_uploads, but leave files without a text in this session
+    unparsed, as raw bytes for a ScreeningPipeline to read and parse while
+    it scores. Archive members are read here and handed on the same way,
+    so their PDFs are parsed on the pool too.
+
+    Args:
+        resume_files (list): Uploaded resume files and archives
+        upload_keys (list): upload_key() of each file
+
+    Returns:
+        list: Dictionaries with 'name', 'key' and either 'text' or
+            'content' and 'type'
+    """
+    texts = st.session_state.setdefault('resume_texts', {})
+    archives = st.session_state.setdefault('archive_members', {})
+    resumes = []
+    for resume_file, key in zip(resume_files, upload_keys):
+        file_type = resume_file.name.split('.')[-1].lower()
+        if file_type not in MEMBER_TYPES:
+            if key in archives and all(member_key in texts for _, member_key in archives[key]):
+                resumes.extend({'text': texts[member_key], 'name': name, 'key': member_key}
+                               for name, member_key in archives[key])
+                continue
+            resume_file.seek(0)
+            members = []
+            for member in iter_archive(resume_file, resume_file.name):
+                member_type = member['name'].rsplit('.', 1)[-1].lower()
+                member_key = content_key(member['content'], member_type)
+                members.append((member['name'], member_key))
+                if member_key in texts:
+                    resumes.append({'text': texts[member_key], 'name': member['name'], 'key': member_key})
+                else:
+                    resumes.append({'content': member['content'], 'type': member_type, 'name': member['name'],
+                                    'key': member_key})
+            archives[key] = members
+            if not members:
+                st.warning(f"No TXT or PDF resumes could be read from {resume_file.name}.")
+        elif key in texts:
+            resumes.append({'text': texts[key], 'name': resume_file.name, 'key': key})
+        else:
+            resumes.append({'content': resume_file.getvalue(), 'type': file_type, 'name': resume_file.name,
+                            'key': key})
+    return resumes
+
+def session_results(job_key):
+    """
+    Return the per-file results scored in this session for a job.
+
+    Args:
+        job_key (str): Version tag of the job keywords
+
+    Returns:
+        dict: upload hash -> scoring result (without 'file_name'); emptied
+            when the job changes
+    """
+    if st.session_state.get('scored_job') != job_key:
+        st.session_state['scored_job'] = job_key
+        st.session_state['scored'] = {}
+    return st.session_state['scored']
+
+@st.cache_data(show_spinner=False)
+def timing_chart(time_serial, time_parallel):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.bar(['Serial', 'Parallel'], [time_serial, time_parallel])
+    ax.set_ylabel('Processing Time (seconds)')
+    ax.set_title('Processing Time Comparison')
+    return fig
+
+@st.cache_data(show_spinner=False)
+def score_chart(top_resumes):
+    fig, ax = plt.subplots(figsize=(12, 6))
+
+    # Create horizontal bar chart
+    ax.barh(top_resumes['Resume'], top_resumes['Final Score (%)'])
+    ax.set_xlabel('Score (%)')
+    ax.set_ylabel('Resume')
+    ax.set_title('Top 10 Resume Scores')
+    ax.invert_yaxis()  # Higher scores at the top
+
+    # Set x-axis limit to 100%
+    ax.set_xlim(0, 100)
+    return fig
+
+# Label, file extension and MIME type of each download format
+DOWNLOAD_FORMATS = {
+    'csv': ("CSV", 'csv', 'text/csv'),
+    'parquet': ("Parquet", 'parquet', 'application/vnd.apache.parquet'),
+    'arrow': ("Arrow (Feather)", 'arrow', 'application/vnd.apache.arrow.file'),
+}
+
+def show_results(run):
+    """
+    Display the results of a screening run.
+
+    Args:
+        run (dict): Results, timings and profiling reports of the run, as
+            kept in st.session_state['last_run']
+    """
+    processing_mode = run['mode']
+    results_df = run['results_df']
+    time_serial = run['time_serial']
+    time_parallel = run['time_parallel']
+
+    # Display results
+    st.subheader("Screening Results")
+
+    if processing_mode == "Both (for comparison)":
+        st.write(f"Serial processing time: {time_serial:.4f} seconds")
+        st.write(f"Parallel processing time: {time_parallel:.4f} seconds")
+
+        if time_serial > 0:
+            speedup = time_serial / time_parallel
+            st.write(f"Speedup: {speedup:.2f}x")
+
+        st.write("Both processing methods produce identical results. Showing results from parallel processing:")
+
+        # Create a bar chart to compare processing times
+        st.pyplot(timing_chart(time_serial, time_parallel))
+
+        # Where the time went: per-stage totals (summed over workers for parallel)
+        report_parallel = run['report_parallel']
+        st.subheader("Profiling Report")
+        st.dataframe(stage_table(
+            {'Serial': run['report_serial'], 'Parallel': report_parallel},
+            shared_timings=run['parse_timings'],
+        ))
+
+        pool_metrics = report_parallel['pool']
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("Worker utilization", f"{pool_metrics['mean_utilization'] * 100:.0f}%")
+        metric_cols[1].metric("Mean queue wait", f"{pool_metrics['queue_wait_mean'] * 1000:.1f} ms")
+        metric_cols[2].metric("Pickling time", f"{pool_metrics['pickle_time'] * 1000:.1f} ms")
+        metric_cols[3].metric("Worker idle time", f"{pool_metrics['worker_idle_mean'] * 1000:.1f} ms")
+        st.caption(
+            f"{pool_metrics['tasks']} tasks on {pool_metrics['workers_used']}/{pool_metrics['workers']} workers, "
+            f"{pool_metrics['payload_bytes'] / 1024:.0f} KiB sent, "
+            f"{pool_metrics['result_bytes'] / 1024:.0f} KiB returned"
+        )
+        st.bar_chart(
+            pd.Series(pool_metrics['worker_utilization'], name='Utilization').rename_axis('Worker PID')
+        )
+
+    elif processing_mode == "Screening service":
+        service = run['service']
+        st.write(f"Processing time: {run['time_service']:.4f} seconds")
+        st.caption(
+            f"Screening service at {service_address()}: scored with {service['batch_size'] - 1} other "
+            f"requests for this job, {service['queue_seconds'] * 1000:.0f} ms queued"
+        )
+    elif processing_mode == "Feature store (fast re-rank)":
+        st.write(f"Processing time: {run['time_store']:.4f} seconds")
+        store_stats = get_feature_store().stats()
+        st.caption(
+            f"Feature store: {store_stats['entries']} resumes stored, "
+            f"{store_stats['computed']} computed and {store_stats['reused']} reused this session"
+        )
+    else:  # Auto, Serial or Parallel
+        st.write(f"Processing time: {max(time_serial, time_parallel):.4f} seconds")
+        plan = run.get('plan')
+        if plan:
+            workers = f"{plan['workers']} workers, chunk size {plan['chunksize']}" \
+                if plan['executor'] == 'parallel' else "1 process"
+            st.caption(
+                f"Auto mode chose {plan['executor']} execution for {plan['num_resumes']} resumes ({workers}; "
+                f"{plan['available_cpus']} usable CPUs). Predicted {plan['predicted_time']:.3f} s "
+                f"(serial {plan['predicted_serial']:.3f} s), actual {plan['actual_time']:.3f} s."
+            )
+        if run.get('pipeline'):
+            # Throughput per stage; the slowest one bounds the run
+            units = {'read': 'thread', 'score': 'worker'}
+            st.caption("Pipeline: " + ", ".join(
+                f"{stats['stage']} {stats['throughput']:.0f} resumes/s"
+                + (f" on {stats['workers']} {units[stats['stage']]}{'s' if stats['workers'] != 1 else ''}"
+                   if stats['stage'] in units else "")
+                for stats in run['pipeline']))
+        if run['reused']:
+            st.caption(f"{run['reused']} resumes were already scored for this job and were not scored again")
+
+    # Display the results table
+    st.dataframe(results_df)
+    if 'Duplicate Of' in results_df:
+        duplicates = int((results_df['Duplicate Of'] != '').sum())
+        if duplicates:
+            st.caption(f"{duplicates} near-duplicate resumes were not scored; each shows the score of "
+                       f"the resume named under 'Duplicate Of'")
+
+    cache_stats = get_default_cache().stats()
+    st.caption(
+        f"Parsed-text cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+        f"{cache_stats['misses']} misses ({cache_stats['hit_rate'] * 100:.0f}% hit rate)"
+    )
+
+    # Create a bar chart of resume scores
+    st.subheader("Resume Scores Comparison")
+
+    # Extract top 10 resumes by score
+    top_resumes = results_df.head(10)
+    st.pyplot(score_chart(top_resumes))
+
+    # Parquet and Arrow keep typed columns (keywords as lists) and need pyarrow
+    download_formats = ['csv'] + (['parquet', 'arrow'] if columnar_export_available() else [])
+    download_format = st.selectbox("Download format", download_formats,
+                                   format_func=lambda name: DOWNLOAD_FORMATS[name][0])
+    label, extension, mime = DOWNLOAD_FORMATS[download_format]
+
+    # Files are only written when a download is clicked, in chunks, instead of
+    # keeping serialized copies of the results around on every rerun
+    st.download_button(
+        label=f"Download Results as {label}",
+        data=lambda: export_frame(results_df, download_format),
+        file_name=f"resume_screening_results.{extension}",
+        mime=mime,
+    )
+
+    # Option to save top 10 resumes to a new file
+    st.download_button(
+        label=f"Download Top 10 Resumes as {label}",
+        data=lambda: export_frame(top_resumes, download_format),
+        file_name=f"top10_resumes.{extension}",
+        mime=mime,
+    )
+
 def main():
     st.title("Resume Screening Application")
     st.write("""
@@ -53,23 +442,69 @@ def main():
             # Resume uploads
             st.subheader("Resumes")
             resume_files = st.file_uploader(
-                "Upload Resumes (TXT or PDF)", 
-                type=["txt", "pdf"], 
+                "Upload Resumes (TXT or PDF, or ZIP/tar archives of them)", 
+                type=list(MEMBER_TYPES) + sorted({extension.rsplit('.', 1)[-1] for extension in ARCHIVE_EXTENSIONS}), 
                 accept_multiple_files=True
             )
 
-            st.write(f"Number of resumes uploaded: {len(resume_files)}")
+            st.write(f"Number of files uploaded: {len(resume_files)}")
 
             # Processing option
+            modes = ["Auto", "Serial", "Parallel", "Both (for comparison)", "Feature store (fast re-rank)"]
+            if service_address():
+                # A running screening_service keeps warm workers and caches across sessions
+                modes.append("Screening service")
             processing_mode = st.radio(
                 "Choose processing mode:",
-                ["Serial", "Parallel", "Both (for comparison)"]
+                modes,
+                help="Auto times a sample of the resumes and picks serial or parallel execution, "
+                     "the worker count and the chunk size for this batch."
+            )
+
+            # Stored features hold single-word keywords, so phrases are only matched in the other modes
+            phrase_matching = processing_mode != "Feature store (fast re-rank)" and st.checkbox(
+                "Match multi-word skills as phrases",
+                help='Count terms like "machine learning" or "Node.js" as one keyword instead of several.'
+            )
+            deduplicate = processing_mode in ("Auto", "Serial", "Parallel", "Both (for comparison)") and st.checkbox(
+                "Score near-duplicate resumes once",
+                help="Resumes that are nearly identical to an earlier upload (the same candidate applying "
+                     "twice, a re-exported PDF) get that upload's score instead of being scored again."
             )
 
+            weights = None
+            if processing_mode == "Feature store (fast re-rank)":
+                # Stored resume features make re-ranking with new weights cheap
+                weight_cols = st.columns(3)
+                weights = {
+                    'keyword_match': weight_cols[0].slider(
+                        "Keyword weight", 0.0, 1.0, DEFAULT_WEIGHTS['keyword_match'], 0.05),
+                    'experience': weight_cols[1].slider(
+                        "Experience weight", 0.0, 1.0, DEFAULT_WEIGHTS['experience'], 0.05),
+                    'education': weight_cols[2].slider(
+                        "Education weight", 0.0, 1.0, DEFAULT_WEIGHTS['education'], 0.05),
+                }
+
+        # Hash the inputs so results can be reused across reruns and only new files get scored
+        upload_keys = [upload_key(resume_file) for resume_file in resume_files]
+        job_key = job_version(cached_job_keywords(job_description, phrase_matching)) if job_description else None
+        signature = (
+            job_key, tuple(upload_keys), tuple(resume_file.name for resume_file in resume_files),
+            processing_mode, tuple(sorted(weights.items())) if weights else None, deduplicate,
+        )
+        last_run = st.session_state.get('last_run')
+
         # Process button
         process_button = st.button("Process Resumes", type="primary")
 
-        if process_button:
+        # In feature store mode, editing the job description or the weights re-ranks right away
+        rerank = (
+            processing_mode == "Feature store (fast re-rank)" and last_run is not None
+            and last_run['mode'] == processing_mode and last_run['signature'][1:3] == signature[1:3]
+            and last_run['signature'] != signature and bool(job_description)
+        )
+
+        if process_button or rerank:
             if not job_description:
                 st.error("Please provide a job description.")
             elif not resume_files:
@@ -77,107 +512,97 @@ def main():
             else:
                 # Process the resumes
                 with st.spinner("Processing resumes..."):
-                    # Parse resume files
-                    resumes = []
-                    for resume_file in resume_files:
-                        file_type = resume_file.name.split('.')[-1].lower()
-
-                        # Create a temporary file for PDF processing
-                        if file_type == 'pdf':
-                            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                                tmp.write(resume_file.getvalue())
-                                tmp_path = tmp.name
-
-                            resume_text = parse_resume_text(tmp_path, file_type)
-                            # Remove the temporary file
-                            os.unlink(tmp_path)
-                        else:
-                            resume_text = parse_resume_text(resume_file.getvalue(), file_type)
-
-                        resumes.append({
-                            'text': resume_text,
-                            'name': resume_file.name
-                        })
+                    if processing_mode == "Parallel" and not deduplicate:
+                        # New files are parsed by the pipeline while earlier ones are scored
+                        resumes = upload_resumes(resume_files, upload_keys)
+                    elif processing_mode == "Screening service":
+                        # The service parses new files (and caches their text) itself
+                        resumes = upload_resumes(resume_files, upload_keys)
+                    else:
+                        resumes = parse_uploads(resume_files, upload_keys)
+                    parse_timings = collect_stage_timings()
 
                     # Process based on selected mode
-                    results_serial = None
-                    results_parallel = None
-                    time_serial = 0
-                    time_parallel = 0
-
-                    if processing_mode in ["Serial", "Both (for comparison)"]:
-                        results_serial, time_serial = process_resumes_serial(job_description, resumes)
-
-                    if processing_mode in ["Parallel", "Both (for comparison)"]:
-                        results_parallel, time_parallel = process_resumes_parallel(job_description, resumes)
-
-                # Display results
-                st.subheader("Screening Results")
-
-                if processing_mode == "Both (for comparison)":
-                    st.write(f"Serial processing time: {time_serial:.4f} seconds")
-                    st.write(f"Parallel processing time: {time_parallel:.4f} seconds")
-
-                    if time_serial > 0:
-                        speedup = time_serial / time_parallel
-                        st.write(f"Speedup: {speedup:.2f}x")
-
-                    st.write("Both processing methods produce identical results. Showing results from parallel processing:")
-                    results_df = results_parallel
-
-                    # Create a bar chart to compare processing times
-                    fig, ax = plt.subplots(figsize=(10, 5))
-                    ax.bar(['Serial', 'Parallel'], [time_serial, time_parallel])
-                    ax.set_ylabel('Processing Time (seconds)')
-                    ax.set_title('Processing Time Comparison')
-                    st.pyplot(fig)
-
-                elif processing_mode == "Serial":
-                    st.write(f"Processing time: {time_serial:.4f} seconds")
-                    results_df = results_serial
-                else:  # Parallel
-                    st.write(f"Processing time: {time_parallel:.4f} seconds")
-                    results_df = results_parallel
-
-                # Display the results table
-                st.dataframe(results_df)
-
-                # Create a bar chart of resume scores
-                st.subheader("Resume Scores Comparison")
-                fig, ax = plt.subplots(figsize=(12, 6))
-
-                # Extract top 10 resumes by score
-                top_resumes = results_df.head(10)
-
-                # Create horizontal bar chart
-                ax.barh(top_resumes['Resume'], top_resumes['Final Score (%)'])
-                ax.set_xlabel('Score (%)')
-                ax.set_ylabel('Resume')
-                ax.set_title('Top 10 Resume Scores')
-                ax.invert_yaxis()  # Higher scores at the top
-
-                # Set x-axis limit to 100%
-                ax.set_xlim(0, 100)
-
-                st.pyplot(fig)
-
-                # Option to download results as CSV
-                csv = results_df.to_csv(index=False)
-                st.download_button(
-                    label="Download Results as CSV",
-                    data=csv,
-                    file_name="resume_screening_results.csv",
-                    mime="text/csv",
-                )
-
-                # Option to save top 10 resumes to a new CSV
-                top10_csv = top_resumes.to_csv(index=False)
-                st.download_button(
-                    label="Download Top 10 Resumes as CSV",
-                    data=top10_csv,
-                    file_name="top10_resumes.csv",
-                    mime="text/csv",
-                )
+                    run = {
+                        'signature': signature,
+                        'mode': processing_mode,
+                        'parse_timings': parse_timings,
+                        'time_serial': 0,
+                        'time_parallel': 0,
+                        'time_store': 0,
+                    }
+
+                    if processing_mode == "Both (for comparison)":
+                        # A timing comparison has to redo all the work, so nothing is reused here
+                        _, run['time_serial'], run['report_serial'] = process_resumes_serial(
+                            job_description, resumes, profile=True, phrase_matching=phrase_matching,
+                            deduplicate=deduplicate)
+                        run['results_df'], run['time_parallel'], run['report_parallel'] = process_resumes_parallel(
+                            job_description, resumes, profile=True, phrase_matching=phrase_matching,
+                            deduplicate=deduplicate)
+                    elif processing_mode == "Feature store (fast re-rank)":
+                        run['results_df'], run['time_store'] = process_resumes_from_store(
+                            job_description, resumes, weights)
+                    elif processing_mode == "Screening service":
+                        try:
+                            fields = ('name', 'text', 'content', 'type')
+                            sent = [{field: resume[field] for field in fields if field in resume} for resume in resumes]
+                            run['results_df'], run['time_service'], run['service'] = screen_with_service(
+                                job_description, sent, phrase_matching=phrase_matching)
+                        except (OSError, ServiceError) as e:
+                            st.error(f"The screening service at {service_address()} failed: {e}")
+                            run = None
+
+                # Single-mode runs stream their results onto the page as they are scored,
+                # scoring only the files that have no result for this job yet
+                if processing_mode in ("Auto", "Serial", "Parallel"):
+                    scored = session_results(job_key)
+                    # Near-duplicates take the result of the first upload they resemble
+                    duplicate_of = {}
+                    if deduplicate:
+                        distinct = list({resume['key']: resume for resume in resumes}.values())
+                        groups = find_near_duplicates([resume['text'] for resume in distinct])
+                        duplicate_of = {
+                            distinct[index]['key']: distinct[representative]['key']
+                            for index, representative in enumerate(groups['duplicate_of'])
+                            if representative is not None
+                        }
+                    pending = list({
+                        resume['key']: dict({field: resume[field] for field in ('text', 'content', 'type')
+                                             if field in resume}, name=resume['key'])
+                        for resume in resumes if resume['key'] not in scored and resume['key'] not in duplicate_of
+                    }.values())
+                    executor, workers, chunksize = processing_mode.lower(), None, None
+                    if processing_mode == "Auto":
+                        run['plan'] = plan_execution(job_description, pending, phrase_matching=phrase_matching)
+                        executor, workers, chunksize = (
+                            run['plan']['executor'], run['plan']['workers'], run['plan']['chunksize'])
+                    if executor == 'serial':
+                        run['results_df'], run['time_serial'] = stream_results(
+                            iter_resumes_serial(job_description, pending, phrase_matching=phrase_matching),
+                            resumes, scored, duplicate_of if deduplicate else None)
+                    elif processing_mode == "Parallel":
+                        # Reading, PDF parsing/scoring and display overlap as pipeline stages
+                        pipeline = ScreeningPipeline(job_description, text_cache=get_default_cache(),
+                                                     phrase_matching=phrase_matching)
+                        run['results_df'], run['time_parallel'] = stream_results(
+                            pipeline.run(pending), resumes, scored, duplicate_of if deduplicate else None)
+                        run['pipeline'] = pipeline.stats()
+                    else:
+                        run['results_df'], run['time_parallel'] = stream_results(
+                            iter_resumes_parallel(job_description, pending, workers, chunksize,
+                                                  phrase_matching=phrase_matching),
+                            resumes, scored, duplicate_of if deduplicate else None)
+                    if processing_mode == "Auto":
+                        finish_plan(run['plan'], max(run['time_serial'], run['time_parallel']))
+                    run['reused'] = len(resumes) - len(pending) - sum(resume['key'] in duplicate_of for resume in resumes)
+
+                if run is not None:
+                    st.session_state['last_run'] = last_run = run
+
+        # Results stay on the page across reruns (e.g. after a download click) while the inputs are unchanged
+        if last_run is not None and last_run['signature'] == signature:
+            show_results(last_run)
 
     with tab2:
         st.subheader("About this App")
@@ -203,6 +628,8 @@ def main():
         - **Serial Processing**: Processes each resume one after another (suitable for small batches).
         - **Parallel Processing**: Utilizes multiple CPU cores to process resumes simultaneously (faster for large batches).
         - **Both**: Runs both methods and compares performance.
+        - **Feature store**: Stores each resume's tokens, experience and education once, so editing the job
+          description or the score weights re-ranks the whole pool almost instantly.
 
         ### Tips for Best Results:
 
@@ -0,0 +1,122 @@
+import time
+import logging
+import numpy as np
+from scipy import sparse
+from utils import extract_keywords, score_resume_features, combine_scores, format_results
+from instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+def build_vocabulary(keyword_sets):
+    """
+    Assign a column index to every keyword.
+
+    Args:
+        keyword_sets (iterable): Sets of keywords
+
+    Returns:
+        dict: keyword -> column index, in sorted keyword order
+    """
+    terms = set()
+    for keywords in keyword_sets:
+        terms.update(keywords)
+    return {term: index for index, term in enumerate(sorted(terms))}
+
+def presence_matrix(keyword_sets, vocabulary):
+    """
+    Build a binary CSR token-presence matrix, one row per keyword set.
+
+    Keywords missing from the vocabulary are ignored: they cannot match any
+    job keyword, so they do not need a column.
+
+    Args:
+        keyword_sets (list): Sets of keywords
+        vocabulary (dict): keyword -> column index
+
+    Returns:
+        csr_matrix: len(keyword_sets) x len(vocabulary) matrix of 0/1 values
+    """
+    indptr = [0]
+    indices = []
+    for keywords in keyword_sets:
+        indices.extend(sorted(vocabulary[term] for term in keywords if term in vocabulary))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix(
+        (data, np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(keyword_sets), len(vocabulary)),
+    )
+
+def process_resumes_batch(job_descriptions, resumes):
+    """
+    Score many resumes against many job descriptions in one pass.
+
+    Each resume is tokenized and its experience and education are detected
+    once. The keyword match ratios for every (resume, job) pair then come
+    from a single sparse product of the resume and job presence matrices
+    over a shared vocabulary.
+
+    Args:
+        job_descriptions (dict): Job name -> job description text
+        resumes (list): List of dictionaries containing resume data
+            Each dict should have 'text' and 'name' keys
+
+    Returns:
+        tuple: (dict of job name -> DataFrame with results, in the same
+            shape as format_results, execution time in seconds)
+    """
+    logger.info("Batch processing of %d resumes against %d job descriptions",
+                len(resumes), len(job_descriptions))
+
+    start_time = time.time()
+
+    job_names = list(job_descriptions)
+    job_keywords = [extract_keywords(job_descriptions[name]) for name in job_names]
+    resume_keywords = []
+    features = []
+    for resume in resumes:
+        with stage('tokenize'):
+            resume_keywords.append(extract_keywords(resume['text']))
+        features.append(score_resume_features(resume['text']))
+
+    with stage('keyword_match'):
+        vocabulary = build_vocabulary(job_keywords)
+        terms = np.array(sorted(vocabulary, key=vocabulary.get), dtype=object)
+        resume_matrix = presence_matrix(resume_keywords, vocabulary)
+        job_matrix = presence_matrix(job_keywords, vocabulary)
+
+        # M x N matching-keyword counts in one product
+        match_counts = (resume_matrix @ job_matrix.T).toarray()
+        job_sizes = np.array([len(keywords) for keywords in job_keywords], dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            match_ratios = np.where(job_sizes > 0, match_counts / job_sizes, 0.0)
+
+    years_experience = [f['years_experience'] for f in features]
+    experience_scores = np.array([f['experience_score'] for f in features], dtype=np.float64)
+    education_scores = np.array([f['education_score'] for f in features], dtype=np.float64)
+    final_scores = combine_scores(match_ratios, experience_scores[:, None], education_scores[:, None])
+    file_names = [resume['name'] for resume in resumes]
+
+    results = {}
+    for j, name in enumerate(job_names):
+        # Matching keywords are the resume columns that belong to this job
+        job_columns = job_matrix.indices[job_matrix.indptr[j]:job_matrix.indptr[j + 1]]
+        matches = resume_matrix[:, job_columns]
+        matching_keywords = [
+            terms[job_columns[matches.indices[matches.indptr[i]:matches.indptr[i + 1]]]].tolist()
+            for i in range(len(resumes))
+        ]
+        results[name] = format_results({
+            'final_score': final_scores[:, j],
+            'keyword_match_ratio': match_ratios[:, j],
+            'matching_keywords': matching_keywords,
+            'years_experience': years_experience,
+            'experience_score': experience_scores,
+            'education_score': education_scores,
+            'file_name': file_names,
+        })
+
+    execution_time = time.time() - start_time
+    logger.info("Batch processing completed in %.4f seconds", execution_time)
+
+    return results, execution_time
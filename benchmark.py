@@ -0,0 +1,421 @@
+import os
+import io
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import multiprocessing
+
+from generate_resume import generate_corpus
+from utils import parse_resume_text
+from serial_resume_screener import iter_resumes_serial
+from parallel_resume_screener import iter_resumes_parallel, compare_transports, get_pool, available_cpus
+from instrumentation import collect_stage_timings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (100, 1000, 10000)
+DEFAULT_JOB_DESCRIPTION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       'test_data', 'sample_job_description.txt')
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+# Relative change beyond which a result is flagged as a regression
+DEFAULT_TOLERANCE = 0.10
+
+# Entry points whose import cost is paid by every spawned worker and CLI run
+STARTUP_MODULES = ('parallel_resume_screener', 'screen_resumes')
+DEFAULT_IMPORT_BUDGET_MS = 250.0
+# Modules that must only be imported on the code paths that need them
+HEAVY_MODULES = ('pandas', 'numpy', 'scipy', 'pdfminer.high_level', 'dateutil', 'nltk',
+                 'streamlit', 'matplotlib')
+
+def percentile(sorted_values, q):
+    """
+    Linear-interpolated percentile of already sorted values.
+
+    Args:
+        sorted_values (list): Values in ascending order
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile (0.0 for no values)
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100.0
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+def reset_peak_rss(pids=('self',)):
+    """
+    Reset the peak RSS counters of processes, where the OS allows it (Linux).
+
+    Args:
+        pids (iterable): Process IDs, or 'self'
+    """
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/clear_refs', 'w') as f:
+                f.write('5')
+        except OSError:
+            pass
+
+def peak_rss_mb(pid='self'):
+    """
+    Peak resident set size of a process since start (or the last reset).
+
+    Args:
+        pid (int or str): Process ID, or 'self'
+
+    Returns:
+        float or None: Peak RSS in MiB, None if it cannot be read
+    """
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid != 'self':
+        return None
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def measure_import_time(module, runs=3):
+    """
+    Time importing a module in a fresh interpreter with `python -X importtime`.
+
+    Args:
+        module (str): Module name
+        runs (int): Fresh interpreters to try; the fastest is kept
+
+    Returns:
+        dict: 'module', cumulative 'import_ms' and the 'heavy_modules' it pulled in
+    """
+    code = (f"import {module}, sys; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    best = None
+    heavy = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+        )
+        # Lines look like "import time: self [us] | cumulative | imported package"
+        for line in completed.stderr.splitlines():
+            fields = [field.strip() for field in line.split('|')]
+            if len(fields) == 3 and fields[2] == module:
+                cumulative_ms = int(fields[1]) / 1000
+                best = cumulative_ms if best is None else min(best, cumulative_ms)
+        heavy = [name for name in completed.stdout.strip().split(',') if name]
+    return {'module': module, 'import_ms': best, 'heavy_modules': heavy}
+
+def check_import_budget(imports, budget_ms=DEFAULT_IMPORT_BUDGET_MS):
+    """
+    Flag startup modules that are too slow to import or load heavy modules.
+
+    Args:
+        imports (list): measure_import_time results
+        budget_ms (float): Allowed cumulative import time per module
+
+    Returns:
+        list: One dict per violation
+    """
+    violations = []
+    for entry in imports:
+        if entry['import_ms'] is not None and entry['import_ms'] > budget_ms:
+            violations.append({'module': entry['module'], 'metric': 'import_ms',
+                               'budget': budget_ms, 'current': entry['import_ms']})
+        if entry['heavy_modules']:
+            violations.append({'module': entry['module'], 'metric': 'heavy_modules',
+                               'budget': [], 'current': entry['heavy_modules']})
+    return violations
+
+def build_corpus(size, seed, mean_words, vocabulary_size, pdf_fraction):
+    """
+    Generate a corpus and parse it the way the app parses uploads.
+
+    Args:
+        size (int): Number of resumes
+        seed (int): Random seed
+        mean_words (int): Typical filler words per resume
+        vocabulary_size (int): Distinct filler words
+        pdf_fraction (float): Share of PDF resumes
+
+    Returns:
+        tuple: (list of resume dicts with 'text' and 'name', corpus stats dict)
+    """
+    collect_stage_timings()
+    resumes = []
+    pdfs = 0
+    total_bytes = 0
+    start = time.perf_counter()
+    for upload in generate_corpus(size, seed=seed, mean_words=mean_words,
+                                  vocabulary_size=vocabulary_size, pdf_fraction=pdf_fraction):
+        content = upload['content']
+        total_bytes += len(content)
+        if upload['type'] == 'pdf':
+            pdfs += 1
+            content = io.BytesIO(content)
+        resumes.append({'text': parse_resume_text(content, upload['type']), 'name': upload['name']})
+    elapsed = time.perf_counter() - start
+    parse_seconds, _ = collect_stage_timings().get('parse', (0.0, 0))
+    return resumes, {
+        'resumes': size,
+        'pdf': pdfs,
+        'bytes': total_bytes,
+        'characters': sum(len(resume['text']) for resume in resumes),
+        'generate_and_parse_s': elapsed,
+        'parse_s': parse_seconds,
+    }
+
+def measure(results_iter, total):
+    """
+    Drain a streaming screener, recording when each result arrives.
+
+    Args:
+        results_iter (generator): iter_resumes_serial / iter_resumes_parallel
+        total (int): Number of resumes in the run
+
+    Returns:
+        dict: Wall time, throughput and time-to-result percentiles
+    """
+    arrivals = []
+    start = time.perf_counter()
+    for _ in results_iter:
+        arrivals.append(time.perf_counter() - start)
+    wall_time = time.perf_counter() - start
+    if len(arrivals) != total:
+        raise RuntimeError(f"Expected {total} results, got {len(arrivals)}")
+    return {
+        'wall_s': wall_time,
+        'throughput': total / wall_time if wall_time > 0 else 0.0,
+        'latency_ms': {
+            name: percentile(arrivals, q) * 1000
+            for name, q in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100))
+        },
+    }
+
+def run_benchmark(job_description, sizes=DEFAULT_SIZES, seed=0, worker_counts=None, chunksizes=(None,),
+                  serial=True, mean_words=120, vocabulary_size=2000, pdf_fraction=0.0, transports=True,
+                  repeats=3):
+    """
+    Run the benchmark sweep.
+
+    For every corpus size this runs the serial screener and the parallel
+    screener for each worker count and chunk size, timing how long each
+    result takes to arrive. Pools are started and warmed up before timing,
+    and each configuration keeps the fastest of `repeats` runs.
+
+    Args:
+        job_description (str): Job description text
+        sizes (iterable): Corpus sizes
+        seed (int): Corpus random seed
+        worker_counts (iterable, optional): Pool sizes (defaults to available_cpus())
+        chunksizes (iterable): Parallel chunk sizes; None picks the default
+        serial (bool): Include the serial screener
+        mean_words (int): Typical filler words per resume
+        vocabulary_size (int): Distinct filler words
+        pdf_fraction (float): Share of PDF resumes
+        transports (bool): Also compare the pickle and shared-memory transports
+        repeats (int): Timed runs per configuration
+
+    Returns:
+        dict: Benchmark report ('meta', 'corpora', 'results', 'transports')
+    """
+    worker_counts = list(worker_counts or [available_cpus()])
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': multiprocessing.cpu_count(),
+            'available_cpus': available_cpus(),
+            'seed': seed,
+            'mean_words': mean_words,
+            'vocabulary_size': vocabulary_size,
+            'pdf_fraction': pdf_fraction,
+            'repeats': repeats,
+        },
+        'corpora': [],
+        'results': [],
+        'transports': [],
+    }
+
+    for size in sizes:
+        resumes, corpus_stats = build_corpus(size, seed, mean_words, vocabulary_size, pdf_fraction)
+        report['corpora'].append(corpus_stats)
+        logger.info("Corpus of %d resumes ready (%d PDF)", size, corpus_stats['pdf'])
+
+        configs = [('serial', 1, None)] if serial else []
+        configs += [('parallel', workers, chunksize) for workers in worker_counts for chunksize in chunksizes]
+        for mode, workers, chunksize in configs:
+            pids = ['self']
+            if mode == 'parallel':
+                # Start and warm the pool outside the timed region
+                pool = get_pool()
+                for _ in iter_resumes_parallel(job_description, resumes[:workers * 4], workers, chunksize):
+                    pass
+                pids += pool.worker_pids()
+            reset_peak_rss(pids)
+            result = None
+            for _ in range(repeats):
+                if mode == 'parallel':
+                    results_iter = iter_resumes_parallel(job_description, resumes, workers, chunksize)
+                else:
+                    results_iter = iter_resumes_serial(job_description, resumes)
+                run = measure(results_iter, size)
+                if result is None or run['wall_s'] < result['wall_s']:
+                    result = run
+            worker_peaks = [peak for peak in map(peak_rss_mb, pids[1:]) if peak is not None]
+            result.update({
+                'repeats': repeats,
+                'size': size,
+                'mode': mode,
+                'workers': workers,
+                'chunksize': chunksize,
+                'peak_rss_mb': peak_rss_mb(),
+                'worker_peak_rss_mb': max(worker_peaks) if worker_peaks else None,
+            })
+            report['results'].append(result)
+            logger.info("%s size=%d workers=%d chunksize=%s: %.1f resumes/s",
+                        mode, size, workers, chunksize, result['throughput'])
+
+        if transports:
+            timings = compare_transports(job_description, resumes, processes=max(worker_counts), repeats=repeats)
+            timings.update({'size': size, 'workers': max(worker_counts)})
+            report['transports'].append(timings)
+
+    return report
+
+def result_key(result):
+    return (result['size'], result['mode'], result['workers'], result['chunksize'])
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Flag results that got worse than the matching baseline result.
+
+    A result regresses when its throughput drops, or its p99 time-to-result
+    or peak RSS grows, by more than the tolerance. Results without a matching
+    (size, mode, workers, chunksize) entry in the baseline are not compared.
+
+    Args:
+        report (dict): Output of run_benchmark
+        baseline (dict): An earlier report
+        tolerance (float): Allowed relative change
+
+    Returns:
+        list: One dict per regressed metric
+    """
+    previous = {result_key(result): result for result in baseline.get('results', [])}
+    checks = (
+        ('throughput', lambda r: r['throughput'], False),
+        ('latency_p99_ms', lambda r: r['latency_ms']['p99'], True),
+        ('peak_rss_mb', lambda r: r['peak_rss_mb'], True),
+    )
+    regressions = []
+    for result in report['results']:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        for metric, value, lower_is_better in checks:
+            current, reference = value(result), value(old)
+            if current is None or reference is None or reference <= 0:
+                continue
+            change = (current - reference) / reference
+            if (change > tolerance) if lower_is_better else (change < -tolerance):
+                regressions.append({
+                    'size': result['size'],
+                    'mode': result['mode'],
+                    'workers': result['workers'],
+                    'chunksize': result['chunksize'],
+                    'metric': metric,
+                    'baseline': reference,
+                    'current': current,
+                    'change': change,
+                })
+    return regressions
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item]
+
+def _chunksize_list(value):
+    return [None if item == 'auto' else int(item) for item in value.split(',') if item]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the resume screeners on synthetic corpora.")
+    parser.add_argument('--sizes', type=_int_list, default=list(DEFAULT_SIZES),
+                        help="Comma-separated corpus sizes (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="Corpus random seed")
+    parser.add_argument('--workers', type=_int_list, default=None,
+                        help="Comma-separated worker counts (default: usable CPUs)")
+    parser.add_argument('--chunksizes', type=_chunksize_list, default=[None],
+                        help="Comma-separated chunk sizes, 'auto' for the default")
+    parser.add_argument('--no-serial', dest='serial', action='store_false', help="Skip the serial screener")
+    parser.add_argument('--no-transports', dest='transports', action='store_false',
+                        help="Skip the pickle vs shared-memory comparison")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help="Timed runs per configuration, the fastest is kept (default: %(default)s)")
+    parser.add_argument('--mean-words', type=int, default=120, help="Typical filler words per resume")
+    parser.add_argument('--vocabulary-size', type=int, default=2000, help="Distinct filler words")
+    parser.add_argument('--pdf-fraction', type=float, default=0.0, help="Share of PDF resumes")
+    parser.add_argument('--import-budget-ms', type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                        help="Import time allowed for worker and CLI entry points (default: %(default)s)")
+    parser.add_argument('--job', default=DEFAULT_JOB_DESCRIPTION, help="Job description file")
+    parser.add_argument('--output', default='-', help="Where to write the JSON report ('-' for stdout)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline report to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative change flagged as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stderr, format='%(message)s')
+    logger.setLevel(logging.INFO)
+
+    with open(args.job, 'r', encoding='utf-8') as f:
+        job_description = f.read()
+
+    report = run_benchmark(
+        job_description, sizes=args.sizes, seed=args.seed, worker_counts=args.workers,
+        chunksizes=args.chunksizes, serial=args.serial, mean_words=args.mean_words,
+        vocabulary_size=args.vocabulary_size, pdf_fraction=args.pdf_fraction, transports=args.transports,
+        repeats=args.repeats,
+    )
+
+    report['imports'] = [measure_import_time(module) for module in STARTUP_MODULES]
+    report['import_budget_violations'] = check_import_budget(report['imports'], args.import_budget_ms)
+    for violation in report['import_budget_violations']:
+        logger.warning("Import budget exceeded: %s %s = %s (budget %s)", violation['module'],
+                       violation['metric'], violation['current'], violation['budget'])
+
+    report['regressions'] = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare_to_baseline(report, json.load(f), args.tolerance)
+        for regression in report['regressions']:
+            logger.warning("Regression: %s size=%d workers=%d chunksize=%s %s %.4g -> %.4g (%+.0f%%)",
+                           regression['mode'], regression['size'], regression['workers'],
+                           regression['chunksize'], regression['metric'], regression['baseline'],
+                           regression['current'], regression['change'] * 100)
+
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        logger.info("Baseline saved to %s", args.baseline)
+
+    return 1 if report['regressions'] or report['import_budget_violations'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
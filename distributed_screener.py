@@ -0,0 +1,553 @@
+import os
+import sys
+import hmac
+import json
+import time
+import base64
+import socket
+import struct
+import logging
+import argparse
+import threading
+import multiprocessing
+from collections import deque
+
+from utils import extract_job_terms, format_results, score_resume_within_limits
+from ranking import TopKRanker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 7650
+DEFAULT_SHARD_SIZE = 200
+
+# Workers send a heartbeat this often while scoring a shard; a worker that stays
+# silent for HEARTBEAT_TIMEOUT is considered lost and its shard is handed out again
+HEARTBEAT_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 10.0
+
+# A shard that fails this many times aborts the run
+MAX_SHARD_ATTEMPTS = 3
+
+# Upper bound on one protocol message, so a corrupt length prefix cannot
+# make a peer allocate unbounded memory
+MAX_MESSAGE_BYTES = 256 * 1024 * 1024
+
+_LENGTH = struct.Struct('>I')
+
+def _send(sock, message):
+    """
+    Send one protocol message: a 4-byte big-endian length and a JSON body.
+
+    JSON rather than pickle, so a peer can never make the other side execute
+    code. Floats round-trip exactly, so scores are unchanged.
+    """
+    data = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+def _recv_exactly(sock, size):
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(min(size - len(buffer), 1 << 20))
+        if not chunk:
+            if buffer:
+                raise ConnectionError("Connection closed in the middle of a message")
+            return None
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+def _recv(sock):
+    """
+    Receive one protocol message.
+
+    Returns:
+        dict or None: The message, or None if the peer closed the connection
+    """
+    header = _recv_exactly(sock, _LENGTH.size)
+    if header is None:
+        return None
+    (size,) = _LENGTH.unpack(header)
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes exceeds the {MAX_MESSAGE_BYTES} byte limit")
+    data = _recv_exactly(sock, size)
+    if data is None:
+        raise ConnectionError("Connection closed in the middle of a message")
+    return json.loads(data)
+
+class _WorkerError(Exception):
+    """A worker reported that scoring a shard failed."""
+
+def _default_token():
+    return os.environ.get('RESUME_SCREENER_TOKEN', '')
+
+class DistributedCoordinator:
+    """
+    Hands shards of a resume corpus to remote workers and merges their top K.
+
+    Each connected worker is served by its own thread: it is sent one shard at
+    a time and answers with the shard's local top K as compact TopKRanker rows.
+    While a worker scores, it sends heartbeats; if it goes silent for longer
+    than the heartbeat timeout or its connection drops, its shard goes back to
+    the front of the queue for another worker. Results of a shard that was
+    already completed elsewhere are ignored, so a retried shard is counted
+    once.
+    """
+
+    def __init__(self, job_description, resumes, k=10, shard_size=DEFAULT_SHARD_SIZE, host='127.0.0.1',
+                 port=DEFAULT_PORT, token=None, phrase_matching=False, heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                 max_attempts=MAX_SHARD_ATTEMPTS):
+        """
+        Args:
+            job_description (str): Job description text
+            resumes (list): Dictionaries with 'name' and 'text' keys, or
+                'path' or 'content' (raw bytes, with an optional 'type'); the
+                coordinator reads a file when its shard is sent and the
+                worker parses it
+            k (int): Number of candidates to return
+            shard_size (int): Resumes per work unit
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 picks a free one)
+            token (str, optional): Shared secret workers must present
+                (defaults to $RESUME_SCREENER_TOKEN)
+            phrase_matching (bool): Match compound terms and multi-word skills
+                as single keywords (see utils.extract_job_terms)
+            heartbeat_timeout (float): Seconds of worker silence before its
+                shard is reassigned
+            max_attempts (int): Attempts per shard before the run fails
+        """
+        self.job = {
+            'type': 'welcome',
+            'job_description': job_description,
+            'phrase_matching': phrase_matching,
+            'k': k,
+        }
+        self.k = k
+        self.token = _default_token() if token is None else token
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        indexed = list(enumerate(resumes))
+        self._shards = [indexed[start:start + shard_size] for start in range(0, len(indexed), shard_size)]
+        self._pending = deque(range(len(self._shards)))
+        self._attempts = [0] * len(self._shards)
+        self._done = set()
+        self._ranker = TopKRanker(k)
+        # Skip reason of kept candidates that ran past the workers' per-file limits, by index
+        self._skipped = {}
+        self._cond = threading.Condition()
+        self._error = None
+        self._closed = threading.Event()
+        self.stats = {'shards': len(self._shards), 'workers': 0, 'retries': 0, 'lost_workers': 0,
+                      'duplicates': 0}
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()[:2]
+
+    def serve(self, timeout=None):
+        """
+        Accept workers until every shard is scored.
+
+        Args:
+            timeout (float, optional): Give up after this many seconds
+
+        Returns:
+            TopKRanker: The merged ranking
+
+        Raises:
+            RuntimeError: If a shard failed too often
+            TimeoutError: If the timeout expired first
+        """
+        logger.info("Coordinator listening on %s:%d with %d shards", *self.address, len(self._shards))
+        acceptor = threading.Thread(target=self._accept, name='coordinator-accept', daemon=True)
+        acceptor.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            with self._cond:
+                while self._error is None and len(self._done) < len(self._shards):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"{len(self._shards) - len(self._done)} shards were not scored in time")
+                    self._cond.wait(remaining)
+                if self._error is not None:
+                    raise self._error
+        finally:
+            self.close()
+        return self._ranker
+
+    def results(self):
+        """
+        Returns:
+            list: Result dicts of the merged top K, best first, in the shape
+                format_results expects (with 'skipped' for resumes a worker
+                skipped)
+        """
+        results = self._ranker.results()
+        for result, row in zip(results, self._ranker.rows()):
+            if row[5] in self._skipped:
+                result['skipped'] = self._skipped[row[5]]
+        return results
+
+    def close(self):
+        """Stop accepting workers; connected workers are told the run is over."""
+        if not self._closed.is_set():
+            self._closed.set()
+            self._server.close()
+            with self._cond:
+                self._cond.notify_all()
+
+    def _accept(self):
+        self._server.settimeout(0.5)
+        while not self._closed.is_set():
+            try:
+                conn, peer = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            threading.Thread(target=self._serve_worker, args=(conn, peer), daemon=True).start()
+
+    def _serve_worker(self, conn, peer):
+        with conn:
+            conn.settimeout(self.heartbeat_timeout)
+            try:
+                hello = _recv(conn)
+            except (OSError, ValueError) as e:
+                logger.warning("Dropping connection from %s:%d: %s", *peer[:2], e)
+                return
+            if not hello or hello.get('type') != 'hello' or \
+                    not hmac.compare_digest(str(hello.get('token', '')), self.token):
+                logger.warning("Rejected worker at %s:%d (bad handshake or token)", *peer[:2])
+                try:
+                    _send(conn, {'type': 'rejected'})
+                except OSError:
+                    pass
+                return
+            worker = f"{hello.get('host', peer[0])}/{hello.get('pid', '?')}"
+            with self._cond:
+                self.stats['workers'] += 1
+            logger.info("Worker %s connected from %s:%d", worker, *peer[:2])
+            try:
+                _send(conn, self.job)
+            except OSError:
+                return
+
+            while True:
+                shard_id = self._next_shard()
+                if shard_id is None:
+                    try:
+                        _send(conn, {'type': 'done'})
+                    except OSError:
+                        pass
+                    return
+                try:
+                    _send(conn, self._shard_message(shard_id))
+                    while True:
+                        message = _recv(conn)
+                        if message is None:
+                            raise ConnectionError("worker closed the connection")
+                        kind = message.get('type')
+                        if kind == 'heartbeat':
+                            continue
+                        if kind == 'error':
+                            raise _WorkerError(message.get('message', 'worker error'))
+                        if kind == 'result' and message.get('shard_id') == shard_id:
+                            self._complete(shard_id, message)
+                            break
+                except Exception as e:
+                    # socket.timeout is an OSError: the worker missed its heartbeats. Anything
+                    # but a reported scoring error means the connection can't be trusted
+                    logger.warning("Lost shard %d on worker %s: %s", shard_id, worker, e)
+                    self._requeue(shard_id, e)
+                    if not isinstance(e, _WorkerError):
+                        with self._cond:
+                            self.stats['lost_workers'] += 1
+                        return
+
+    def _shard_message(self, shard_id):
+        # Raw file bytes travel as base64; the workers parse them, under their per-file limits
+        resumes = []
+        for index, resume in self._shards[shard_id]:
+            if 'text' in resume:
+                resumes.append([index, {'name': resume['name'], 'text': resume['text']}])
+                continue
+            if 'content' in resume:
+                content = resume['content']
+            else:
+                try:
+                    with open(resume['path'], 'rb') as f:
+                        content = f.read()
+                except OSError as e:
+                    logger.warning("Error reading %s: %s", resume['path'], e)
+                    resumes.append([index, {'name': resume['name'], 'text': ''}])
+                    continue
+            file_type = resume.get('type') or resume.get('path', resume['name']).rsplit('.', 1)[-1].lower()
+            resumes.append([index, {'name': resume['name'], 'type': file_type,
+                                    'content': base64.b64encode(content).decode('ascii')}])
+        return {'type': 'shard', 'shard_id': shard_id, 'resumes': resumes}
+
+    def _next_shard(self):
+        with self._cond:
+            while True:
+                if self._error is not None or self._closed.is_set() or len(self._done) == len(self._shards):
+                    return None
+                if self._pending:
+                    shard_id = self._pending.popleft()
+                    if shard_id in self._done:
+                        continue
+                    self._attempts[shard_id] += 1
+                    return shard_id
+                # Everything is handed out; wait in case a shard comes back
+                self._cond.wait(0.5)
+
+    def _requeue(self, shard_id, reason):
+        with self._cond:
+            if shard_id in self._done:
+                return
+            if self._attempts[shard_id] >= self.max_attempts:
+                self._error = RuntimeError(
+                    f"Shard {shard_id} failed {self._attempts[shard_id]} times; last error: {reason}")
+            else:
+                self._pending.appendleft(shard_id)
+                self.stats['retries'] += 1
+            self._cond.notify_all()
+
+    def _complete(self, shard_id, message):
+        with self._cond:
+            if shard_id in self._done:
+                self.stats['duplicates'] += 1
+                return
+            self._ranker.merge(message['rows'], message['seen'])
+            self._skipped.update(message.get('skipped', []))
+            self._done.add(shard_id)
+            self._cond.notify_all()
+
+def _connect(host, port, connect_timeout):
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            return socket.create_connection((host, port), timeout=connect_timeout)
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+def _heartbeat(sock, send_lock, stop, interval):
+    while not stop.wait(interval):
+        try:
+            with send_lock:
+                _send(sock, {'type': 'heartbeat'})
+        except OSError:
+            return
+
+def run_worker(host, port=DEFAULT_PORT, token=None, heartbeat_interval=HEARTBEAT_INTERVAL, connect_timeout=30.0):
+    """
+    Connect to a coordinator and score shards until it reports the run is over.
+
+    Each resume is parsed and scored with score_resume_within_limits, and
+    only the shard's top K goes back to the coordinator, with the skip
+    reason of any kept resume that ran past the per-file limits.
+
+    Args:
+        host (str): Coordinator host
+        port (int): Coordinator port
+        token (str, optional): Shared secret (defaults to $RESUME_SCREENER_TOKEN)
+        heartbeat_interval (float): Seconds between heartbeats while scoring
+        connect_timeout (float): Seconds to keep retrying the initial connection
+
+    Returns:
+        int: Number of shards this worker scored
+    """
+    token = _default_token() if token is None else token
+    sock = _connect(host, port, connect_timeout)
+    shards = 0
+    with sock:
+        sock.settimeout(None)
+        _send(sock, {'type': 'hello', 'token': token, 'host': socket.gethostname(), 'pid': os.getpid()})
+        welcome = _recv(sock)
+        if not welcome or welcome.get('type') != 'welcome':
+            raise ConnectionError(f"Coordinator at {host}:{port} rejected this worker")
+        job_keywords = extract_job_terms(welcome['job_description'], welcome['phrase_matching'])
+        k = welcome['k']
+        send_lock = threading.Lock()
+
+        while True:
+            message = _recv(sock)
+            if message is None or message['type'] == 'done':
+                break
+            stop = threading.Event()
+            beater = threading.Thread(target=_heartbeat, args=(sock, send_lock, stop, heartbeat_interval),
+                                      daemon=True)
+            beater.start()
+            try:
+                ranker = TopKRanker(k)
+                skipped = {}
+                for index, resume in message['resumes']:
+                    if 'content' in resume:
+                        resume = dict(resume, content=base64.b64decode(resume['content']))
+                    result = score_resume_within_limits(resume, job_keywords)
+                    if result.get('skipped'):
+                        skipped[index] = result['skipped']
+                    ranker.offer(result, index)
+                rows = ranker.rows()
+                reply = {'type': 'result', 'shard_id': message['shard_id'], 'seen': ranker.seen, 'rows': rows,
+                         'skipped': [[row[5], skipped[row[5]]] for row in rows if row[5] in skipped]}
+            except Exception as e:
+                logger.exception("Scoring shard %d failed", message['shard_id'])
+                reply = {'type': 'error', 'shard_id': message['shard_id'], 'message': str(e)}
+            finally:
+                stop.set()
+                beater.join()
+            with send_lock:
+                _send(sock, reply)
+            shards += 1
+    logger.info("Worker finished after %d shards", shards)
+    return shards
+
+def rank_resumes_distributed(job_description, resumes, k=10, host='127.0.0.1', port=DEFAULT_PORT,
+                             shard_size=DEFAULT_SHARD_SIZE, token=None, phrase_matching=False, timeout=None):
+    """
+    Rank resumes on remote workers, keeping only the top K.
+
+    Listens for workers started with `python distributed_screener.py worker`
+    and returns once every shard is scored.
+
+    Args:
+        job_description (str): Job description text
+        resumes (list): Dictionaries with 'name' and 'text' (or 'path') keys
+        k (int): Number of candidates to return
+        host (str): Interface to listen on
+        port (int): Port to listen on
+        shard_size (int): Resumes per work unit
+        token (str, optional): Shared secret (defaults to $RESUME_SCREENER_TOKEN)
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+        timeout (float, optional): Give up after this many seconds
+
+    Returns:
+        tuple: (DataFrame with the top K results, execution time in seconds,
+            coordinator stats)
+    """
+    start_time = time.time()
+    coordinator = DistributedCoordinator(job_description, resumes, k, shard_size, host, port, token,
+                                         phrase_matching)
+    ranker = coordinator.serve(timeout)
+    execution_time = time.time() - start_time
+    logger.info("Distributed ranking of %d resumes completed in %.4f seconds (%s)", ranker.seen,
+                execution_time, coordinator.stats)
+    return format_results(coordinator.results()), execution_time, coordinator.stats
+
+def run_local_cluster(job_description, resumes, k=10, workers=2, shard_size=DEFAULT_SHARD_SIZE,
+                      phrase_matching=False, timeout=None):
+    """
+    Run the coordinator and several workers on localhost.
+
+    Exercises the same protocol as a multi-host run, which makes it handy for
+    testing and for trying out shard sizes.
+
+    Args:
+        job_description (str): Job description text
+        resumes (list): Dictionaries with 'name' and 'text' (or 'path') keys
+        k (int): Number of candidates to return
+        workers (int): Number of local worker processes
+        shard_size (int): Resumes per work unit
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+        timeout (float, optional): Give up after this many seconds
+
+    Returns:
+        tuple: (DataFrame with the top K results, execution time in seconds,
+            coordinator stats)
+    """
+    start_time = time.time()
+    token = os.urandom(16).hex()
+    coordinator = DistributedCoordinator(job_description, resumes, k, shard_size, '127.0.0.1', 0, token,
+                                         phrase_matching)
+    host, port = coordinator.address
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(host, port, token), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        coordinator.serve(timeout)
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    execution_time = time.time() - start_time
+    return format_results(coordinator.results()), execution_time, coordinator.stats
+
+def _parse_address(value, default_host):
+    host, _, port = value.rpartition(':')
+    return host or default_host, int(port) if port else DEFAULT_PORT
+
+def main(argv=None):
+    # The CLI helpers are only needed when run as a script
+    from screen_resumes import find_resumes, write_results
+    from resume_archives import iter_resume_inputs
+    from result_export import EXPORT_FORMATS, export_format
+
+    parser = argparse.ArgumentParser(description="Distributed resume screening over TCP.")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log progress")
+    parser.add_argument('--token', default=None, help="Shared secret (default: $RESUME_SCREENER_TOKEN)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinator = commands.add_parser('coordinator', help="Shard a corpus and collect the top K")
+    coordinator.add_argument('job', help="Job description .txt file")
+    coordinator.add_argument('inputs', nargs='+',
+                             help="Resume directories, files, ZIP/tar archives or glob patterns")
+    coordinator.add_argument('-o', '--output', required=True,
+                             help="Ranked results file (.csv, .parquet or .arrow/.feather)")
+    coordinator.add_argument('--format', choices=EXPORT_FORMATS, default=None,
+                             help="Output format (default: from the output file extension)")
+    coordinator.add_argument('--listen', default=f'0.0.0.0:{DEFAULT_PORT}', help="HOST:PORT to listen on")
+    coordinator.add_argument('--top', type=int, default=100, help="Number of candidates to keep")
+    coordinator.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help="Resumes per work unit")
+    coordinator.add_argument('--phrases', action='store_true', help="Match multi-word skills as single keywords")
+    coordinator.add_argument('--timeout', type=float, default=None, help="Give up after this many seconds")
+
+    worker = commands.add_parser('worker', help="Score shards for a coordinator")
+    worker.add_argument('connect', help="Coordinator HOST:PORT")
+    worker.add_argument('--processes', type=int, default=1, help="Worker processes to run on this host")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stderr, format='%(asctime)s %(levelname)s %(message)s')
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    if args.command == 'worker':
+        host, port = _parse_address(args.connect, '127.0.0.1')
+        if args.processes == 1:
+            run_worker(host, port, args.token)
+            return 0
+        processes = [multiprocessing.Process(target=run_worker, args=(host, port, args.token))
+                     for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return 0 if all(process.exitcode == 0 for process in processes) else 1
+
+    with open(args.job, 'r', encoding='utf-8') as f:
+        job_description = f.read()
+    paths = find_resumes(args.inputs)
+    if not paths:
+        logger.error("No .txt or .pdf resumes or archives found in %s", ', '.join(args.inputs))
+        return 3
+    host, port = _parse_address(args.listen, '0.0.0.0')
+    # Archive members are held by the coordinator until their shard is sent
+    resumes = list(iter_resume_inputs(paths))
+    start_time = time.time()
+    coordinator = DistributedCoordinator(job_description, resumes, args.top, args.shard_size, host, port,
+                                         args.token, args.phrases)
+    try:
+        coordinator.serve(args.timeout)
+    except (RuntimeError, TimeoutError) as e:
+        logger.error("Distributed run failed: %s", e)
+        return 1
+    written = write_results(coordinator.results(), args.output, args.format or export_format(args.output))
+    stats = coordinator.stats
+    logger.info("Wrote top %d of %d resumes to %s in %.1f seconds (%d workers, %d retries)",
+                written, len(resumes), args.output, time.time() - start_time, stats['workers'], stats['retries'])
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
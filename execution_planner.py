@@ -0,0 +1,240 @@
+import os
+import math
+import time
+import logging
+import multiprocessing
+
+from utils import extract_job_terms, score_resume, load_resume_text
+from serial_resume_screener import process_resumes_serial
+from parallel_resume_screener import (process_resumes_parallel, available_cpus, default_chunksize,
+                                      warm_workers)
+
+logger = logging.getLogger(__name__)
+
+# Resumes timed to estimate the cost of scoring one
+DEFAULT_SAMPLE_SIZE = 16
+
+# Cost model of the warm pool, measured on a fork-based Linux host. Each task
+# (chunk) costs a round trip through the pool's queues; the parent pickles
+# every text and unpickles every result on its own.
+TASK_OVERHEAD_SECONDS = 2e-4
+IPC_SECONDS_PER_BYTE = 5e-9
+RESULT_IPC_SECONDS = 2e-5
+FORK_STARTUP_SECONDS = 0.05
+FORK_STARTUP_SECONDS_PER_WORKER = 0.005
+# Spawned workers start a fresh interpreter and re-import the screener
+SPAWN_STARTUP_SECONDS_PER_WORKER = 0.3
+
+# Chunks should hold at least this much work to amortize the task overhead
+TARGET_CHUNK_SECONDS = 0.02
+
+# Parallel execution has to beat the serial prediction by this factor to be chosen
+PARALLEL_MIN_GAIN = 0.9
+
+def _resume_size(resume):
+    if 'text' in resume:
+        return len(resume['text'])
+    if 'content' in resume:
+        return len(resume['content'])
+    try:
+        return os.path.getsize(resume['path'])
+    except OSError:
+        return 0
+
+def _pool_startup_seconds():
+    # The shared pool is started once, with a worker per usable CPU
+    if warm_workers():
+        return 0.0
+    workers = available_cpus()
+    if multiprocessing.get_start_method() == 'fork':
+        return FORK_STARTUP_SECONDS + FORK_STARTUP_SECONDS_PER_WORKER * workers
+    return SPAWN_STARTUP_SECONDS_PER_WORKER * workers
+
+def estimate_resume_cost(job_keywords, resumes, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Time a sample of resumes and fit the cost of scoring one against its size.
+
+    The model is cost = fixed + per_char * size, fitted by least squares over
+    an evenly spaced sample, so a pool of long resumes is predicted to cost
+    more than a pool of short ones.
+
+    Args:
+        job_keywords (set or JobMatcher): Job keywords (see utils.extract_job_terms)
+        resumes (list): Dictionaries with 'text' (or 'path') and 'name' keys
+        sample_size (int): Number of resumes to time
+
+    Returns:
+        dict: 'fixed' and 'per_char' seconds, 'samples' and the time spent
+    """
+    start_time = time.perf_counter()
+    step = max(len(resumes) // max(sample_size, 1), 1)
+    sample = resumes[::step][:sample_size]
+    if not sample:
+        return {'fixed': 0.0, 'per_char': 0.0, 'samples': 0, 'seconds': 0.0}
+
+    # The first call pays for one-off setup (compiled patterns, lazy imports)
+    score_resume(load_resume_text(sample[0]), job_keywords)
+    sizes, costs = [], []
+    for resume in sample:
+        resume_start = time.perf_counter()
+        score_resume(load_resume_text(resume), job_keywords)
+        costs.append(time.perf_counter() - resume_start)
+        sizes.append(_resume_size(resume))
+
+    mean_size = sum(sizes) / len(sizes)
+    mean_cost = sum(costs) / len(costs)
+    variance = sum((size - mean_size) ** 2 for size in sizes)
+    per_char = 0.0
+    if variance > 0:
+        per_char = sum((size - mean_size) * (cost - mean_cost)
+                       for size, cost in zip(sizes, costs)) / variance
+    fixed = mean_cost - per_char * mean_size
+    if per_char < 0:
+        fixed, per_char = mean_cost, 0.0
+    elif fixed < 0:
+        fixed, per_char = 0.0, sum(costs) / max(sum(sizes), 1)
+    return {
+        'fixed': fixed,
+        'per_char': per_char,
+        'samples': len(sample),
+        'seconds': time.perf_counter() - start_time,
+    }
+
+def plan_chunksize(num_resumes, workers, resume_seconds):
+    """
+    Chunk size that amortizes the per-task overhead without starving workers.
+
+    Args:
+        num_resumes (int): Number of resumes in the batch
+        workers (int): Number of pool workers
+        resume_seconds (float): Estimated time to score one resume
+
+    Returns:
+        int: Resumes sent to a worker at a time
+    """
+    wanted = math.ceil(TARGET_CHUNK_SECONDS / resume_seconds) if resume_seconds > 0 else num_resumes
+    # Never fewer than four chunks per worker, so the load stays balanced
+    return max(min(wanted, default_chunksize(num_resumes, workers)), 1)
+
+def plan_execution(job_description, resumes, max_workers=None, sample_size=DEFAULT_SAMPLE_SIZE,
+                   phrase_matching=False):
+    """
+    Choose the executor, worker count and chunk size for a batch.
+
+    Predicts the serial time from a timed sample and the size of every resume,
+    and the parallel time for each number of workers up to the usable CPUs
+    (honoring the affinity mask and cgroup quota), including pool startup,
+    per-task overhead and the parent's share of pickling. The plan's workers
+    cap how many workers of the shared pool the run keeps busy; the pool
+    itself is never resized.
+
+    Args:
+        job_description (str): Job description text
+        resumes (list): Dictionaries with 'text' (or 'path') and 'name' keys
+        max_workers (int, optional): Most workers to consider (defaults to
+            available_cpus())
+        sample_size (int): Number of resumes to time
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+
+    Returns:
+        dict: The decision ('executor', 'workers', 'chunksize'), its
+            predicted time and the inputs it was based on
+    """
+    start_time = time.perf_counter()
+    cpus = available_cpus()
+    max_workers = min(max_workers or cpus, cpus)
+    job_keywords = extract_job_terms(job_description, phrase_matching)
+    cost = estimate_resume_cost(job_keywords, resumes, sample_size)
+
+    num_resumes = len(resumes)
+    total_size = sum(_resume_size(resume) for resume in resumes)
+    serial_time = num_resumes * cost['fixed'] + total_size * cost['per_char']
+    resume_seconds = serial_time / num_resumes if num_resumes else 0.0
+    parent_time = total_size * IPC_SECONDS_PER_BYTE + num_resumes * RESULT_IPC_SECONDS
+
+    startup_time = _pool_startup_seconds()
+    best = None
+    for workers in range(1, max_workers + 1):
+        chunksize = plan_chunksize(num_resumes, workers, resume_seconds)
+        predicted = (startup_time + parent_time + serial_time / workers
+                     + math.ceil(num_resumes / chunksize) * TASK_OVERHEAD_SECONDS)
+        if best is None or predicted < best['predicted_time']:
+            best = {'workers': workers, 'chunksize': chunksize, 'predicted_time': predicted}
+
+    plan = {
+        'num_resumes': num_resumes,
+        'total_chars': total_size,
+        'available_cpus': cpus,
+        'resume_seconds': resume_seconds,
+        'samples': cost['samples'],
+        'predicted_serial': serial_time,
+        'predicted_parallel': best['predicted_time'] if best else None,
+    }
+    if best is not None and best['predicted_time'] < serial_time * PARALLEL_MIN_GAIN:
+        plan.update(executor='parallel', workers=best['workers'], chunksize=best['chunksize'],
+                    predicted_time=best['predicted_time'])
+    else:
+        plan.update(executor='serial', workers=1, chunksize=None, predicted_time=serial_time)
+    plan['planning_time'] = time.perf_counter() - start_time
+    logger.info("Execution plan for %d resumes: %s with %d worker(s), chunk size %s; predicted %.3fs "
+                "(serial %.3fs, best parallel %s)", num_resumes, plan['executor'], plan['workers'],
+                plan['chunksize'], plan['predicted_time'], serial_time,
+                "%.3fs" % best['predicted_time'] if best else "n/a")
+    return plan
+
+def finish_plan(plan, actual_time):
+    """
+    Record how long the planned run actually took.
+
+    Args:
+        plan (dict): Output of plan_execution (updated in place)
+        actual_time (float): Measured execution time in seconds
+
+    Returns:
+        dict: The plan, with 'actual_time' and 'prediction_error' (relative)
+    """
+    plan['actual_time'] = actual_time
+    predicted = plan['predicted_time']
+    plan['prediction_error'] = (actual_time - predicted) / predicted if predicted > 0 else 0.0
+    logger.info("Planned %s run took %.3fs (predicted %.3fs)", plan['executor'], actual_time, predicted)
+    return plan
+
+def process_resumes_auto(job_description, resumes, profile=False, phrase_matching=False, deduplicate=False):
+    """
+    Process resumes with the executor plan_execution picks for the batch.
+
+    Args:
+        job_description (str): Job description text
+        resumes (list): List of dictionaries containing resume data
+            Each dict should have 'text' and 'name' keys
+        profile (bool): Also return a per-stage profiling report
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+        deduplicate (bool): Score only one resume per group of near-duplicates
+            (see near_duplicates); the plan is made for the resumes scored
+            and the groups are computed once, before planning
+
+    Returns:
+        tuple: (DataFrame with results, execution time in seconds, plan with
+            predicted and actual times), plus the profiling report if
+            profile is set. The execution time includes deduplication; the
+            plan's actual time only covers the run it planned.
+    """
+    start_time = time.time()
+    to_score, groups = resumes, None
+    if deduplicate:
+        from near_duplicates import deduplicate_resumes
+        to_score, groups = deduplicate_resumes(resumes)
+    deduplicate_time = time.time() - start_time
+    plan = plan_execution(job_description, to_score, phrase_matching=phrase_matching)
+    if plan['executor'] == 'parallel':
+        output = process_resumes_parallel(job_description, resumes, plan['workers'], plan['chunksize'],
+                                          profile=profile, phrase_matching=phrase_matching,
+                                          duplicate_groups=groups)
+    else:
+        output = process_resumes_serial(job_description, resumes, profile=profile,
+                                        phrase_matching=phrase_matching, duplicate_groups=groups)
+    results_df, execution_time = output[:2]
+    finish_plan(plan, execution_time)
+    return (results_df, execution_time + deduplicate_time, plan) + tuple(output[2:])
@@ -0,0 +1,308 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+
+import numpy as np
+from utils import (FEATURE_VERSION, extract_keywords, score_resume_features,
+                   combine_scores, format_results)
+from instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURE_DB = os.environ.get(
+    'RESUME_FEATURE_DB',
+    os.path.join(os.path.expanduser('~'), '.cache', 'resume_screener', 'features.sqlite3')
+)
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_BATCH = 900
+
+def feature_key(resume_text):
+    """
+    Compute the store key of a resume's text.
+
+    Args:
+        resume_text (str): Resume text
+
+    Returns:
+        str: Hex digest of the text
+    """
+    return hashlib.sha256(resume_text.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+def compute_features(resume_text):
+    """
+    Compute every job-independent feature of a resume.
+
+    Args:
+        resume_text (str): Resume text
+
+    Returns:
+        dict: score_resume_features output plus the resume's 'keywords' set
+    """
+    with stage('tokenize'):
+        keywords = extract_keywords(resume_text)
+    features = score_resume_features(resume_text)
+    features['keywords'] = keywords
+    return features
+
+class FeatureIndex:
+    """
+    In-memory, column-oriented view of the stored features of a resume pool.
+
+    Keywords are kept as an inverted index (keyword -> rows containing it), so
+    scoring a job only touches the postings of the job's own keywords, and the
+    final scores are computed with numpy over the whole pool at once.
+    """
+
+    def __init__(self, names, features):
+        """
+        Args:
+            names (list): Resume names, in row order
+            features (list): Feature dicts from compute_features, in row order
+        """
+        self.names = list(names)
+        self.years_experience = np.array([f['years_experience'] for f in features], dtype=np.int64)
+        self.experience_scores = np.array([f['experience_score'] for f in features], dtype=np.float64)
+        self.education_scores = np.array([f['education_score'] for f in features], dtype=np.float64)
+        postings = defaultdict(list)
+        for row, f in enumerate(features):
+            for keyword in f['keywords']:
+                postings[keyword].append(row)
+        self._postings = {keyword: np.array(rows, dtype=np.int64) for keyword, rows in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def score(self, job_keywords, weights=None):
+        """
+        Score every resume in the pool against a job.
+
+        Args:
+            job_keywords (set): Set of keywords extracted from job description
+            weights (dict, optional): Component weights (see utils.combine_scores)
+
+        Returns:
+            dict: Result columns in the shape format_results expects
+        """
+        count = len(self.names)
+        terms = sorted(job_keywords)
+        rows = [self._postings[term] for term in terms if term in self._postings]
+        term_ids = [np.full(len(self._postings[term]), i, dtype=np.int64)
+                    for i, term in enumerate(terms) if term in self._postings]
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        term_ids = np.concatenate(term_ids) if term_ids else np.zeros(0, dtype=np.int64)
+
+        match_counts = np.bincount(rows, minlength=count)
+        if job_keywords:
+            keyword_match_ratios = match_counts / len(job_keywords)
+        else:
+            keyword_match_ratios = np.zeros(count, dtype=np.float64)
+
+        # Group the matched keywords by resume; a stable sort keeps them in keyword order
+        order = np.argsort(rows, kind='stable')
+        matched_terms = np.array(terms, dtype=object)[term_ids[order]]
+        matching_keywords = [
+            group.tolist() for group in np.split(matched_terms, np.cumsum(match_counts)[:-1])
+        ] if count else []
+
+        return {
+            'final_score': combine_scores(keyword_match_ratios, self.experience_scores,
+                                          self.education_scores, weights),
+            'keyword_match_ratio': keyword_match_ratios,
+            'matching_keywords': matching_keywords,
+            'years_experience': self.years_experience,
+            'experience_score': self.experience_scores,
+            'education_score': self.education_scores,
+            'file_name': self.names,
+        }
+
+class ResumeFeatureStore:
+    """
+    SQLite store of job-independent resume features, keyed by a hash of the
+    resume text.
+
+    Tokens, years of experience and the experience and education scores are
+    computed once per distinct resume; re-ranking the pool for a new job
+    description or new weights only recomputes the keyword match. Rows written
+    by other feature versions are dropped when the store is opened.
+    """
+
+    def __init__(self, path=DEFAULT_FEATURE_DB, version=FEATURE_VERSION):
+        self.path = path
+        self.version = version
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_key = None
+        self.computed = 0
+        self.reused = 0
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS features ("
+                " key TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL,"
+                " years_experience INTEGER NOT NULL,"
+                " experience_score REAL NOT NULL,"
+                " education_score REAL NOT NULL,"
+                " keywords TEXT NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM features WHERE version != ?", (version,))
+
+    def _load(self, keys):
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), _QUERY_BATCH):
+            batch = unique[start:start + _QUERY_BATCH]
+            cursor = self._conn.execute(
+                "SELECT key, years_experience, experience_score, education_score, keywords"
+                f" FROM features WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            for key, years, experience, education, keywords in cursor:
+                found[key] = {
+                    'years_experience': years,
+                    'experience_score': experience,
+                    'education_score': education,
+                    # Keywords never contain whitespace, so a space-joined string round-trips
+                    'keywords': set(keywords.split()),
+                }
+        return found
+
+    def features(self, resume_texts):
+        """
+        Return the features of each text, computing and storing any that are
+        not in the store yet.
+
+        Args:
+            resume_texts (list): Resume texts
+
+        Returns:
+            list: Feature dicts (see compute_features), in input order
+        """
+        keys = [feature_key(text) for text in resume_texts]
+        with self._lock:
+            found = self._load(keys)
+            missing = {}
+            for key, text in zip(keys, resume_texts):
+                if key not in found and key not in missing:
+                    missing[key] = compute_features(text)
+            if missing:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?, ?)",
+                        [
+                            (key, self.version, f['years_experience'], f['experience_score'],
+                             f['education_score'], ' '.join(sorted(f['keywords'])))
+                            for key, f in missing.items()
+                        ],
+                    )
+                found.update(missing)
+            self.computed += len(missing)
+            self.reused += len(keys) - len(missing)
+        return [found[key] for key in keys]
+
+    def index(self, resumes):
+        """
+        Build (or reuse) the in-memory index of a resume pool.
+
+        The index of the most recent pool is kept, so re-ranking the same
+        pool again only pays for hashing the texts.
+
+        Args:
+            resumes (list): List of dictionaries containing resume data
+                Each dict should have 'text' and 'name' keys
+
+        Returns:
+            FeatureIndex: Index over the pool, in input order
+        """
+        texts = [resume['text'] for resume in resumes]
+        names = [resume['name'] for resume in resumes]
+        index_key = (tuple(feature_key(text) for text in texts), tuple(names))
+        with self._lock:
+            if index_key == self._index_key:
+                self.reused += len(texts)
+                return self._index
+        index = FeatureIndex(names, self.features(texts))
+        with self._lock:
+            self._index, self._index_key = index, index_key
+        return index
+
+    def clear(self):
+        """Drop every stored feature row."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM features")
+            self._index = self._index_key = None
+
+    def stats(self):
+        """
+        Report store counters.
+
+        Returns:
+            dict: Stored row count and computed/reused counters
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+            return {
+                'path': self.path,
+                'version': self.version,
+                'entries': entries,
+                'computed': self.computed,
+                'reused': self.reused,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_feature_store():
+    """
+    Return the process-wide feature store, creating it on first use.
+
+    Returns:
+        ResumeFeatureStore: The shared store
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ResumeFeatureStore()
+        return _default_store
+
+def process_resumes_from_store(job_description, resumes, weights=None, store=None):
+    """
+    Score resumes from stored job-independent features.
+
+    Only resumes that are new to the store are tokenized and run through the
+    experience and education extractors; the rest of the pool is re-ranked
+    from stored features, recomputing just the keyword match.
+
+    Args:
+        job_description (str): Job description text
+        resumes (list): List of dictionaries containing resume data
+            Each dict should have 'text' and 'name' keys
+        weights (dict, optional): Component weights (see utils.combine_scores)
+        store (ResumeFeatureStore, optional): Defaults to get_feature_store()
+
+    Returns:
+        tuple: (DataFrame with results, execution time in seconds)
+    """
+    store = store or get_feature_store()
+    logger.info("Scoring %d resumes from the feature store", len(resumes))
+
+    start_time = time.time()
+    job_keywords = extract_keywords(job_description)
+    index = store.index(resumes)
+    with stage('keyword_match'):
+        columns = index.score(job_keywords, weights)
+    execution_time = time.time() - start_time
+    logger.info("Feature store scoring completed in %.4f seconds", execution_time)
+
+    return format_results(columns), execution_time
@@ -1,10 +1,11 @@
 import os
+import math
 import random
+import argparse
 from datetime import datetime
 
 # Directory to store generated resumes
 output_dir = "sample_resumes"
-os.makedirs(output_dir, exist_ok=True)
 
 # Base templates
 roles = [
@@ -40,16 +41,16 @@ names = [
     "Noah Harris", "Kavya Rao", "Max Müller", "Harper Singh", "Zara Wilson", "Ahmad Nasser", "Elena Petrova", "Kenji Takahashi"
 ]
 
-def random_date(start_year=2014, end_year=2023):
-    start = random.randint(start_year, end_year - 1)
-    end = start + random.randint(1, 3)
+def random_date(start_year=2014, end_year=2023, rng=random):
+    start = rng.randint(start_year, end_year - 1)
+    end = start + rng.randint(1, 3)
     return f"{start}", f"{min(end, 2024)}"
 
-def format_resume(index, name, role):
+def format_resume(index, name, role, rng=random):
     skills = skills_by_role[role]
-    edu = random.choice(education_levels)
-    start1, end1 = random_date(2017, 2020)
-    start2, end2 = random_date(2020, 2023)
+    edu = rng.choice(education_levels)
+    start1, end1 = random_date(2017, 2020, rng)
+    start2, end2 = random_date(2020, 2023, rng)
 
     lines = [
         f"Name: {name}",
@@ -66,14 +67,164 @@ def format_resume(index, name, role):
     ]
     return "\n".join(lines)
 
-# Generate and save 30 resumes
-for i in range(30):
-    name = names[i % len(names)]
-    role = roles[i % len(roles)]
-    content = format_resume(i, name, role)
-    filename = f"resume_{i+1:02d}_{role.replace(' ', '_')}.txt"
-    filepath = os.path.join(output_dir, filename)
-    with open(filepath, "w") as f:
-        f.write(content)
-
-print("30 resumes generated in the 'sample_resumes/' folder.")
+def make_vocabulary(size, rng):
+    """
+    Make a list of distinct pronounceable filler words.
+
+    Args:
+        size (int): Number of words
+        rng (random.Random): Source of randomness
+
+    Returns:
+        list: Filler words
+    """
+    consonants = "bcdfghjklmnprstvz"
+    vowels = "aeiou"
+    words = set()
+    while len(words) < size:
+        syllables = rng.randint(2, 4)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(syllables)))
+    return sorted(words)
+
+def render_pdf(text, lines_per_page=60):
+    """
+    Lay text out as a minimal text-only PDF (Helvetica, one line per row).
+
+    Args:
+        text (str): Text to render
+        lines_per_page (int): Lines per page
+
+    Returns:
+        bytes: PDF file contents
+    """
+    lines = text.split("\n") or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for page in pages:
+        shown = b" ".join(
+            b"(" + line.encode("cp1252", errors="replace")
+            .replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b") '"
+            for line in page
+        )
+        stream = b"BT /F1 10 Tf 12 TL 50 800 Td " + shown + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def generate_corpus(n, seed=0, mean_words=120, vocabulary_size=2000, pdf_fraction=0.0):
+    """
+    Synthesize a reproducible corpus of resumes for benchmarking.
+
+    Every resume follows format_resume and gets a "Projects" section of
+    filler text whose length is log-normally distributed around mean_words.
+    The filler mixes words from a synthetic vocabulary with skills of every
+    role, so resumes differ in length and in which job keywords they hit.
+
+    Args:
+        n (int): Number of resumes
+        seed (int): Random seed; the same seed gives the same corpus
+        mean_words (int): Typical number of filler words per resume
+        vocabulary_size (int): Number of distinct synthetic filler words
+        pdf_fraction (float): Share of resumes rendered as PDF instead of TXT
+
+    Yields:
+        dict: 'name', 'type' ('txt' or 'pdf') and raw file 'content' (bytes),
+            as if uploaded
+    """
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(vocabulary_size, rng)
+    all_skills = sorted({skill for skills in skills_by_role.values() for skill in skills})
+    for i in range(n):
+        name = rng.choice(names)
+        role = rng.choice(roles)
+        text = format_resume(i, name, role, rng)
+        filler_words = int(rng.lognormvariate(math.log(max(mean_words, 1)), 0.6)) if mean_words else 0
+        words = [
+            rng.choice(all_skills) if rng.random() < 0.2 else rng.choice(vocabulary)
+            for _ in range(filler_words)
+        ]
+        filler = "\n".join(" ".join(words[j:j + 12]) for j in range(0, len(words), 12))
+        if filler:
+            text += "\n\nProjects:\n" + filler
+        file_type = "pdf" if rng.random() < pdf_fraction else "txt"
+        content = render_pdf(text) if file_type == "pdf" else text.encode("utf-8")
+        yield {
+            "name": f"resume_{i+1:07d}_{role.replace(' ', '_')}.{file_type}",
+            "type": file_type,
+            "content": content,
+        }
+
+def write_sample_resumes(count=30, directory=output_dir):
+    """
+    Generate and save the sample resumes used by the app and the README.
+
+    Args:
+        count (int): Number of resumes
+        directory (str): Output folder
+    """
+    os.makedirs(directory, exist_ok=True)
+    for i in range(count):
+        name = names[i % len(names)]
+        role = roles[i % len(roles)]
+        content = format_resume(i, name, role)
+        filename = f"resume_{i+1:02d}_{role.replace(' ', '_')}.txt"
+        filepath = os.path.join(directory, filename)
+        with open(filepath, "w") as f:
+            f.write(content)
+
+    print(f"{count} resumes generated in the '{directory}/' folder.")
+
+def write_corpus(n, directory, **options):
+    """
+    Write a generate_corpus corpus to a folder.
+
+    Args:
+        n (int): Number of resumes
+        directory (str): Output folder
+        **options: Passed on to generate_corpus
+    """
+    os.makedirs(directory, exist_ok=True)
+    for resume in generate_corpus(n, **options):
+        with open(os.path.join(directory, resume["name"]), "wb") as f:
+            f.write(resume["content"])
+    print(f"{n} resumes generated in the '{directory}/' folder.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate fake resumes.")
+    parser.add_argument("--count", type=int, default=30, help="Number of resumes")
+    parser.add_argument("--output-dir", default=output_dir, help="Output folder")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Generate a reproducible benchmark corpus (see generate_corpus)")
+    parser.add_argument("--mean-words", type=int, default=120, help="Typical filler words per resume (with --seed)")
+    parser.add_argument("--vocabulary-size", type=int, default=2000, help="Distinct filler words (with --seed)")
+    parser.add_argument("--pdf-fraction", type=float, default=0.0, help="Share of PDF resumes (with --seed)")
+    args = parser.parse_args()
+
+    if args.seed is None:
+        # Generate and save the sample resumes
+        write_sample_resumes(args.count, args.output_dir)
+    else:
+        write_corpus(args.count, args.output_dir, seed=args.seed, mean_words=args.mean_words,
+                     vocabulary_size=args.vocabulary_size, pdf_fraction=args.pdf_fraction)
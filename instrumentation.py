@@ -0,0 +1,300 @@
+import os
+import sys
+import time
+import logging
+import threading
+from collections import defaultdict
+
+# Stages of the screening pipeline, in the order they run
+STAGES = ('parse', 'dedup', 'tokenize', 'keyword_match', 'experience', 'education', 'format')
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+        return False
+
+class StageTimer:
+    """
+    Accumulates wall-clock time and call counts per pipeline stage.
+
+    Timing a stage costs two perf_counter() calls, so the timers stay on all the
+    time; only reporting is opt-in.
+    """
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def stage(self, name):
+        """
+        Time a block of code as part of a stage.
+
+        Args:
+            name (str): Stage name, usually one of STAGES
+
+        Returns:
+            context manager: Adds the elapsed time of the block to the stage
+        """
+        return _Stage(self, name)
+
+    def add(self, name, seconds, count=1):
+        self.totals[name] += seconds
+        self.counts[name] += count
+
+    def merge(self, snapshot):
+        """
+        Add timings collected elsewhere (e.g. in a worker process).
+
+        Args:
+            snapshot (dict): Output of snapshot()
+        """
+        for name, (seconds, count) in snapshot.items():
+            self.add(name, seconds, count)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: stage name -> (total seconds, count)
+        """
+        return {name: (self.totals[name], self.counts[name]) for name in self.totals}
+
+    def reset(self):
+        self.totals.clear()
+        self.counts.clear()
+
+# Timer of the current thread (Streamlit runs each session in its own thread).
+# Pool workers drain theirs after each task and ship the numbers back with the result.
+_local = threading.local()
+
+def _current_timer():
+    timer = getattr(_local, 'timer', None)
+    if timer is None:
+        timer = _local.timer = StageTimer()
+    return timer
+
+def stage(name):
+    """
+    Time a block of code against the current thread's stage timer.
+
+    Args:
+        name (str): Stage name, usually one of STAGES
+
+    Returns:
+        context manager: Adds the elapsed time of the block to the stage
+    """
+    return _Stage(_current_timer(), name)
+
+def collect_stage_timings():
+    """
+    Return and clear the stage timings recorded in the current thread.
+
+    Returns:
+        dict: stage name -> (total seconds, count)
+    """
+    timer = _current_timer()
+    snapshot = timer.snapshot()
+    timer.reset()
+    return snapshot
+
+def enable_tracing(level=logging.DEBUG):
+    """
+    Print the per-resume trace messages again (they are silent by default).
+
+    Args:
+        level (int): Logging level to show, DEBUG for the full trace
+    """
+    logging.basicConfig(stream=sys.stdout, format='%(message)s')
+    for name in ('utils', 'serial_resume_screener', 'parallel_resume_screener'):
+        logging.getLogger(name).setLevel(level)
+
+class PoolMetrics:
+    """
+    Collects per-task transport and scheduling metrics of a process pool run.
+
+    Workers report when they picked a task up and when they finished it;
+    together with the submit and receive times recorded in the parent this
+    gives queue wait, result return latency and per-worker busy time.
+    Serialization cost is measured by pickling each payload once more in the
+    process that produced it, so it is only collected when profiling.
+    """
+
+    def __init__(self):
+        self.tasks = 0
+        self.pickle_time = 0.0
+        self.payload_bytes = 0
+        self.result_pickle_time = 0.0
+        self.result_bytes = 0
+        self.queue_wait = 0.0
+        self.return_latency = 0.0
+        self.busy = defaultdict(float)
+        self.tasks_per_worker = defaultdict(int)
+        self.stages = StageTimer()
+
+    def record_submit(self, pickle_seconds, payload_bytes):
+        self.pickle_time += pickle_seconds
+        self.payload_bytes += payload_bytes
+
+    def record_task(self, meta, sent_at, received_at):
+        """
+        Args:
+            meta (dict): Worker-side metadata ('pid', 'started', 'ended',
+                'stages', 'pickle_time', 'result_bytes')
+            sent_at (float): time.time() when the task was handed to the pool
+            received_at (float): time.time() when the result reached the parent
+        """
+        self.tasks += 1
+        self.queue_wait += max(meta['started'] - sent_at, 0.0)
+        self.return_latency += max(received_at - meta['ended'], 0.0)
+        self.busy[meta['pid']] += meta['ended'] - meta['started']
+        self.tasks_per_worker[meta['pid']] += 1
+        self.result_pickle_time += meta['pickle_time']
+        self.result_bytes += meta['result_bytes']
+        self.stages.merge(meta['stages'])
+
+    def summary(self, wall_time, workers):
+        """
+        Args:
+            wall_time (float): Seconds the pool spent on the batch
+            workers (int): Number of workers in the pool
+
+        Returns:
+            dict: Aggregated pool metrics
+        """
+        utilization = {
+            str(pid): (busy / wall_time if wall_time > 0 else 0.0)
+            for pid, busy in sorted(self.busy.items())
+        }
+        total_busy = sum(self.busy.values())
+        return {
+            'workers': workers,
+            'workers_used': len(self.busy),
+            'tasks': self.tasks,
+            'pickle_time': self.pickle_time + self.result_pickle_time,
+            'payload_bytes': self.payload_bytes,
+            'result_bytes': self.result_bytes,
+            'queue_wait_total': self.queue_wait,
+            'queue_wait_mean': self.queue_wait / self.tasks if self.tasks else 0.0,
+            'return_latency_mean': self.return_latency / self.tasks if self.tasks else 0.0,
+            # Time a worker spent not scoring: IPC, (un)pickling and scheduling gaps
+            'worker_idle_mean': max(wall_time * workers - total_busy, 0.0) / workers if workers else 0.0,
+            'worker_utilization': utilization,
+            'mean_utilization': total_busy / (wall_time * workers) if wall_time > 0 and workers else 0.0,
+        }
+
+class StageThroughput:
+    """
+    Throughput of one stage of a pipelined run (see pipeline_executor).
+
+    A stage records, per item, the time it spent working on it and the time it
+    then spent blocked on a full downstream queue. Comparing stages shows the
+    bottleneck: it is the busiest stage, and the stages in front of it are
+    the ones that block.
+    """
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.first = None
+        self.last = None
+        self._lock = threading.Lock()
+
+    def record(self, started, busy, blocked=0.0):
+        """
+        Args:
+            started (float): time.perf_counter() when work on the item began
+            busy (float): Seconds spent working on the item
+            blocked (float): Seconds spent waiting to hand the item on
+        """
+        with self._lock:
+            self.items += 1
+            self.busy += busy
+            self.blocked += blocked
+            self.first = started if self.first is None else min(self.first, started)
+            self.last = max(self.last or started, started + busy + blocked)
+
+    def summary(self):
+        """
+        Returns:
+            dict: 'stage', 'workers', 'items', 'busy_seconds',
+                'blocked_seconds', 'elapsed_seconds' (first item started to
+                last item handed on) and 'throughput' (items per second)
+        """
+        with self._lock:
+            elapsed = self.last - self.first if self.items else 0.0
+            return {
+                'stage': self.name,
+                'workers': self.workers,
+                'items': self.items,
+                'busy_seconds': self.busy,
+                'blocked_seconds': self.blocked,
+                'elapsed_seconds': elapsed,
+                'throughput': self.items / elapsed if elapsed > 0 else 0.0,
+            }
+
+def build_report(mode, wall_time, num_resumes, stage_timings, pool=None):
+    """
+    Build the profiling report returned next to (DataFrame, execution_time).
+
+    Args:
+        mode (str): 'serial' or 'parallel'
+        wall_time (float): Execution time of the run in seconds
+        num_resumes (int): Number of resumes screened
+        stage_timings (dict): stage name -> (total seconds, count)
+        pool (dict, optional): PoolMetrics.summary() for parallel runs
+
+    Returns:
+        dict: Profiling report
+    """
+    stages = {}
+    for name in STAGES + tuple(sorted(set(stage_timings) - set(STAGES))):
+        if name not in stage_timings:
+            continue
+        seconds, count = stage_timings[name]
+        stages[name] = {
+            'total_s': seconds,
+            'count': count,
+            'mean_ms': seconds / count * 1000 if count else 0.0,
+        }
+    return {
+        'mode': mode,
+        'pid': os.getpid(),
+        'wall_time': wall_time,
+        'resumes': num_resumes,
+        'throughput': num_resumes / wall_time if wall_time > 0 else 0.0,
+        'stages': stages,
+        'pool': pool,
+    }
+
+def stage_table(reports, shared_timings=None):
+    """
+    Lay several reports out side by side, one row per stage.
+
+    Args:
+        reports (dict): label -> report from build_report
+        shared_timings (dict, optional): Stage timings common to every run,
+            such as parsing the uploads once before screening
+
+    Returns:
+        DataFrame: Total seconds per stage for each report
+    """
+    import pandas as pd
+    rows = {}
+    for label, report in reports.items():
+        column = {name: seconds for name, (seconds, _) in (shared_timings or {}).items()}
+        column.update({name: stats['total_s'] for name, stats in report['stages'].items()})
+        column['wall time'] = report['wall_time']
+        rows[label] = column
+    return pd.DataFrame(rows).rename_axis('Stage (seconds)')
@@ -0,0 +1,242 @@
+import re
+import string
+from english_stopwords import ENGLISH_STOPWORDS
+
+# One byte-level pass maps every ASCII punctuation character to a space. UTF-8
+# continuation bytes are >= 0x80, so non-ASCII characters pass through intact.
+_PUNCTUATION_TABLE = bytes.maketrans(string.punctuation.encode('ascii'),
+                                     b' ' * len(string.punctuation))
+
+# Terms like "Node.js", "CI/CD", "scikit-learn" or "C#/.NET" in a job description
+_COMPOUND_TERM = re.compile(r'[A-Za-z0-9]+(?:[./\-+#&][A-Za-z0-9]+)+')
+
+def _is_filler(tokens):
+    """
+    Whether a compound such as "and/or", "e.g" or "2019-2020" is made up only
+    of stopwords, single characters and numbers, and so is not a skill.
+
+    Args:
+        tokens (tuple): Tokens of the compound
+
+    Returns:
+        bool: True if no part of the compound is a keyword
+    """
+    return all(token in ENGLISH_STOPWORDS or len(token) == 1 or token.isdigit()
+               for token in tokens)
+
+# Multi-word skills that should count as one keyword when a job description
+# mentions them
+KNOWN_PHRASES = (
+    'artificial intelligence', 'back end', 'big data', 'business intelligence', 'cloud computing',
+    'computer science', 'computer vision', 'continuous delivery', 'continuous integration',
+    'data analysis', 'data analytics', 'data engineering', 'data science', 'data structures',
+    'database administration', 'deep learning', 'distributed systems', 'front end', 'full stack',
+    'github actions', 'google cloud', 'information technology', 'machine learning',
+    'natural language processing', 'neural networks', 'object oriented programming',
+    'power bi', 'problem solving', 'product management', 'project management', 'query optimization',
+    'react native', 'reinforcement learning', 'rest api', 'ruby on rails', 'shell scripting',
+    'software design', 'software development', 'software engineering', 'spring boot',
+    'unit testing', 'version control', 'web development',
+)
+
+def normalize_text(text):
+    """
+    Lowercase text and replace ASCII punctuation with spaces.
+
+    Args:
+        text (str): Raw text
+
+    Returns:
+        str: Normalized text
+    """
+    return text.encode('utf-8', 'surrogatepass').translate(_PUNCTUATION_TABLE) \
+        .decode('utf-8', 'surrogatepass').lower()
+
+def tokenize(text):
+    """
+    Split text into lowercase tokens, treating punctuation as whitespace.
+
+    Args:
+        text (str): Raw text
+
+    Returns:
+        list: Tokens in order
+    """
+    return normalize_text(text).split()
+
+class PhraseAutomaton:
+    """
+    Aho-Corasick automaton over token sequences.
+
+    States are nodes of a trie of the phrases' tokens; failure links let a
+    scan continue after a partial match without backtracking, so all phrase
+    occurrences (including overlapping ones) are found in one pass over the
+    tokens.
+    """
+
+    def __init__(self, phrases):
+        """
+        Args:
+            phrases (iterable): Phrases as tuples of tokens
+        """
+        self._goto = [{}]
+        self._output = [()]
+        for phrase in phrases:
+            node = 0
+            for token in phrase:
+                next_node = self._goto[node].get(token)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][token] = next_node
+                    self._goto.append({})
+                    self._output.append(())
+                node = next_node
+            if phrase not in self._output[node]:
+                self._output[node] += (phrase,)
+        self._terminal = [bool(output) for output in self._output]
+
+        # Breadth-first pass: a node's failure link is the longest proper
+        # suffix of its path that is also a path in the trie. Failure links are
+        # then folded into each node's transitions, so a scan takes exactly one
+        # dict lookup per token.
+        fail = [0] * len(self._goto)
+        self._delta = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        queue = list(self._goto[0].values())
+        for node in queue:
+            self._delta[node] = {**self._delta[fail[node]], **self._goto[node]}
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail[child] = self._delta[fail[node]].get(token, 0) if node else 0
+                self._output[child] += self._output[fail[child]]
+
+    def find_all(self, tokens):
+        """
+        Find every phrase occurring in a token sequence.
+
+        Args:
+            tokens (list): Tokens to scan
+
+        Returns:
+            set: Phrases (token tuples) that occur at least once
+        """
+        delta, output = self._delta, self._output
+        found = set()
+        node = 0
+        for token in tokens:
+            node = delta[node].get(token, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+    def longest_at(self, tokens, start):
+        """
+        Length of the longest phrase starting exactly at a position.
+
+        Args:
+            tokens (list): Tokens to scan
+            start (int): Position to match from
+
+        Returns:
+            int: Number of tokens matched (0 if no phrase starts there)
+        """
+        node = 0
+        longest = 0
+        for offset in range(start, len(tokens)):
+            node = self._goto[node].get(tokens[offset])
+            if node is None:
+                break
+            if self._terminal[node]:
+                longest = offset - start + 1
+        return longest
+
+class JobMatcher:
+    """
+    Keyword matcher compiled once per job description.
+
+    The job's terms are its single keywords (as extract_keywords finds them)
+    plus compound terms such as "Node.js" or "scikit-learn" and known
+    multi-word phrases such as "machine learning". Words that only occur as
+    part of such a term are not counted on their own, so a job description
+    is not credited with separate "machine" and "learning" keywords. Matching
+    a resume is a set intersection for single keywords and one
+    PhraseAutomaton scan for the rest.
+
+    Iterating a JobMatcher yields its terms, and len() is the number of
+    terms, so it can be used wherever a set of job keywords is expected.
+    """
+
+    def __init__(self, job_description, phrases=KNOWN_PHRASES):
+        """
+        Args:
+            job_description (str): Job description text
+            phrases (iterable): Multi-word phrases to recognize
+        """
+        self._display = {}
+        fillers = set()
+        for term in _COMPOUND_TERM.findall(job_description or ''):
+            term_tokens = tuple(tokenize(term))
+            if _is_filler(term_tokens):
+                fillers.add(term_tokens)
+            else:
+                self._display.setdefault(term_tokens, term.lower())
+        for phrase in phrases:
+            self._display.setdefault(tuple(tokenize(phrase)), phrase.lower())
+        self._display = {tokens: term for tokens, term in self._display.items() if len(tokens) > 1}
+
+        # Segment the job description greedily into its longest known terms.
+        # Fillers are segmented too, so "2019-2020" does not leave "2019" and
+        # "2020" behind as keywords, but they are not terms themselves.
+        fillers.difference_update(self._display)
+        candidates = PhraseAutomaton(list(self._display) + list(fillers))
+        tokens = tokenize(job_description or '')
+        unigrams = set()
+        phrases_used = set()
+        position = 0
+        while position < len(tokens):
+            length = candidates.longest_at(tokens, position)
+            if length:
+                span = tuple(tokens[position:position + length])
+                if span in self._display:
+                    phrases_used.add(span)
+                position += length
+                continue
+            token = tokens[position]
+            if token not in ENGLISH_STOPWORDS and len(token) > 1:
+                unigrams.add(token)
+            position += 1
+
+        self._display = {tokens: self._display[tokens] for tokens in phrases_used}
+        self._unigrams = unigrams
+        self._automaton = PhraseAutomaton(self._display)
+        self._phrase_starts = frozenset(tokens[0] for tokens in self._display)
+        self.terms = frozenset(unigrams) | frozenset(self._display.values())
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def __contains__(self, term):
+        return term in self.terms
+
+    def match(self, resume_text):
+        """
+        Find the job terms a resume mentions.
+
+        Args:
+            resume_text (str): Resume text
+
+        Returns:
+            set: Matching job terms
+        """
+        if not resume_text:
+            return set()
+        tokens = tokenize(resume_text)
+        # Probing the few job terms is much cheaper than building a set of the resume's tokens
+        found = self._unigrams.intersection(tokens)
+        # Only scan for phrases when a phrase could possibly start in this resume
+        if not self._phrase_starts.isdisjoint(tokens):
+            display = self._display
+            found.update(display[phrase] for phrase in self._automaton.find_all(tokens))
+        return found
@@ -0,0 +1,243 @@
+import string
+import logging
+import time
+
+import numpy as np
+from instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+# Estimated Jaccard similarity above which two resumes count as the same one
+DEFAULT_THRESHOLD = 0.9
+
+# MinHash signature length (a power of two, at most 64)
+DEFAULT_NUM_BINS = 64
+
+# Chance that LSH puts a pair right at the threshold into a common bucket
+_TARGET_RECALL = 0.99
+
+# Resumes hashed in one vectorized batch
+_BATCH_SIZE = 512
+
+# Lowercases ASCII letters and turns punctuation, whitespace and NUL into spaces,
+# so the shingles do not depend on casing, punctuation or line breaks
+_SHINGLE_TABLE = bytearray(range(256))
+for _char in string.punctuation + string.whitespace + '\0':
+    _SHINGLE_TABLE[ord(_char)] = ord(' ')
+for _char in string.ascii_uppercase:
+    _SHINGLE_TABLE[ord(_char)] = ord(_char.lower())
+_SHINGLE_TABLE = bytes(_SHINGLE_TABLE)
+
+# Texts in a batch are separated by a NUL-filled word, so no shingle reaches
+# from one text into the next
+_SHINGLE_WIDTH = 16
+_SEPARATOR = b' ' + bytes(_SHINGLE_WIDTH) + b' '
+
+_MIX_1 = np.uint64(0x9E3779B97F4A7C15)
+_MIX_2 = np.uint64(0xC2B2AE3D27D4EB4F)
+_EMPTY = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+def _signature_batch(texts, num_bins):
+    data = _SEPARATOR + _SEPARATOR.join([text.encode('utf-8', 'surrogatepass').translate(_SHINGLE_TABLE)
+                                         for text in texts]) + _SEPARATOR
+    chars = np.frombuffer(data, np.uint8)
+    in_word = chars != ord(' ')
+    edges = np.flatnonzero(in_word[1:] != in_word[:-1]) + 1
+    # The data starts and ends with a space, so edges alternate between token starts and ends
+    starts, lengths = edges[0::2], edges[1::2] - edges[0::2]
+    separators = chars[starts] == 0
+    text_index = np.cumsum(separators)[~separators] - 1
+
+    # With the spaces squeezed out, each shingle is the 16 bytes that follow
+    # the start of a token (about three tokens), hashed from two 8-byte reads
+    packed = chars[in_word].tobytes()
+    words = np.ndarray((len(packed) - 7,), '<u8', packed, 0, (1,))
+    offsets = (np.cumsum(lengths) - lengths)[~separators]
+    hashes = (words[offsets] * _MIX_1 ^ words[offsets + 8] * _MIX_2) * _MIX_2
+
+    # One-permutation MinHash: the top bits of a hash pick its bin, and each
+    # bin keeps its smallest hash
+    bin_bits = num_bins.bit_length() - 1
+    bins = (hashes >> np.uint64(64 - bin_bits)).astype(np.int64) if bin_bits else 0
+    signatures = np.full(len(texts) * num_bins, _EMPTY)
+    np.minimum.at(signatures, text_index * num_bins + bins, hashes)
+    return signatures.reshape(len(texts), num_bins)
+
+def minhash_signatures(texts, num_bins=DEFAULT_NUM_BINS):
+    """
+    Compute a MinHash signature per text.
+
+    Shingles start at every token of the normalized text, so reflowed lines,
+    changed casing or punctuation do not change a signature. All texts are
+    hashed with a few vectorized passes instead of one hash function per
+    signature position, which keeps this far cheaper than scoring.
+
+    Args:
+        texts (list): Resume texts
+        num_bins (int): Signature length (a power of two, at most 64)
+
+    Returns:
+        numpy.ndarray: One row of num_bins hashes per text
+    """
+    if num_bins < 1 or num_bins > 64 or num_bins & (num_bins - 1):
+        raise ValueError(f"num_bins must be a power of two between 1 and 64, got {num_bins}")
+    batches = [_signature_batch(texts[start:start + _BATCH_SIZE], num_bins)
+               for start in range(0, len(texts), _BATCH_SIZE)]
+    return np.concatenate(batches) if batches else np.empty((0, num_bins), np.uint64)
+
+def signature_similarity(signature, others):
+    """
+    Estimate the Jaccard similarity of texts from their signatures.
+
+    Bins that are empty in both signatures (short texts) are left out.
+
+    Args:
+        signature (numpy.ndarray): Signature of one text
+        others (numpy.ndarray): Signatures to compare it with, one per row
+
+    Returns:
+        numpy.ndarray: Estimated similarity to each row of others
+    """
+    both_empty = (others == _EMPTY) & (signature == _EMPTY)
+    equal = ((others == signature) & ~both_empty).sum(axis=1)
+    compared = signature.shape[-1] - both_empty.sum(axis=1)
+    # Two empty texts are the same text
+    return np.where(compared > 0, equal / np.maximum(compared, 1), 1.0)
+
+def lsh_bands(num_bins, threshold):
+    """
+    Split signatures into LSH bands for a similarity threshold.
+
+    Uses the longest bands (fewest false candidates) that still bring a pair
+    at the threshold together in at least one band 99% of the time.
+
+    Args:
+        num_bins (int): Signature length
+        threshold (float): Similarity threshold
+
+    Returns:
+        tuple: (number of bands, bins per band)
+    """
+    for rows in range(num_bins, 0, -1):
+        bands = num_bins // rows
+        if 1 - (1 - threshold ** rows) ** bands >= _TARGET_RECALL:
+            return bands, rows
+    return num_bins, 1
+
+def find_near_duplicates(texts, threshold=DEFAULT_THRESHOLD, num_bins=DEFAULT_NUM_BINS):
+    """
+    Group near-duplicate texts, keeping the first text of each group.
+
+    Texts are visited in order. Each one is compared with the kept texts that
+    share an LSH bucket with it and joins the most similar one at or above the
+    threshold; otherwise it is kept and added to the buckets. Every duplicate
+    is therefore similar to its own representative, not just to some other
+    member of its group.
+
+    Args:
+        texts (list): Texts to group; None marks an entry to leave alone
+        threshold (float): Estimated Jaccard similarity at which texts are
+            treated as the same
+        num_bins (int): MinHash signature length
+
+    Returns:
+        dict: 'representatives' (indices of the texts to score),
+            'duplicate_of' (per text, the index of its representative or
+            None) and 'seconds' spent
+    """
+    start_time = time.perf_counter()
+    with stage('dedup'):
+        comparable = [index for index, text in enumerate(texts) if text is not None]
+        signatures = minhash_signatures([texts[index] for index in comparable], num_bins)
+        bands, rows = lsh_bands(num_bins, threshold)
+        # One integer key per (text, band)
+        multipliers = (np.arange(1, rows + 1, dtype=np.uint64) * _MIX_1) | np.uint64(1)
+        band_keys = (signatures[:, :bands * rows].reshape(len(comparable), bands, rows)
+                     * multipliers).sum(axis=2)
+
+        # Most texts share no bucket with any other text; only the rest are
+        # compared one by one
+        shared = np.zeros(len(comparable), bool)
+        for band in range(bands):
+            _, inverse, counts = np.unique(band_keys[:, band], return_inverse=True, return_counts=True)
+            shared |= counts[inverse] > 1
+
+        duplicate_of = [None] * len(texts)
+        buckets = [{} for _ in range(bands)]
+        for position in np.flatnonzero(shared).tolist():
+            keys = band_keys[position].tolist()
+            candidates = set()
+            for band, key in enumerate(keys):
+                candidates.update(buckets[band].get(key, ()))
+            if candidates:
+                candidates = sorted(candidates)
+                similarity = signature_similarity(signatures[position], signatures[candidates])
+                best = int(np.argmax(similarity))
+                if similarity[best] >= threshold:
+                    duplicate_of[comparable[position]] = comparable[candidates[best]]
+                    continue
+            for band, key in enumerate(keys):
+                buckets[band].setdefault(key, []).append(position)
+
+    representatives = [index for index, representative in enumerate(duplicate_of) if representative is None]
+    seconds = time.perf_counter() - start_time
+    logger.info("Found %d near-duplicate(s) among %d texts in %.4f seconds (%d bands of %d bins)",
+                len(texts) - len(representatives), len(texts), seconds, bands, rows)
+    return {'representatives': representatives, 'duplicate_of': duplicate_of, 'seconds': seconds}
+
+def deduplicate_resumes(resumes, threshold=DEFAULT_THRESHOLD, groups=None):
+    """
+    Pick the resumes that need scoring when near-duplicates share a score.
+
+    Resumes given only as a 'path' have no text to compare yet and are always
+    scored.
+
+    Args:
+        resumes (list): Dictionaries with 'text' (or 'path') and 'name' keys
+        threshold (float): Estimated Jaccard similarity at which resumes are
+            treated as the same
+        groups (dict, optional): find_near_duplicates output already computed
+            for these resumes, to reuse instead of computing it again
+
+    Returns:
+        tuple: (resumes to score, groups from find_near_duplicates)
+    """
+    if groups is None:
+        groups = find_near_duplicates([resume.get('text') for resume in resumes], threshold)
+    return [resumes[index] for index in groups['representatives']], groups
+
+def propagate_scores(results, resumes, groups):
+    """
+    Give every near-duplicate the result of its representative.
+
+    Args:
+        results (list or dict): Results of the representatives, in the order
+            of groups['representatives'], as result dicts or as columns (see
+            shared_transport.SharedResultTable.columns)
+        resumes (list): All resumes, as passed to deduplicate_resumes
+        groups (dict): Output of find_near_duplicates
+
+    Returns:
+        list or dict: One result per resume, in input order, with
+            'duplicate_of' (name of the representative, '' if none) and
+            'duplicates' (number of near-duplicates that took this result)
+    """
+    duplicate_of = groups['duplicate_of']
+    row_of = {index: row for row, index in enumerate(groups['representatives'])}
+    copies = {}
+    for representative in duplicate_of:
+        if representative is not None:
+            copies[representative] = copies.get(representative, 0) + 1
+    rows = [row_of[index if representative is None else representative]
+            for index, representative in enumerate(duplicate_of)]
+    marks = [('', copies.get(index, 0)) if representative is None else (resumes[representative]['name'], 0)
+             for index, representative in enumerate(duplicate_of)]
+
+    if isinstance(results, dict):
+        expanded = {name: [values[row] for row in rows] for name, values in results.items()}
+        expanded['file_name'] = [resume['name'] for resume in resumes]
+        expanded['duplicate_of'] = [mark[0] for mark in marks]
+        expanded['duplicates'] = [mark[1] for mark in marks]
+        return expanded
+    return [dict(results[row], file_name=resume['name'], duplicate_of=mark[0], duplicates=mark[1])
+            for row, resume, mark in zip(rows, resumes, marks)]
@@ -1,78 +1,955 @@
+import os
+import math
+import atexit
+import pickle
+import hashlib
+import itertools
+import logging
+import queue
+import threading
 import time
 import multiprocessing
-from functools import partial
-from utils import extract_keywords, score_resume, format_results
+from multiprocessing import resource_tracker
+from collections import OrderedDict
+from contextlib import contextmanager
+from utils import extract_job_terms, score_resume_within_limits, format_results
+from resource_limits import DEFAULT_LIMITS, rss_bytes
+from keyword_matcher import JobMatcher
+from instrumentation import PoolMetrics, build_report, collect_stage_timings
+from ranking import TopKRanker
 
-def process_single_resume(resume, job_keywords):
+logger = logging.getLogger(__name__)
+
+# How many job-description versions the broadcast board keeps around, so that
+# concurrent runs against different job descriptions can share one pool.
+MAX_JOB_VERSIONS = 8
+
+_NO_TASK = object()
+
+# Job context of the current worker process. It is installed once by the pool
+# initializer and refreshed from the broadcast board only when a task carries
+# a job version the worker has not seen yet.
+_worker_job = {'version': None, 'keywords': frozenset()}
+_worker_board = None
+
+def _init_worker(board, version, job_keywords):
+    """
+    Pool initializer: store the job context in the worker process.
+
+    Args:
+        board (DictProxy): Shared mapping of job version -> job keywords
+        version (str): Version of the job keywords shipped with the initializer
+        job_keywords (frozenset): Keywords extracted from the job description
+    """
+    global _worker_board
+    _worker_board = board
+    _worker_job['version'] = version
+    _worker_job['keywords'] = job_keywords
+
+def _process_task(task):
+    """
+    Worker entry point for the warm pool.
+
+    Args:
+        task (tuple): (job version, resume dict); a resume dict with a
+            'path' instead of a 'text' is read and parsed in the worker
+
+    Returns:
+        dict: Dictionary with scoring results
+    """
+    version, resume = task
+    return process_single_resume(resume, _job_keywords(version))
+
+def _process_chunk(task):
+    """
+    Worker entry point for streamed runs: score a chunk of resumes.
+
+    Args:
+        task (tuple): (job version, list of resume dicts, keep_text); with
+            keep_text the text parsed here is returned too (see
+            utils.score_resume_within_limits), so the parent can cache it
+
+    Returns:
+        list: Scoring result dicts, in chunk order
+    """
+    version, resumes, keep_text = task
+    job_keywords = _job_keywords(version)
+    return [process_single_resume(resume, job_keywords, keep_text=keep_text) for resume in resumes]
+
+def _job_keywords(version):
+    """
+    Return the worker's job keywords for a version, pulling them from the
+    broadcast board the first time the version is seen.
+    """
+    if version != _worker_job['version']:
+        _worker_job['keywords'] = _worker_board[version]
+        _worker_job['version'] = version
+        _worker_job.pop('positions', None)
+    return _worker_job['keywords']
+
+def _process_shared_chunk(task):
+    """
+    Worker entry point for the shared-memory transport: score a range of
+    resumes read from a SharedResumeCorpus and write the results in place
+    into a SharedResultTable.
+
+    Args:
+        task (tuple): (job version, corpus name, result table name, batch
+            size, number of job keywords, first index, end index)
+
+    Returns:
+        int: Number of resumes scored
+    """
+    from shared_transport import attached
+    version, corpus_name, table_name, count, num_keywords, start, stop = task
+    job_keywords = _job_keywords(version)
+    if 'positions' not in _worker_job:
+        _worker_job['positions'] = {term: i for i, term in enumerate(sorted(job_keywords))}
+    # The pool reuses the same blocks from batch to batch, so this attaches once per worker
+    corpus, table = attached(corpus_name, table_name, count, num_keywords)
+    for index in range(start, stop):
+        result = score_resume_within_limits({'text': corpus.text(index), 'name': index}, job_keywords)
+        table.write(index, result, _worker_job['positions'])
+    return stop - start
+
+def _process_corpus_range(task):
+    """
+    Worker entry point for tokenized corpora: score a range of a
+    memory-mapped corpus file, which every worker maps once and shares
+    through the page cache.
+
+    Args:
+        task (tuple): (job version, corpus path, first index, end index, k,
+            weights); k is None for full results
+
+    Returns:
+        dict or tuple: Result columns of the range, or (number of resumes
+            scored, compact rows of the range's top K) when k is given
+    """
+    from tokenized_corpus import open_corpus
+    version, path, start, stop, k, weights = task
+    corpus = open_corpus(path)
+    job_keywords = _job_keywords(version)
+    if k:
+        return stop - start, corpus.rank(job_keywords, k, weights, start, stop)
+    return corpus.score(job_keywords, weights, start, stop)
+
+def _process_task_profiled(task):
+    """
+    Worker entry point used when profiling: also reports timings.
+
+    Args:
+        task (tuple): (job version, resume dict, submit time, input index)
+
+    Returns:
+        tuple: (input index, scoring result dict, worker metadata dict)
+    """
+    version, resume, sent_at, index = task
+    started = time.time()
+    collect_stage_timings()
+    result = _process_task((version, resume))
+    stages = collect_stage_timings()
+    ended = time.time()
+    pickle_start = time.perf_counter()
+    result_bytes = len(pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+    meta = {
+        'pid': multiprocessing.current_process().pid,
+        'started': started,
+        'ended': ended,
+        'stages': stages,
+        'pickle_time': time.perf_counter() - pickle_start,
+        'result_bytes': result_bytes,
+    }
+    return index, result, meta
+
+def _process_chunk_profiled(tasks):
+    """
+    Worker entry point used when profiling a chunk of tasks.
+
+    Args:
+        tasks (list): Tasks for _process_task_profiled
+
+    Returns:
+        list: _process_task_profiled results, in chunk order
+    """
+    return [_process_task_profiled(task) for task in tasks]
+
+def _rank_chunk(task):
+    """
+    Worker entry point for top-K ranking: score a chunk of resumes and keep
+    only the chunk's best K.
+
+    Args:
+        task (tuple): (job version, k, list of (input index, resume dict))
+
+    Returns:
+        tuple: (number of resumes scored, compact rows of the chunk's top K)
+    """
+    version, k, chunk = task
+    ranker = TopKRanker(k)
+    for index, resume in chunk:
+        ranker.offer(_process_task((version, resume)), index)
+    return len(chunk), ranker.rows()
+
+def _cgroup_cpu_limit():
+    """
+    CPU limit of the process's cgroup (v2 cpu.max or v1 CFS quota), if any.
+
+    Returns:
+        float or None: Number of CPUs the quota allows, None if unlimited
+    """
+    try:
+        with open('/proc/self/cgroup', 'r') as f:
+            entries = [line.rstrip('\n').split(':', 2) for line in f]
+    except OSError:
+        return None
+    limits = []
+    for _, controllers, path in entries:
+        if controllers == '':
+            # cgroup v2: every ancestor's cpu.max applies
+            candidates = [('/sys/fs/cgroup', 'cpu.max')]
+        elif 'cpu' in controllers.split(','):
+            candidates = [('/sys/fs/cgroup/' + controllers, 'cpu.cfs_quota_us'),
+                          ('/sys/fs/cgroup/cpu', 'cpu.cfs_quota_us')]
+        else:
+            continue
+        for root, name in candidates:
+            directory = path.strip('/')
+            while True:
+                limit = _read_cpu_quota(os.path.join(root, directory, name))
+                if limit is not None:
+                    limits.append(limit)
+                if not directory:
+                    break
+                directory = os.path.dirname(directory)
+    return min(limits) if limits else None
+
+def _read_cpu_quota(path):
+    try:
+        with open(path, 'r') as f:
+            fields = f.read().split()
+        if path.endswith('cpu.max'):
+            quota, period = fields[0], fields[1]
+        else:
+            with open(os.path.join(os.path.dirname(path), 'cpu.cfs_period_us'), 'r') as f:
+                quota, period = fields[0], f.read().strip()
+    except (OSError, IndexError):
+        return None
+    if quota in ('max', '-1'):
+        return None
+    return int(quota) / int(period)
+
+def available_cpus():
+    """
+    Number of CPUs this process can actually use.
+
+    This is the smaller of the CPU affinity mask and the cgroup CPU quota, so
+    a container limited to a fraction of the host is not oversubscribed.
+
+    Returns:
+        int: Usable CPUs (at least 1)
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = multiprocessing.cpu_count()
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(cpus, 1)
+
+def default_chunksize(num_tasks, workers):
+    """
+    Chunk size Pool.map would pick for a batch.
+
+    Args:
+        num_tasks (int): Number of tasks in the batch
+        workers (int): Number of pool workers
+
+    Returns:
+        int: Tasks sent to a worker at a time
+    """
+    chunksize, extra = divmod(num_tasks, workers * 4)
+    return chunksize + 1 if extra else max(chunksize, 1)
+
+def streaming_chunksize(num_tasks, workers, limit=8):
+    """
+    Chunk size for streamed runs: Pool.map's choice, capped so results keep
+    arriving in small increments.
+
+    Args:
+        num_tasks (int or None): Number of tasks, if known
+        workers (int): Number of pool workers
+        limit (int): Largest chunk size to use
+
+    Returns:
+        int: Tasks sent to a worker at a time
+    """
+    if not num_tasks:
+        return 1
+    return min(default_chunksize(num_tasks, workers), limit)
+
+def job_version(job_keywords):
+    """
+    Compute a stable version string for a set of job keywords.
+
+    Args:
+        job_keywords (set): Set of keywords extracted from job description
+
+    Returns:
+        str: Hex digest identifying the job context
+    """
+    digest = hashlib.sha1('\n'.join(sorted(job_keywords)).encode('utf-8'))
+    return digest.hexdigest()
+
+def _chunked(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _windowed(pool, func, tasks, window, cancel_event=None):
+    """
+    Run func over tasks on a multiprocessing pool, yielding (task position,
+    result) pairs in completion order.
+
+    Tasks are pulled and submitted from the calling thread, at most window
+    at a time, as results are taken. Pool.imap_unordered would pull them on
+    the pool's single task-handler thread instead, where a slow or abandoned
+    consumer holds back every other run on the pool.
+
+    Args:
+        pool (multiprocessing.pool.Pool): Pool to run the tasks on
+        func (callable): Worker entry point
+        tasks (iterable): Task arguments, pulled lazily
+        window (int): Tasks submitted but not yet taken at a time
+        cancel_event (threading.Event, optional): Stops submitting when set
+
+    Yields:
+        tuple: (position of the task in tasks, result of func)
+    """
+    completed = queue.Queue()
+    tasks = enumerate(tasks)
+    pending = 0
+    exhausted = False
+    while True:
+        while not exhausted and pending < max(window, 1):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            position, task = next(tasks, (None, _NO_TASK))
+            if task is _NO_TASK:
+                exhausted = True
+                break
+            pool.apply_async(func, (task,),
+                             callback=lambda result, position=position: completed.put((position, result)),
+                             error_callback=lambda error: completed.put((None, error)))
+            pending += 1
+        if not pending:
+            return
+        position, result = completed.get()
+        pending -= 1
+        if position is None:
+            raise result
+        yield position, result
+
+def _in_order(pairs):
+    # Results of _windowed, back in task order
+    results = dict(pairs)
+    return [results[position] for position in range(len(results))]
+
+class ResumeScreeningPool:
+    """
+    Long-lived process pool that keeps its workers (and their imports) warm
+    across runs.
+
+    The job keywords are shipped to each worker once, through the pool
+    initializer. When the job description changes, the new keywords are
+    published on a versioned broadcast board and every worker pulls them the
+    first time it receives a task for that version, so individual tasks only
+    carry a short version string instead of the whole keyword set. A version
+    stays on the board while any run uses it.
+
+    Workers over the RSS limit are replaced between runs by a fresh set. Runs
+    already in flight finish on the old set, which is shut down once the last
+    of them is done.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or available_cpus()
+        self._pool = None
+        # Worker pool -> runs submitting to it, including retired pools still draining
+        self._pool_runs = {}
+        self._manager = None
+        self._board = None
+        # Job version -> number of runs using it, oldest first
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+        # Shared memory blocks reused by map_shared, one batch at a time
+        self._arena = None
+        self._arena_lock = threading.Lock()
+
+    @property
+    def is_running(self):
+        return self._pool is not None
+
+    def _window(self, workers):
+        # Tasks in flight at a time: four per worker keep them all fed, one per
+        # worker caps a run at that many busy workers
+        if workers and workers < self.processes:
+            return workers
+        return self.processes * 4
+
+    def _start(self, version, job_keywords):
+        logger.info("Initializing persistent process pool with %d workers", self.processes)
+        if self._manager is None:
+            # Start the resource tracker first so the workers inherit it and the
+            # shared memory blocks they attach to are tracked in one place
+            resource_tracker.ensure_running()
+            self._manager = multiprocessing.Manager()
+            self._board = self._manager.dict({version: job_keywords})
+        else:
+            # Replacement workers share the board of the set they replace
+            self._board[version] = job_keywords
+        self._pool = multiprocessing.Pool(
+            processes=self.processes,
+            initializer=_init_worker,
+            initargs=(self._board, version, job_keywords),
+            # Replace workers periodically so memory pdfminer leaves behind is returned
+            maxtasksperchild=DEFAULT_LIMITS['worker_max_tasks'] or None,
+        )
+
+    def _bloated_workers(self):
+        limit = DEFAULT_LIMITS['worker_max_rss_mb'] * 1024 * 1024
+        if not limit:
+            return []
+        return [worker.pid for worker in self._pool._pool
+                if (rss_bytes(worker.pid) or 0) > limit]
+
+    def _retire(self):
+        # Called with the lock held; returns the old pool if nothing runs on it any more
+        retired, self._pool = self._pool, None
+        if self._pool_runs.get(retired):
+            return None
+        self._pool_runs.pop(retired, None)
+        return retired
+
+    def set_job(self, job_keywords):
+        """
+        Make a job context available to the workers.
+
+        The version may be evicted once MAX_JOB_VERSIONS newer ones are in
+        use; the pool's own runs pin theirs until they finish.
+
+        Args:
+            job_keywords (set or JobMatcher): Job keywords (see
+                utils.extract_job_terms)
+
+        Returns:
+            str: Job version to tag tasks with
+        """
+        return self._publish(job_keywords, pin=False)[0]
+
+    @contextmanager
+    def _job(self, job_keywords):
+        # Keeps the version on the board, and the workers the run submits to
+        # alive, until the run's last task has been scored
+        version, pool = self._publish(job_keywords, pin=True)
+        try:
+            yield version, pool
+        finally:
+            with self._lock:
+                if version in self._versions:
+                    self._versions[version] -= 1
+                    self._evict_versions()
+                drained = pool is not self._pool and self._pool_runs.get(pool) == 1
+                if pool in self._pool_runs:
+                    self._pool_runs[pool] -= 1
+                if drained:
+                    del self._pool_runs[pool]
+            if drained:
+                pool.close()
+                pool.join()
+
+    def _evict_versions(self):
+        unused = [version for version, runs in self._versions.items() if not runs]
+        for version in unused[:max(len(self._versions) - MAX_JOB_VERSIONS, 0)]:
+            del self._versions[version]
+            self._board.pop(version, None)
+
+    def _publish(self, job_keywords, pin):
+        # A JobMatcher is shipped as is; its version covers its terms, which
+        # only coincide with a plain keyword set when it has no phrases, and
+        # then both score resumes identically
+        if not isinstance(job_keywords, JobMatcher):
+            job_keywords = frozenset(job_keywords)
+        version = job_version(job_keywords)
+        retired = None
+        with self._lock:
+            bloated = self._bloated_workers() if self._pool is not None else []
+            if bloated:
+                # A worker cannot be replaced mid-task without losing it, so swap the whole set
+                logger.info("Replacing the pool's workers: %s exceed %d MB RSS", bloated,
+                            DEFAULT_LIMITS['worker_max_rss_mb'])
+                retired = self._retire()
+            if self._pool is None:
+                self._start(version, job_keywords)
+            elif version not in self._versions:
+                logger.info("Broadcasting new job context %s to workers", version[:8])
+                self._board[version] = job_keywords
+            self._versions[version] = self._versions.get(version, 0) + pin
+            self._versions.move_to_end(version)
+            self._evict_versions()
+            pool = self._pool
+            if pin:
+                self._pool_runs[pool] = self._pool_runs.get(pool, 0) + 1
+        if retired is not None:
+            retired.close()
+            retired.join()
+        return version, pool
+
+    def map(self, resumes, job_keywords, chunksize=None, metrics=None, workers=None):
+        """
+        Score resumes against a job on the warm workers.
+
+        Args:
+            resumes (list): List of dictionaries containing resume data
+            job_keywords (set): Set of keywords extracted from job description
+            chunksize (int, optional): Tasks sent to a worker at a time
+            metrics (PoolMetrics, optional): Collects transport and worker
+                timings when given
+            workers (int, optional): Most workers to keep busy at a time
+                (defaults to all of them)
+
+        Returns:
+            list: Scoring result dicts, in input order
+        """
+        window = self._window(workers)
+        chunksize = chunksize or default_chunksize(len(resumes), min(window, self.processes))
+        with self._job(job_keywords) as (version, pool):
+            if metrics is None:
+                tasks = ((version, chunk, False) for chunk in _chunked(resumes, chunksize))
+                chunks = _in_order(_windowed(pool, _process_chunk, tasks, window))
+                return [result for chunk in chunks for result in chunk]
+
+            sent_at = time.time()
+            tasks = []
+            for index, resume in enumerate(resumes):
+                task = (version, resume, sent_at, index)
+                pickle_start = time.perf_counter()
+                payload_bytes = len(pickle.dumps(task, pickle.HIGHEST_PROTOCOL))
+                metrics.record_submit(time.perf_counter() - pickle_start, payload_bytes)
+                tasks.append(task)
+            results = [None] * len(tasks)
+            for _, chunk in _windowed(pool, _process_chunk_profiled, _chunked(tasks, chunksize), window):
+                for index, result, meta in chunk:
+                    metrics.record_task(meta, sent_at, time.time())
+                    results[index] = result
+            return results
+
+    def map_shared(self, resumes, job_keywords, chunksize=None, workers=None):
+        """
+        Score resumes on the warm workers without pickling texts or results.
+
+        The texts are packed into one shared memory block and each task is
+        just an index range; workers write fixed-layout rows into a shared
+        result table. Both blocks are kept and reused by the next call (see
+        shared_transport.SharedArena), so concurrent calls run one at a time.
+
+        Args:
+            resumes (list): List of dictionaries containing resume data
+            job_keywords (set): Set of keywords extracted from job description
+            chunksize (int, optional): Resumes per task
+            workers (int, optional): Most workers to keep busy at a time
+
+        Returns:
+            dict: Result columns in the shape format_results expects
+        """
+        # numpy is only needed for this transport
+        from shared_transport import SharedArena
+        terms = sorted(job_keywords)
+        count = len(resumes)
+        window = self._window(workers)
+        chunksize = chunksize or default_chunksize(count, min(window, self.processes))
+        with self._job(job_keywords) as (version, pool), self._arena_lock:
+            if self._arena is None:
+                self._arena = SharedArena()
+            corpus = self._arena.corpus([resume['text'] for resume in resumes])
+            table = self._arena.table(count, len(terms))
+            try:
+                tasks = [
+                    (version, corpus.name, table.name, count, len(terms), start, min(start + chunksize, count))
+                    for start in range(0, count, chunksize)
+                ]
+                for _ in _windowed(pool, _process_shared_chunk, tasks, window):
+                    pass
+                return table.columns(terms, [resume['name'] for resume in resumes])
+            finally:
+                corpus.release()
+                table.release()
+
+    def map_corpus(self, corpus_path, count, job_keywords, k=None, weights=None, chunksize=None, workers=None):
+        """
+        Score a tokenized corpus file on the warm workers.
+
+        Tasks are index ranges; nothing but the path crosses the process
+        boundary on the way in.
+
+        Args:
+            corpus_path (str): Corpus file (see tokenized_corpus)
+            count (int): Number of resumes in the corpus
+            job_keywords (set): Set of keywords extracted from job description
+            k (int, optional): Only keep the top K
+            weights (dict, optional): Component weights (see utils.combine_scores)
+            chunksize (int, optional): Resumes per task
+            workers (int, optional): Most workers to keep busy at a time
+
+        Returns:
+            list or TopKRanker: Result columns per range, in order, or the
+                merged ranking when k is given
+        """
+        window = self._window(workers)
+        chunksize = chunksize or default_chunksize(count, min(window, self.processes))
+        with self._job(job_keywords) as (version, pool):
+            tasks = [(version, corpus_path, start, min(start + chunksize, count), k, weights)
+                     for start in range(0, count, chunksize)]
+            if not k:
+                return _in_order(_windowed(pool, _process_corpus_range, tasks, window))
+            ranker = TopKRanker(k)
+            for _, (seen, rows) in _windowed(pool, _process_corpus_range, tasks, window):
+                ranker.merge(rows, seen)
+            return ranker
+
+    def imap_unordered(self, resumes, job_keywords, chunksize=1, cancel_event=None, max_in_flight=None,
+                       keep_text=False, workers=None):
+        """
+        Score resumes on the warm workers, yielding results as they complete.
+
+        At most max_in_flight resumes are handed to the pool at a time, so
+        setting cancel_event (or closing the generator) stops the run after
+        the tasks already in flight instead of after the whole batch. More
+        are submitted from the consuming thread as results are taken, so a
+        slow or abandoned stream only holds back itself, never other runs on
+        the shared pool.
+
+        Args:
+            resumes (iterable): Dictionaries containing resume data
+            job_keywords (set): Set of keywords extracted from job description
+            chunksize (int): Tasks sent to a worker at a time
+            cancel_event (threading.Event, optional): Set to stop the run
+            max_in_flight (int, optional): Submission window (defaults to four
+                chunks per worker, or one chunk per worker with workers)
+            keep_text (bool): Also send back the text of resumes the workers
+                parsed, under 'text'
+            workers (int, optional): Most workers to keep busy at a time
+
+        Yields:
+            dict: Scoring result dicts, in completion order
+        """
+        cancel_event = cancel_event or threading.Event()
+        max_in_flight = max_in_flight or self._window(workers) * chunksize
+        if workers:
+            max_in_flight = min(max_in_flight, workers * chunksize)
+        max_in_flight = max(max_in_flight, chunksize)
+
+        with self._job(job_keywords) as (version, pool):
+            tasks = ((version, chunk, keep_text) for chunk in _chunked(resumes, chunksize))
+            try:
+                for _, results in _windowed(pool, _process_chunk, tasks, max_in_flight // chunksize,
+                                            cancel_event):
+                    for result in results:
+                        yield result
+                        if cancel_event.is_set():
+                            return
+            finally:
+                cancel_event.set()
+
+    def rank(self, resumes, job_keywords, k, chunksize, workers=None):
+        """
+        Rank resumes on the warm workers, keeping only the top K.
+
+        Each task is a chunk of resumes; workers send back the chunk's top K
+        as compact rows, which are merged here into the global top K.
+
+        Args:
+            resumes (iterable): Dictionaries containing resume data
+            job_keywords (set): Set of keywords extracted from job description
+            k (int): Number of candidates to keep
+            chunksize (int): Resumes per task
+            workers (int, optional): Most workers to keep busy at a time
+
+        Returns:
+            TopKRanker: The merged ranking
+        """
+        with self._job(job_keywords) as (version, pool):
+            # Chunks are cut lazily, a few per worker ahead of the merge
+            tasks = ((version, k, chunk) for chunk in _chunked(enumerate(resumes), chunksize))
+            ranker = TopKRanker(k)
+            for _, (seen, rows) in _windowed(pool, _rank_chunk, tasks, self._window(workers)):
+                ranker.merge(rows, seen)
+            return ranker
+
+    def worker_pids(self):
+        """
+        Returns:
+            list: Process IDs of the current workers (empty before the first run)
+        """
+        with self._lock:
+            return [worker.pid for worker in self._pool._pool] if self._pool is not None else []
+
+    def close(self):
+        """Shut the workers and the broadcast board down."""
+        with self._lock:
+            pools = set(self._pool_runs)
+            if self._pool is not None:
+                pools.add(self._pool)
+            manager = self._manager
+            self._pool = self._manager = self._board = None
+            self._pool_runs.clear()
+            self._versions.clear()
+        for pool in pools:
+            pool.close()
+            pool.join()
+        if manager is not None:
+            manager.shutdown()
+        with self._arena_lock:
+            if self._arena is not None:
+                self._arena.close()
+                self._arena = None
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Return the process-wide warm pool, creating it on first use.
+
+    The pool lives at module level so it survives Streamlit reruns, and is
+    shut down when the interpreter exits. It always has available_cpus()
+    workers; a run that should use fewer passes its pool method a workers
+    cap instead of resizing the pool under the other runs.
+
+    Returns:
+        ResumeScreeningPool: The shared pool
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ResumeScreeningPool()
+        return _shared_pool
+
+def warm_workers():
+    """
+    Number of workers of the shared pool, if it is running.
+
+    Returns:
+        int: Worker count of the running pool, or 0
+    """
+    with _shared_pool_lock:
+        if _shared_pool is not None and _shared_pool.is_running:
+            return _shared_pool.processes
+        return 0
+
+def shutdown_pool():
+    """Close the shared pool, if one was started."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is not None:
+            _shared_pool.close()
+            _shared_pool = None
+
+atexit.register(shutdown_pool)
+
+def process_single_resume(resume, job_keywords, limits=None, keep_text=False):
     """
     Process a single resume - to be used by parallel processor.
     
     Args:
-        resume (dict): Dictionary containing resume data with 'text' and 'name' keys
+        resume (dict): Dictionary containing resume data with 'text' and 'name' keys,
+            or 'path' and 'name' to read and parse the file here
         job_keywords (set): Set of keywords extracted from job description
+        limits (dict, optional): Per-file limits (see resource_limits.DEFAULT_LIMITS)
+        keep_text (bool): Also return the text parsed here under 'text'
         
     Returns:
-        dict: Dictionary with scoring results
+        dict: Dictionary with scoring results; files over their time or
+            memory budget come back as skipped rows (see utils.skipped_result)
     """
-    resume_text = resume['text']
-    file_name = resume['name']
-    
     # Note: in parallel mode, we can't use print statements from worker processes
     # as they will not be displayed properly in the main process output
-    
-    # Score the resume
-    result = score_resume(resume_text, job_keywords)
-    result['file_name'] = file_name
-    
-    return result
+    return score_resume_within_limits(resume, job_keywords, limits, keep_text)
 
-def process_resumes_parallel(job_description, resumes):
+def process_resumes_parallel(job_description, resumes, processes=None, chunksize=None, profile=False,
+                             phrase_matching=False, deduplicate=False, duplicate_groups=None):
     """
-    Process resumes in parallel using multiprocessing.
-    
+    Process resumes in parallel using the shared warm process pool.
+
     Args:
         job_description (str): Job description text
         resumes (list): List of dictionaries containing resume data
             Each dict should have 'text' and 'name' keys
-            
+        processes (int, optional): Most workers of the shared pool to use
+            (defaults to all of them)
+        chunksize (int, optional): Tasks sent to a worker at a time
+        profile (bool): Also return a per-stage and pool profiling report
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+        deduplicate (bool): Score only one resume per group of near-duplicates
+            and copy its result to the others (see near_duplicates)
+        duplicate_groups (dict, optional): find_near_duplicates output already
+            computed for resumes; deduplicates with these groups
+
     Returns:
-        tuple: (DataFrame with results, execution time in seconds)
+        tuple: (DataFrame with results, execution time in seconds), plus the
+            profiling report from instrumentation.build_report if profile is set
     """
-    print("\n======== PARALLEL RESUME PROCESSING ========")
-    print(f"Job description length: {len(job_description)} characters")
-    print(f"Number of resumes to process: {len(resumes)}")
-    
+    logger.info("Parallel processing of %d resumes (job description: %d characters)",
+                len(resumes), len(job_description))
+
+    # Drop timings recorded before this run (e.g. while parsing uploads)
+    collect_stage_timings()
     start_time = time.time()
-    
+
     # Extract keywords from job description
-    print("Extracting keywords from job description...")
-    job_keywords = extract_keywords(job_description)
-    
-    # Set up the process pool with as many workers as there are CPU cores
-    num_cores = multiprocessing.cpu_count()
-    print(f"Initializing process pool with {num_cores} CPU cores")
-    pool = multiprocessing.Pool(processes=num_cores)
-    
-    # Create a partial function with the job keywords
-    process_resume_with_keywords = partial(process_single_resume, job_keywords=job_keywords)
-    
+    job_keywords = extract_job_terms(job_description, phrase_matching)
+
+    # Reuse the warm pool; workers only receive the job keywords when they change
+    pool = get_pool()
+    metrics = PoolMetrics() if profile else None
+
+    # Only send one resume per group of near-duplicates to the workers
+    to_score = resumes
+    deduplicate = deduplicate or duplicate_groups is not None
+    if deduplicate:
+        # numpy is only needed for deduplication
+        from near_duplicates import deduplicate_resumes, propagate_scores
+        to_score, groups = deduplicate_resumes(resumes, groups=duplicate_groups)
+
     # Process resumes in parallel
-    print(f"Starting parallel processing of {len(resumes)} resumes...")
-    results = pool.map(process_resume_with_keywords, resumes)
-    print(f"Completed parallel processing of {len(results)} resumes")
-    
-    # Clean up
-    print("Cleaning up process pool...")
-    pool.close()
-    pool.join()
-    
+    pool_start = time.time()
+    results = pool.map(to_score, job_keywords, chunksize, metrics, workers=processes)
+    pool_time = time.time() - pool_start
+
+    if deduplicate:
+        results = propagate_scores(results, resumes, groups)
+
     # Calculate execution time
     execution_time = time.time() - start_time
-    print(f"Parallel processing completed in {execution_time:.4f} seconds")
-    
+    logger.info("Parallel processing completed in %.4f seconds", execution_time)
+
     # Format results into a DataFrame
-    print("Formatting results...")
     results_df = format_results(results)
-    print(f"Formatted {len(results_df)} results")
-    
+
+    if profile:
+        metrics.stages.merge(collect_stage_timings())
+        report = build_report('parallel', execution_time, len(resumes), metrics.stages.snapshot(),
+                              pool=metrics.summary(pool_time, min(processes or pool.processes, pool.processes)))
+        return results_df, execution_time, report
     return results_df, execution_time
+
+def iter_resumes_parallel(job_description, resumes, processes=None, chunksize=None, cancel_event=None,
+                          phrase_matching=False):
+    """
+    Process resumes in parallel, yielding each result as soon as it is scored.
+
+    Args:
+        job_description (str): Job description text
+        resumes (iterable): Dictionaries containing resume data
+            Each dict should have 'text' and 'name' keys, or 'path' and
+            'name' to have the workers read and parse the file
+        processes (int, optional): Most workers of the shared pool to use
+            (defaults to all of them)
+        chunksize (int, optional): Tasks sent to a worker at a time
+        cancel_event (threading.Event, optional): Set to stop the run early;
+            closing the generator has the same effect
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+
+    Yields:
+        dict: Scoring result dicts (with 'file_name'), in completion order
+    """
+    job_keywords = extract_job_terms(job_description, phrase_matching)
+    pool = get_pool()
+    workers = min(processes or pool.processes, pool.processes)
+    if chunksize is None:
+        num_tasks = len(resumes) if hasattr(resumes, '__len__') else None
+        chunksize = streaming_chunksize(num_tasks, workers)
+    logger.info("Streaming parallel processing with %d workers, chunk size %d", workers, chunksize)
+    yield from pool.imap_unordered(resumes, job_keywords, chunksize, cancel_event, workers=processes)
+
+def rank_resumes_parallel(job_description, resumes, k=10, processes=None, chunksize=None,
+                          phrase_matching=False):
+    """
+    Rank resumes in parallel, keeping only the top K candidates in memory.
+
+    Workers return their local top K per chunk without the per-resume keyword
+    sets, so memory and IPC depend on K rather than on the number of resumes.
+
+    Args:
+        job_description (str): Job description text
+        resumes (iterable): Dictionaries containing resume data
+            Each dict should have 'text' and 'name' keys
+        k (int): Number of candidates to return
+        processes (int, optional): Most workers of the shared pool to use
+            (defaults to all of them)
+        chunksize (int, optional): Resumes per task
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+
+    Returns:
+        tuple: (DataFrame with the top K results, execution time in seconds)
+    """
+    start_time = time.time()
+    job_keywords = extract_job_terms(job_description, phrase_matching)
+    pool = get_pool()
+    if chunksize is None:
+        num_tasks = len(resumes) if hasattr(resumes, '__len__') else None
+        workers = min(processes or pool.processes, pool.processes)
+        chunksize = default_chunksize(num_tasks, workers) if num_tasks else 64
+    ranker = pool.rank(resumes, job_keywords, k, chunksize, workers=processes)
+    execution_time = time.time() - start_time
+    logger.info("Ranked %d resumes in %.4f seconds", ranker.seen, execution_time)
+    return format_results(ranker.results()), execution_time
+
+# Ways of moving resumes and results between the parent and the workers
+TRANSPORTS = ('pickle', 'shared_memory')
+
+def compare_transports(job_description, resumes, processes=None, chunksize=None, repeats=3,
+                       phrase_matching=False):
+    """
+    Time the pickled and shared-memory transports on the same batch.
+
+    Both runs use the warm pool, which is started before timing begins.
+    Screening always uses pickle: scoring dominates both transports, and
+    shared memory has not measured faster.
+
+    Args:
+        job_description (str): Job description text
+        resumes (list): List of dictionaries containing resume data
+        processes (int, optional): Most workers of the shared pool to use
+            (defaults to all of them)
+        chunksize (int, optional): Resumes per task
+        repeats (int): Runs per transport; the fastest one is kept
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+
+    Returns:
+        dict: Best time in seconds per transport and the shared-memory speedup
+    """
+    job_keywords = extract_job_terms(job_description, phrase_matching)
+    pool = get_pool()
+    pool.set_job(job_keywords)
+    timings = {}
+    for transport in TRANSPORTS:
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            if transport == 'shared_memory':
+                pool.map_shared(resumes, job_keywords, chunksize, processes)
+            else:
+                pool.map(resumes, job_keywords, chunksize, workers=processes)
+            best = min(best, time.perf_counter() - start)
+        timings[transport] = best
+    timings['speedup'] = timings['pickle'] / timings['shared_memory'] if timings['shared_memory'] else 0.0
+    return timings
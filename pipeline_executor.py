@@ -0,0 +1,297 @@
+import time
+import queue
+import logging
+import threading
+
+from utils import extract_job_terms, parse_resume_text
+from resume_cache import content_key
+from resource_limits import DEFAULT_LIMITS
+from parallel_resume_screener import get_pool, streaming_chunksize
+from instrumentation import StageThroughput
+
+logger = logging.getLogger(__name__)
+
+# Threads reading, hashing and decoding files in front of the process pool
+DEFAULT_READ_THREADS = 4
+
+# Decoded resumes waiting for the process pool
+DEFAULT_QUEUE_SIZE = 64
+
+# How often blocked stages check whether the run was stopped
+_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+def decode_resume(resume, text_cache=None):
+    """
+    Read stage of the pipeline: get a resume's text from the parsed-text
+    cache or by decoding a TXT file, and leave PDFs that missed the cache
+    for the workers.
+
+    Args:
+        resume (dict): 'name' and 'text', 'content' (raw bytes, with an
+            optional 'type') or 'path'
+        text_cache (ResumeTextCache, optional): Parsed-text cache
+
+    Returns:
+        tuple: (resume dict to score, content key of a PDF left for the
+            workers or None)
+    """
+    if 'text' in resume:
+        return resume, None
+    if 'content' in resume:
+        content = resume['content']
+    else:
+        try:
+            with open(resume['path'], 'rb') as f:
+                content = f.read()
+        except OSError as e:
+            logger.warning("Error reading %s: %s", resume['path'], e)
+            return {'name': resume['name'], 'text': ''}, None
+    file_type = resume.get('type') or resume.get('path', resume['name']).rsplit('.', 1)[-1].lower()
+    # Workers extract PDFs under the page cap, so their texts are cached under it
+    key = content_key(content, file_type, DEFAULT_LIMITS['max_pages'])
+    text = text_cache.lookup(key) if text_cache is not None else None
+    if text is None and file_type != 'pdf':
+        text = parse_resume_text(content, file_type)
+        if text_cache is not None:
+            text_cache.store(key, text)
+    if text is not None:
+        return {'name': resume['name'], 'text': text}, None
+    return {'name': resume['name'], 'content': content, 'type': file_type}, key
+
+class ScreeningPipeline:
+    """
+    Overlapping read -> parse/score -> aggregate stages for a batch of files.
+
+    1. read: a thread pool reads each file (or takes its uploaded bytes),
+       hashes it, looks its text up in the parsed-text cache and decodes
+       TXT files. This is I/O and hashing, which release the GIL.
+    2. score: the warm process pool parses the PDFs that missed the cache
+       and scores every resume, so pdfminer runs on every core.
+    3. aggregate: the caller consumes the results as they arrive (progress,
+       leaderboards, writing output) and texts parsed by the workers are
+       stored in the cache.
+
+    A bounded queue sits between the read threads and the pool, and the pool
+    keeps a bounded window of tasks in flight, so a fast stage blocks instead
+    of buffering the whole batch in front of a slow one. With the stages
+    overlapped, a run takes about as long as its slowest stage instead of the
+    sum of all of them. stats() reports each stage's throughput.
+    """
+
+    def __init__(self, job_description, processes=None, read_threads=DEFAULT_READ_THREADS,
+                 queue_size=DEFAULT_QUEUE_SIZE, chunksize=None, max_in_flight=None, text_cache=None,
+                 phrase_matching=False, job_keywords=None):
+        """
+        Args:
+            job_description (str): Job description text
+            processes (int, optional): Most parse/score workers of the shared
+                pool to use (defaults to all of them)
+            read_threads (int): Read/decode threads
+            queue_size (int): Decoded resumes buffered in front of the pool
+            chunksize (int, optional): Resumes sent to a worker at a time
+            max_in_flight (int, optional): Resumes handed to the pool at a time
+                (see ResumeScreeningPool.imap_unordered)
+            text_cache (ResumeTextCache, optional): Parsed-text cache to read
+                from and to fill with the texts the workers parse
+            phrase_matching (bool): Match compound terms and multi-word skills
+                as single keywords (see utils.extract_job_terms)
+            job_keywords (set or JobMatcher, optional): Job terms already
+                extracted from job_description, to skip extracting them again
+        """
+        if job_keywords is None:
+            job_keywords = extract_job_terms(job_description, phrase_matching)
+        self.job_keywords = job_keywords
+        self.pool = get_pool()
+        self.processes = processes
+        self.workers = min(processes or self.pool.processes, self.pool.processes)
+        self.read_threads = max(read_threads, 1)
+        self.queue_size = max(queue_size, 1)
+        self.chunksize = chunksize
+        self.max_in_flight = max_in_flight
+        self.text_cache = text_cache
+        self._meters = {}
+
+    def run(self, resumes):
+        """
+        Screen resumes through the pipeline.
+
+        Closing the generator stops every stage after the work in flight.
+        An error in the read stage stops the run and is raised here once the
+        resumes already handed to the pool have been yielded.
+
+        Args:
+            resumes (iterable): Dictionaries with 'name' and 'text',
+                'content' (raw bytes, with an optional 'type') or 'path'
+
+        Yields:
+            dict: Scoring result dicts (with 'file_name'), in completion order
+        """
+        chunksize = self.chunksize
+        if chunksize is None:
+            num_tasks = len(resumes) if hasattr(resumes, '__len__') else None
+            chunksize = streaming_chunksize(num_tasks, self.workers)
+        meters = self._meters = {
+            'read': StageThroughput('read', self.read_threads),
+            'score': StageThroughput('score', self.workers),
+            'aggregate': StageThroughput('aggregate', 1),
+        }
+        decoded = queue.Queue(self.queue_size)
+        stop = threading.Event()
+        source = iter(resumes)
+        source_lock = threading.Lock()
+        # Content key of each PDF the workers parse, by name, to cache the text they send back
+        parsed_keys = {}
+        errors = []
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    decoded.put(item, timeout=_POLL_INTERVAL)
+                    return
+                except queue.Full:
+                    continue
+
+        def read():
+            try:
+                while not stop.is_set():
+                    with source_lock:
+                        resume = next(source, _DONE)
+                    if resume is _DONE:
+                        return
+                    started = time.perf_counter()
+                    item, key = decode_resume(resume, self.text_cache)
+                    if key is not None:
+                        # The same name twice in flight: leave both uncached rather than guess
+                        parsed_keys[item['name']] = None if item['name'] in parsed_keys else key
+                    handed_on = time.perf_counter()
+                    put(item)
+                    meters['read'].record(started, handed_on - started, time.perf_counter() - handed_on)
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                put(_DONE)
+
+        def decoded_resumes():
+            # Pulled on this thread whenever the pool's window has room
+            finished = 0
+            while finished < self.read_threads and not stop.is_set():
+                try:
+                    item = decoded.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    finished += 1
+                else:
+                    yield item
+
+        readers = [threading.Thread(target=read, name=f'resume-reader-{i}', daemon=True)
+                   for i in range(self.read_threads)]
+        for reader in readers:
+            reader.start()
+        results = self.pool.imap_unordered(decoded_resumes(), self.job_keywords, chunksize,
+                                           max_in_flight=self.max_in_flight, keep_text=True,
+                                           workers=self.processes)
+        logger.info("Pipelined screening: %d read threads, %d workers, chunk size %d",
+                    self.read_threads, self.workers, chunksize)
+        try:
+            received = time.perf_counter()
+            for result in results:
+                now = time.perf_counter()
+                meters['score'].record(received, now - received)
+                text = result.pop('text', None)
+                key = parsed_keys.pop(result['file_name'], None)
+                if text is not None and key is not None and self.text_cache is not None:
+                    self.text_cache.store(key, text)
+                yield result
+                received = time.perf_counter()
+                meters['aggregate'].record(now, received - now)
+            if errors:
+                raise errors[0]
+        finally:
+            stop.set()
+            results.close()
+            for reader in readers:
+                reader.join()
+            logger.info("Pipeline stages: %s", ', '.join(
+                f"{stats['stage']} {stats['throughput']:.1f}/s" for stats in self.stats()))
+
+    def stats(self):
+        """
+        Returns:
+            list: StageThroughput.summary() of each stage of the last run, in
+                pipeline order. For 'score', busy time is the time the pool
+                took to deliver each result.
+        """
+        return [meter.summary() for meter in self._meters.values()]
+
+def screen_pipelined(job_description, resumes, processes=None, read_threads=DEFAULT_READ_THREADS,
+                     queue_size=DEFAULT_QUEUE_SIZE, chunksize=None, text_cache=None, phrase_matching=False):
+    """
+    Screen resumes through a ScreeningPipeline and collect the results.
+
+    Args:
+        job_description (str): Job description text
+        resumes (iterable): Dictionaries with 'name' and 'text', 'content' or 'path'
+        processes (int, optional): Most parse/score workers to use
+        read_threads (int): Read/decode threads
+        queue_size (int): Decoded resumes buffered in front of the pool
+        chunksize (int, optional): Resumes sent to a worker at a time
+        text_cache (ResumeTextCache, optional): Parsed-text cache
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+
+    Returns:
+        tuple: (list of result dicts, per-stage stats, execution time in seconds)
+    """
+    start_time = time.time()
+    pipeline = ScreeningPipeline(job_description, processes, read_threads, queue_size, chunksize,
+                                 text_cache=text_cache, phrase_matching=phrase_matching)
+    results = list(pipeline.run(resumes))
+    return results, pipeline.stats(), time.time() - start_time
+
+def extract_texts(resumes, text_cache=None, processes=None):
+    """
+    Get the text of resumes without scoring them, parsing PDFs on the warm
+    pool under the per-file limits.
+
+    resource_limits.FileGuard only works on a process's main thread, so a
+    caller on any other thread (such as the Streamlit script thread) cannot
+    guard pdfminer itself; here a pathological PDF is stopped in a worker
+    and reported as skipped. TXT files and cached texts are read here.
+
+    Args:
+        resumes (iterable): Dictionaries with a unique 'name' and 'text',
+            'content' (raw bytes, with an optional 'type') or 'path'
+        text_cache (ResumeTextCache, optional): Parsed-text cache to read
+            from and to fill with the texts the workers parse
+        processes (int, optional): Most workers of the shared pool to use
+
+    Returns:
+        tuple: (dict of name -> text, dict of name -> skip reason for the
+            files that were not parsed)
+    """
+    texts, skipped, to_parse, keys = {}, {}, [], {}
+    for resume in resumes:
+        item, key = decode_resume(resume, text_cache)
+        if key is None:
+            texts[item['name']] = item['text']
+        else:
+            keys[item['name']] = key
+            to_parse.append(item)
+    if not to_parse:
+        return texts, skipped
+    pool = get_pool()
+    chunksize = streaming_chunksize(len(to_parse), min(processes or pool.processes, pool.processes))
+    # Scoring against no keywords is the cheapest way through the guarded worker path
+    for result in pool.imap_unordered(to_parse, frozenset(), chunksize, keep_text=True, workers=processes):
+        name = result['file_name']
+        if result.get('skipped'):
+            skipped[name] = result['skipped']
+            continue
+        texts[name] = result['text']
+        if text_cache is not None:
+            text_cache.store(keys[name], result['text'])
+    return texts, skipped
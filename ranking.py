@@ -0,0 +1,140 @@
+import heapq
+from array import array
+
+class TopKRanker:
+    """
+    Keeps the K best-scoring resumes seen so far, in memory proportional to K.
+
+    Component scores live in fixed-size array-backed columns with one slot per
+    kept candidate; a min-heap of (score, -index, slot) decides which slot is
+    evicted next. Matching keywords are only kept (as a sorted tuple) for
+    candidates that make it into the top K. Ties are broken in favour of the
+    resume that came first in the input.
+    """
+
+    def __init__(self, k):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        self.seen = 0
+        self._heap = []
+        self._final = array('d', [0.0]) * k
+        self._keyword_ratio = array('d', [0.0]) * k
+        self._experience = array('d', [0.0]) * k
+        self._education = array('d', [0.0]) * k
+        self._years = array('i', [0]) * k
+        self._index = array('q', [0]) * k
+        self._names = [None] * k
+        self._keywords = [None] * k
+
+    def __len__(self):
+        return len(self._heap)
+
+    def would_admit(self, final_score, index):
+        """
+        Check whether a resume would enter the current top K.
+
+        Args:
+            final_score (float): Final score of the resume
+            index (int): Position of the resume in the input
+
+        Returns:
+            bool: True if offering the resume would keep it
+        """
+        return len(self._heap) < self.k or (final_score, -index) > self._heap[0][:2]
+
+    def push(self, row):
+        """
+        Offer a compact row to the ranking.
+
+        Args:
+            row (tuple): (final_score, keyword_match_ratio, years_experience,
+                experience_score, education_score, index, file_name, keywords)
+
+        Returns:
+            bool: True if the row was kept
+        """
+        self.seen += 1
+        return self._admit(row)
+
+    def _admit(self, row):
+        final_score, keyword_ratio, years, experience, education, index, name, keywords = row
+        if not self.would_admit(final_score, index):
+            return False
+        if len(self._heap) < self.k:
+            slot = len(self._heap)
+            heapq.heappush(self._heap, (final_score, -index, slot))
+        else:
+            # Reuse the slot of the candidate being evicted
+            slot = self._heap[0][2]
+            heapq.heapreplace(self._heap, (final_score, -index, slot))
+        self._final[slot] = final_score
+        self._keyword_ratio[slot] = keyword_ratio
+        self._years[slot] = years
+        self._experience[slot] = experience
+        self._education[slot] = education
+        self._index[slot] = index
+        self._names[slot] = name
+        self._keywords[slot] = tuple(sorted(keywords))
+        return True
+
+    def offer(self, result, index):
+        """
+        Offer a score_resume result dict (with 'file_name') to the ranking.
+
+        Args:
+            result (dict): Scoring result
+            index (int): Position of the resume in the input
+
+        Returns:
+            bool: True if the result was kept
+        """
+        return self.push((
+            result['final_score'], result['keyword_match_ratio'], result['years_experience'],
+            result['experience_score'], result['education_score'], index,
+            result['file_name'], result['matching_keywords'],
+        ))
+
+    def merge(self, rows, seen=None):
+        """
+        Merge rows ranked elsewhere (e.g. a worker's local top K).
+
+        Args:
+            rows (list): Compact rows as returned by rows()
+            seen (int, optional): Number of resumes those rows were picked
+                from (defaults to the number of rows)
+        """
+        for row in rows:
+            self._admit(row)
+        self.seen += len(rows) if seen is None else seen
+
+    def rows(self):
+        """
+        Returns:
+            list: Compact rows of the kept candidates, best first
+        """
+        slots = [slot for _, _, slot in sorted(self._heap, reverse=True)]
+        return [
+            (self._final[s], self._keyword_ratio[s], self._years[s], self._experience[s],
+             self._education[s], self._index[s], self._names[s], self._keywords[s])
+            for s in slots
+        ]
+
+    def results(self):
+        """
+        Returns:
+            list: Result dicts of the kept candidates, best first, in the
+                shape format_results expects
+        """
+        return [
+            {
+                'final_score': final_score,
+                'keyword_match_ratio': keyword_ratio,
+                'matching_keywords': keywords,
+                'years_experience': years,
+                'experience_score': experience,
+                'education_score': education,
+                'file_name': name,
+            }
+            for final_score, keyword_ratio, years, experience, education, _, name, keywords in self.rows()
+        ]
@@ -0,0 +1,179 @@
+import os
+import time
+import signal
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+def _env_number(name, default, kind=float):
+    try:
+        return kind(os.environ.get(name, default))
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r", name, os.environ[name])
+        return kind(default)
+
+# Resource limits for screening one file and for pool workers (0 disables a limit).
+# Pool workers read them when they start, so set the environment variables
+# before the first run.
+DEFAULT_LIMITS = {
+    # Seconds to parse and score a single file
+    'file_timeout': _env_number('RESUME_FILE_TIMEOUT', 60.0),
+    # Megabytes of RSS a single file may add to the process while being screened
+    'file_memory_mb': _env_number('RESUME_FILE_MEMORY_MB', 1024, int),
+    # PDF pages to extract text from
+    'max_pages': _env_number('RESUME_MAX_PAGES', 0, int),
+    # Megabytes an archive member may decompress to before it is skipped
+    'max_member_mb': _env_number('RESUME_MAX_MEMBER_MB', 64, int),
+    # Pool tasks (chunks) a worker runs before it is replaced by a fresh one
+    'worker_max_tasks': _env_number('RESUME_WORKER_MAX_TASKS', 1000, int),
+    # Worker RSS in megabytes above which the pool is restarted before the next run
+    'worker_max_rss_mb': _env_number('RESUME_WORKER_MAX_RSS_MB', 2048, int),
+}
+
+# Reasons a file is skipped, as reported in the 'skipped' result field.
+# Position 0 means "not skipped" (used by the shared-memory result table).
+SKIP_REASONS = ('', 'timeout', 'memory')
+
+# How often the guard checks the clock and the RSS while a file is screened
+_CHECK_INTERVAL = 0.05
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+class ResourceLimitExceeded(BaseException):
+    """
+    Raised inside a FileGuard block when a file exceeds its budget.
+
+    Derives from BaseException so that the broad `except Exception` handlers
+    in PDF parsing code cannot swallow it.
+    """
+
+    def __init__(self, reason, detail):
+        super().__init__(detail)
+        self.reason = reason
+
+_statm = {'pid': None, 'fd': None}
+
+def rss_bytes(pid=None):
+    """
+    Resident set size of a process (Linux only).
+
+    Args:
+        pid (int, optional): Process to inspect (defaults to this process)
+
+    Returns:
+        int or None: RSS in bytes, None if it cannot be read
+    """
+    try:
+        if pid is not None:
+            with open(f'/proc/{pid}/statm', 'rb') as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        # Keep this process's statm open; the descriptor is reopened after a fork
+        if _statm['pid'] != os.getpid():
+            _statm['fd'] = os.open('/proc/self/statm', os.O_RDONLY)
+            _statm['pid'] = os.getpid()
+        return int(os.pread(_statm['fd'], 128, 0).split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+class FileGuard:
+    """
+    Time and memory budget for screening one file.
+
+    An interval timer (SIGALRM) checks the elapsed time and the process's RSS
+    growth every few milliseconds and raises ResourceLimitExceeded in the
+    guarded code when either limit is crossed. This interrupts pure-Python
+    work such as pdfminer's parser without killing the process, so a pool
+    worker can report the file as skipped and carry on. Signals only reach the
+    main thread, so the guard is a no-op elsewhere (e.g. in Streamlit's script
+    thread) and on platforms without setitimer.
+    """
+
+    _active = None
+
+    def __init__(self, timeout=0.0, memory_mb=0):
+        """
+        Args:
+            timeout (float): Seconds the block may run (0 for no limit)
+            memory_mb (int): Megabytes of RSS the block may add (0 for no limit)
+        """
+        self.timeout = timeout
+        self.memory_limit = memory_mb * 1024 * 1024
+        self._armed = False
+
+    def __enter__(self):
+        if (not (self.timeout or self.memory_limit) or FileGuard._active is not None
+                or not hasattr(signal, 'setitimer')
+                or threading.current_thread() is not threading.main_thread()):
+            return self
+        self._start = time.monotonic()
+        self._baseline = rss_bytes() if self.memory_limit else None
+        self._previous = signal.signal(signal.SIGALRM, self._check)
+        FileGuard._active = self
+        self._armed = True
+        signal.setitimer(signal.ITIMER_REAL, _CHECK_INTERVAL, _CHECK_INTERVAL)
+        return self
+
+    def _check(self, signum, frame):
+        if FileGuard._active is not self:
+            return
+        if self.timeout and time.monotonic() - self._start >= self.timeout:
+            self._disarm()
+            raise ResourceLimitExceeded('timeout', f"exceeded the {self.timeout:g}s time budget")
+        if self._baseline is not None:
+            rss = rss_bytes()
+            if rss is not None and rss - self._baseline > self.memory_limit:
+                self._disarm()
+                raise ResourceLimitExceeded(
+                    'memory', f"grew RSS by {(rss - self._baseline) >> 20} MB "
+                              f"(limit {self.memory_limit >> 20} MB)")
+
+    def _disarm(self):
+        if self._armed:
+            self._armed = False
+            FileGuard._active = None
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._disarm()
+        return False
+
+_ENV_NAMES = {
+    'file_timeout': 'RESUME_FILE_TIMEOUT',
+    'file_memory_mb': 'RESUME_FILE_MEMORY_MB',
+    'max_pages': 'RESUME_MAX_PAGES',
+    'max_member_mb': 'RESUME_MAX_MEMBER_MB',
+    'worker_max_tasks': 'RESUME_WORKER_MAX_TASKS',
+    'worker_max_rss_mb': 'RESUME_WORKER_MAX_RSS_MB',
+}
+
+def configure_limits(**limits):
+    """
+    Change the default limits for this process and the workers it starts.
+
+    Call before the pool starts: the values are also exported to the
+    environment, so workers started with the 'spawn' method see them too.
+
+    Args:
+        **limits: Keys of DEFAULT_LIMITS; None leaves a limit unchanged
+    """
+    for name, value in limits.items():
+        if name not in DEFAULT_LIMITS:
+            raise ValueError(f"Unknown limit {name!r}; expected one of {sorted(DEFAULT_LIMITS)}")
+        if value is not None:
+            DEFAULT_LIMITS[name] = value
+            os.environ[_ENV_NAMES[name]] = str(value)
+
+def file_guard(limits=None):
+    """
+    Build the guard for screening one file.
+
+    Args:
+        limits (dict, optional): Limits as in DEFAULT_LIMITS (defaults to it)
+
+    Returns:
+        FileGuard: Context manager enforcing the per-file limits
+    """
+    limits = limits or DEFAULT_LIMITS
+    return FileGuard(limits['file_timeout'], limits['file_memory_mb'])
@@ -0,0 +1,277 @@
+import io
+import os
+import csv
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('csv', 'parquet', 'arrow')
+
+# Results buffered before a chunk (a Parquet row group, an Arrow record batch
+# or a block of CSV lines) is written
+DEFAULT_CHUNK_ROWS = 10000
+
+# Exported columns in format_results order, with their Arrow types. Keywords
+# are a list column in Parquet and Arrow and a ", "-joined string in CSV.
+_BASE_COLUMNS = (
+    ('Final Score (%)', 'float64'),
+    ('Keyword Match (%)', 'float64'),
+    ('Matching Keywords', 'list'),
+    ('Years of Experience', 'int64'),
+    ('Experience Score (%)', 'float64'),
+    ('Education Score (%)', 'float64'),
+    ('Resume', 'string'),
+    ('Skipped', 'string'),
+)
+# Added when the results come from a deduplicated run (see near_duplicates)
+_DUPLICATE_COLUMNS = (
+    ('Duplicate Of', 'string'),
+    ('Near-Duplicates', 'int64'),
+)
+
+def export_format(path):
+    """
+    Pick the export format from a file name.
+
+    Args:
+        path (str): Output file name
+
+    Returns:
+        str: 'parquet' for .parquet, 'arrow' for .arrow/.feather, else 'csv'
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        return 'parquet'
+    if extension in ('.arrow', '.feather'):
+        return 'arrow'
+    return 'csv'
+
+def columnar_export_available():
+    """
+    Returns:
+        bool: Whether pyarrow (needed for Parquet and Arrow) is installed
+    """
+    import importlib.util
+    return importlib.util.find_spec('pyarrow') is not None
+
+def result_columns(results):
+    """
+    Turn scoring results into export columns.
+
+    Scores are rounded exactly as format_results rounds them.
+
+    Args:
+        results (list): Result dicts (score_resume output with 'file_name')
+
+    Returns:
+        dict: Column name -> list of values
+    """
+    import numpy as np
+
+    def percent(key):
+        return np.round(np.array([result[key] for result in results], dtype=np.float64) * 100, 2).tolist()
+
+    columns = {
+        'Final Score (%)': percent('final_score'),
+        'Keyword Match (%)': percent('keyword_match_ratio'),
+        'Matching Keywords': [sorted(result['matching_keywords']) for result in results],
+        'Years of Experience': [int(result['years_experience']) for result in results],
+        'Experience Score (%)': percent('experience_score'),
+        'Education Score (%)': percent('education_score'),
+        'Resume': [result['file_name'] for result in results],
+        'Skipped': [result.get('skipped', '') for result in results],
+    }
+    if results and 'duplicate_of' in results[0]:
+        columns['Duplicate Of'] = [result.get('duplicate_of', '') for result in results]
+        columns['Near-Duplicates'] = [int(result.get('duplicates', 0)) for result in results]
+    return columns
+
+def frame_columns(results_df):
+    """
+    Turn (a slice of) a format_results DataFrame into export columns.
+
+    Args:
+        results_df (DataFrame): Output of format_results
+
+    Returns:
+        dict: Column name -> list of values
+    """
+    columns = {}
+    for name, _ in _BASE_COLUMNS + _DUPLICATE_COLUMNS:
+        if name in results_df:
+            columns[name] = results_df[name].tolist()
+    # Job terms never contain ", ", so the joined keywords split back exactly
+    columns['Matching Keywords'] = [keywords.split(', ') if keywords else []
+                                    for keywords in columns['Matching Keywords']]
+    columns.setdefault('Skipped', [''] * len(results_df))
+    return columns
+
+class ResultWriter:
+    """
+    Writes screening results to CSV, Parquet or Arrow one chunk at a time.
+
+    Only the current chunk is held in memory, so results can be written while
+    they are being produced and a large run never needs a DataFrame or a full
+    CSV string. Parquet files get one row group per chunk and Arrow files
+    (the Feather v2 / IPC file format) one record batch per chunk; both keep
+    typed columns, with the matching keywords as a list of strings, so readers
+    can load just the columns they need:
+
+        pd.read_parquet(path, columns=['Resume', 'Final Score (%)'])
+
+    The column set is fixed by the first chunk.
+    """
+
+    def __init__(self, destination, output_format='csv', chunk_rows=DEFAULT_CHUNK_ROWS):
+        """
+        Args:
+            destination (str or file): Output path, or a binary file object
+                (e.g. io.BytesIO) that is left open
+            output_format (str): One of EXPORT_FORMATS
+            chunk_rows (int): Results per written chunk
+        """
+        if output_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {output_format!r}; expected one of {EXPORT_FORMATS}")
+        self.destination = destination
+        self.output_format = output_format
+        self.chunk_rows = max(chunk_rows, 1)
+        self.rows_written = 0
+        self._pending = []
+        self._columns = None
+        self._file = None
+        self._sink = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def write(self, result):
+        """Add one result; a full chunk is written out."""
+        self._pending.append(result)
+        if len(self._pending) >= self.chunk_rows:
+            self.flush()
+
+    def write_many(self, results):
+        """Add results from any iterable, e.g. a streaming screener."""
+        for result in results:
+            self.write(result)
+
+    def write_frame(self, results_df):
+        """Write a format_results DataFrame, one chunk of rows at a time."""
+        self.flush()
+        for start in range(0, len(results_df), self.chunk_rows):
+            self.write_columns(frame_columns(results_df.iloc[start:start + self.chunk_rows]))
+
+    def flush(self):
+        """Write out the buffered results."""
+        if self._pending:
+            columns = result_columns(self._pending)
+            self._pending = []
+            self.write_columns(columns)
+
+    def write_columns(self, columns):
+        """
+        Write one chunk given as columns (see result_columns).
+
+        Args:
+            columns (dict): Column name -> list of values
+        """
+        if self._columns is None:
+            self._open(_DUPLICATE_COLUMNS[0][0] in columns)
+        count = len(columns['Resume'])
+        if not count:
+            return
+        if self.output_format == 'csv':
+            values = [columns[name] if name != 'Matching Keywords'
+                      else [', '.join(keywords) for keywords in columns[name]]
+                      for name, _ in self._columns]
+            self._sink.writerows(zip(*values))
+        else:
+            import pyarrow as pa
+            batch = pa.record_batch([pa.array(columns[name], type=self._schema.field(name).type)
+                                     for name, _ in self._columns], schema=self._schema)
+            # One Parquet row group / Arrow record batch per chunk
+            self._sink.write_batch(batch)
+        self.rows_written += count
+
+    def _open(self, duplicates):
+        self._columns = _BASE_COLUMNS + (_DUPLICATE_COLUMNS if duplicates else ())
+        if self.output_format == 'csv':
+            if isinstance(self.destination, (str, os.PathLike)):
+                self._file = open(self.destination, 'w', encoding='utf-8', newline='')
+            else:
+                self._file = io.TextIOWrapper(self.destination, encoding='utf-8', newline='')
+            # Same line endings as DataFrame.to_csv
+            self._sink = csv.writer(self._file, lineterminator='\n')
+            self._sink.writerow([name for name, _ in self._columns])
+            return
+
+        import pyarrow as pa
+        types = {'float64': pa.float64(), 'int64': pa.int64(), 'string': pa.string(),
+                 'list': pa.list_(pa.string())}
+        self._schema = pa.schema([(name, types[kind]) for name, kind in self._columns])
+        if self.output_format == 'parquet':
+            import pyarrow.parquet as pq
+            self._sink = pq.ParquetWriter(self.destination, self._schema)
+        else:
+            self._sink = pa.ipc.new_file(self.destination, self._schema)
+
+    def close(self):
+        """Write any buffered results and finish the file."""
+        self.flush()
+        if self._columns is None:
+            # No results: still write the header / schema
+            self._open(False)
+        if self._sink is None:
+            return
+        if self.output_format == 'csv':
+            self._file.flush()
+            if isinstance(self._file, io.TextIOWrapper) and not isinstance(self.destination, (str, os.PathLike)):
+                # Hand the caller's buffer back open
+                self._file.detach()
+            else:
+                self._file.close()
+        else:
+            self._sink.close()
+        self._sink = None
+        logger.info("Exported %d results as %s", self.rows_written, self.output_format)
+
+def export_results(results, destination, output_format=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Write results to a file as they are produced.
+
+    Args:
+        results (iterable): Result dicts, e.g. from iter_resumes_parallel
+        destination (str or file): Output path or binary file object
+        output_format (str, optional): One of EXPORT_FORMATS (defaults to the
+            one matching the file extension)
+        chunk_rows (int): Results per written chunk
+
+    Returns:
+        int: Number of results written
+    """
+    if output_format is None:
+        output_format = export_format(destination if isinstance(destination, str) else '')
+    with ResultWriter(destination, output_format, chunk_rows) as writer:
+        writer.write_many(results)
+    return writer.rows_written
+
+def export_frame(results_df, output_format='csv', chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Export a format_results DataFrame to bytes (e.g. for a download button).
+
+    Args:
+        results_df (DataFrame): Output of format_results
+        output_format (str): One of EXPORT_FORMATS
+        chunk_rows (int): Rows per written chunk
+
+    Returns:
+        bytes: The exported file
+    """
+    buffer = io.BytesIO()
+    with ResultWriter(buffer, output_format, chunk_rows) as writer:
+        writer.write_frame(results_df)
+    return buffer.getvalue()
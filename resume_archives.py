@@ -0,0 +1,126 @@
+import os
+import tarfile
+import zipfile
+import logging
+
+from resource_limits import DEFAULT_LIMITS
+
+logger = logging.getLogger(__name__)
+
+# Archive file names recognized as bulk uploads (tar may be compressed)
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# Archive members that are screened; everything else is passed over
+MEMBER_TYPES = ('txt', 'pdf')
+
+def is_archive(name):
+    """
+    Args:
+        name (str): File name
+
+    Returns:
+        bool: Whether the name has one of ARCHIVE_EXTENSIONS
+    """
+    return name.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def _is_resume_member(member_name):
+    base = member_name.rsplit('/', 1)[-1]
+    # Skip macOS resource forks and other hidden files
+    if not base or base.startswith('.') or '__MACOSX/' in member_name:
+        return False
+    return base.rsplit('.', 1)[-1].lower() in MEMBER_TYPES
+
+def _read_member(member, limit):
+    # Declared sizes can lie, so never read more than one byte past the limit
+    content = member.read(limit + 1) if limit else member.read()
+    return None if limit and len(content) > limit else content
+
+def iter_archive(source, archive_name=None, max_member_mb=None):
+    """
+    Read the resumes in a ZIP or tar archive one member at a time.
+
+    Nothing is extracted to disk and only the current member is held in
+    memory. Tar archives (plain or compressed) are read as a forward-only
+    stream, so they can come from a pipe; ZIP archives need a seekable file
+    for their central directory. Members are yielded as they are read, so a
+    consumer can start parsing the first resumes while the rest of the
+    archive is still being decompressed. Members other than .txt/.pdf files,
+    and members larger than the limit, are skipped; a damaged archive is
+    logged and read up to the damage.
+
+    Args:
+        source (str or file): Archive path or binary file object
+        archive_name (str, optional): Name used to pick the format and to
+            prefix member names (defaults to the path)
+        max_member_mb (int, optional): Largest member to read, in megabytes
+            (defaults to DEFAULT_LIMITS['max_member_mb']; 0 for no limit)
+
+    Yields:
+        dict: 'name' ("<archive>/<member>") and 'content' (the member's raw
+            bytes), ready for utils.load_resume_text
+    """
+    archive_name = archive_name or os.fspath(source)
+    limit_mb = DEFAULT_LIMITS['max_member_mb'] if max_member_mb is None else max_member_mb
+    limit = limit_mb * 1024 * 1024
+    read = 0
+    try:
+        if archive_name.lower().endswith('.zip'):
+            with zipfile.ZipFile(source) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or not _is_resume_member(info.filename):
+                        continue
+                    name = f"{archive_name}/{info.filename}"
+                    if limit and info.file_size > limit:
+                        logger.warning("Skipping %s: %d MB exceeds the %d MB member limit", name,
+                                       info.file_size >> 20, limit_mb)
+                        continue
+                    try:
+                        with archive.open(info) as member:
+                            content = _read_member(member, limit)
+                    except (RuntimeError, NotImplementedError, zipfile.BadZipFile) as e:
+                        # Encrypted or unsupported compression, or a corrupt member
+                        logger.warning("Skipping %s: %s", name, e)
+                        continue
+                    if content is None:
+                        logger.warning("Skipping %s: exceeds the %d MB member limit", name, limit_mb)
+                        continue
+                    read += 1
+                    yield {'name': name, 'content': content}
+        else:
+            if isinstance(source, (str, os.PathLike)):
+                archive = tarfile.open(source, mode='r|*')
+            else:
+                archive = tarfile.open(fileobj=source, mode='r|*')
+            with archive:
+                for info in archive:
+                    if not info.isfile() or not _is_resume_member(info.name):
+                        continue
+                    name = f"{archive_name}/{info.name}"
+                    if limit and info.size > limit:
+                        logger.warning("Skipping %s: %d MB exceeds the %d MB member limit", name,
+                                       info.size >> 20, limit_mb)
+                        continue
+                    content = archive.extractfile(info).read()
+                    read += 1
+                    yield {'name': name, 'content': content}
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as e:
+        logger.warning("Stopped reading %s after %d resumes: %s", archive_name, read, e)
+        return
+    logger.info("Read %d resumes from %s", read, archive_name)
+
+def iter_resume_inputs(paths):
+    """
+    Turn resume and archive paths into resume dicts, streaming archive members.
+
+    Args:
+        paths (iterable): .txt/.pdf files and archives
+
+    Yields:
+        dict: {'path', 'name'} for a file, or an archive member from
+            iter_archive
+    """
+    for path in paths:
+        if is_archive(path):
+            yield from iter_archive(path)
+        else:
+            yield {'path': path, 'name': path}
@@ -0,0 +1,266 @@
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pdfminer
+from utils import EXTRACTOR_VERSION
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'RESUME_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'resume_screener', 'text')
+)
+DEFAULT_MEMORY_LIMIT = 64 * 1024 * 1024   # 64 MB of parsed text in memory
+DEFAULT_DISK_LIMIT = 1024 * 1024 * 1024   # 1 GB of parsed text on disk
+
+def extractor_fingerprint():
+    """
+    Identify the text extractor whose output is being cached.
+
+    Returns:
+        str: Version tag combining our parser version and pdfminer's
+    """
+    return f"v{EXTRACTOR_VERSION}-pdfminer{pdfminer.__version__}"
+
+def content_key(file_content, file_type, max_pages=0):
+    """
+    Compute the cache key for a raw resume file.
+
+    Args:
+        file_content (bytes): Raw bytes of the uploaded file
+        file_type (str): 'txt' or 'pdf'
+        max_pages (int): PDF page cap the text is extracted under (0 for
+            all pages); a truncated text gets a key of its own
+
+    Returns:
+        str: Hex digest of the file type and contents
+    """
+    digest = hashlib.sha256(file_type.encode('ascii'))
+    if max_pages and file_type == 'pdf':
+        digest.update(b'\0pages=%d' % max_pages)
+    digest.update(b'\0')
+    digest.update(file_content)
+    return digest.hexdigest()
+
+class ResumeTextCache:
+    """
+    Content-addressed cache of parsed resume text.
+
+    Texts are keyed by a hash of the raw file bytes, so the same resume is
+    only run through pdfminer once no matter how many job descriptions it is
+    screened against. A size-bounded in-memory LRU sits in front of a
+    size-bounded on-disk store; both evict least recently used entries first.
+    The disk store is namespaced by the extractor version, and entries written
+    by other extractor versions are removed when the cache is opened.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, memory_limit=DEFAULT_MEMORY_LIMIT,
+                 disk_limit=DEFAULT_DISK_LIMIT, version=None):
+        self.version = version or extractor_fingerprint()
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.cache_dir = os.path.join(cache_dir, self.version) if cache_dir else None
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.cache_dir:
+            self._open_disk_store(cache_dir)
+
+    def _open_disk_store(self, cache_root):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Invalidate everything written by other extractor versions
+        for entry in os.scandir(cache_root):
+            if entry.is_dir() and entry.name != self.version and '-pdfminer' in entry.name:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        # Rebuild the LRU order from file modification times
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.txt'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.txt')
+
+    def _remember(self, key, text):
+        size = sys.getsizeof(text)
+        if size > self.memory_limit:
+            return
+        if key in self._memory:
+            self._memory_bytes -= sys.getsizeof(self._memory.pop(key))
+        self._memory[key] = text
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= sys.getsizeof(evicted)
+            self.evictions += 1
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_limit and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.evictions += 1
+            try:
+                os.unlink(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, file_content, file_type):
+        """
+        Look up the parsed text of a file.
+
+        Args:
+            file_content (bytes): Raw bytes of the uploaded file
+            file_type (str): 'txt' or 'pdf'
+
+        Returns:
+            str or None: Cached text, or None on a miss
+        """
+        return self.lookup(content_key(file_content, file_type))
+
+    def lookup(self, key):
+        """
+        Look up parsed text by content key.
+
+        Args:
+            key (str): content_key() of the file
+
+        Returns:
+            str or None: Cached text, or None on a miss
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+            if key in self._disk:
+                try:
+                    with open(self._path(key), 'r', encoding='utf-8', errors='surrogatepass') as f:
+                        text = f.read()
+                except FileNotFoundError:
+                    self._disk_bytes -= self._disk.pop(key)
+                else:
+                    self._disk.move_to_end(key)
+                    os.utime(self._path(key))
+                    self._remember(key, text)
+                    self.disk_hits += 1
+                    return text
+            self.misses += 1
+            return None
+
+    def put(self, file_content, file_type, text):
+        """
+        Store the parsed text of a file.
+
+        Args:
+            file_content (bytes): Raw bytes of the uploaded file
+            file_type (str): 'txt' or 'pdf'
+            text (str): Text extracted from the file
+        """
+        self.store(content_key(file_content, file_type), text)
+
+    def store(self, key, text):
+        """
+        Store parsed text by content key.
+
+        Args:
+            key (str): content_key() of the file
+            text (str): Text extracted from the file
+        """
+        with self._lock:
+            self._remember(key, text)
+            if not self.cache_dir or key in self._disk:
+                return
+            data = text.encode('utf-8', errors='surrogatepass')
+            if len(data) > self.disk_limit:
+                return
+            # Write atomically so concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            self._evict_disk()
+
+    def get_or_parse(self, file_content, file_type, parse):
+        """
+        Return cached text for a file, parsing and storing it on a miss.
+
+        Args:
+            file_content (bytes): Raw bytes of the uploaded file
+            file_type (str): 'txt' or 'pdf'
+            parse (callable): Called with no arguments to extract the text on a miss
+
+        Returns:
+            str: Text of the resume
+        """
+        text = self.get(file_content, file_type)
+        if text is None:
+            text = parse()
+            self.put(file_content, file_type, text)
+        return text
+
+    def clear(self):
+        """Drop every cached entry, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for key in self._disk:
+                try:
+                    os.unlink(self._path(key))
+                except FileNotFoundError:
+                    pass
+            self._disk.clear()
+            self._disk_bytes = 0
+
+    def stats(self):
+        """
+        Report cache counters.
+
+        Returns:
+            dict: Hit/miss/eviction counters and current sizes
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'version': self.version,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+            }
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """
+    Return the process-wide resume text cache, creating it on first use.
+
+    Returns:
+        ResumeTextCache: The shared cache
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResumeTextCache()
+        return _default_cache
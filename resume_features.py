@@ -0,0 +1,208 @@
+import re
+import calendar
+import threading
+from datetime import date, datetime, timedelta
+
+# Education levels, highest first, so the first level that matches is the best one
+EDUCATION_LEVELS = (
+    (r'ph\.?d\.?|doctor(?:ate|al)|d\.?phil\.?', 1.0),
+    (r'master|m\.?s\.?|m\.?b\.?a\.?|m\.?eng\.?|m\.?sc\.?|m\.?c\.?a\.?|post.?graduate|graduate degree', 0.8),
+    (r'bachelor|b\.?s\.?|b\.?a\.?|b\.?eng\.?|b\.?sc\.?|b\.?tech\.?|b\.?c\.?a\.?|college degree|undergraduate|university degree', 0.6),
+    (r'associate|a\.?s\.?|a\.?a\.?|a\.?a\.?s\.?|community college|technical college', 0.4),
+    (r'high school|diploma|ged|secondary school|higher secondary|12th|hsc', 0.2),
+)
+
+EDUCATION_SECTIONS = (
+    "education", "academic background", "academic qualification",
+    "qualification", "academic history", "academic profile"
+)
+
+# Score given to substantial resumes that mention no recognizable education level
+DEFAULT_EDUCATION_SCORE = 0.6
+SUBSTANTIAL_RESUME_LENGTH = 500
+
+_MONTHS = {
+    'jan': 1, 'january': 1, 'feb': 2, 'february': 2, 'mar': 3, 'march': 3,
+    'apr': 4, 'april': 4, 'may': 5, 'jun': 6, 'june': 6, 'jul': 7, 'july': 7,
+    'aug': 8, 'august': 8, 'sep': 9, 'sept': 9, 'september': 9,
+    'oct': 10, 'october': 10, 'nov': 11, 'november': 11, 'dec': 12, 'december': 12,
+}
+_WEEKDAYS = {
+    'mon': 0, 'monday': 0, 'tue': 1, 'tuesday': 1, 'wed': 2, 'wednesday': 2,
+    'thu': 3, 'thursday': 3, 'fri': 4, 'friday': 4, 'sat': 5, 'saturday': 5,
+    'sun': 6, 'sunday': 6,
+}
+
+def _parse_with_dateutil(value, today):
+    from dateutil import parser
+    try:
+        return parser.parse(value, default=datetime(today.year, today.month, today.day)).date()
+    except (ValueError, OverflowError):
+        return None
+
+def parse_month_year(value, today):
+    """
+    Parse a lowercased "<word> <yyyy>" string the way dateutil.parser.parse does.
+
+    dateutil fills the missing day (and, for non-month words, the month) from
+    today's date, clamps the day to the length of the month, moves weekday
+    names forward to the next such weekday and skips the filler word "and".
+    Anything else is rejected. Reproducing those rules keeps experience
+    scores identical without paying for the general-purpose parser.
+
+    Args:
+        value (str): Matched text such as "jan 2019" or "september 2020"
+        today (date): Date used to fill in the missing fields
+
+    Returns:
+        date or None: Parsed date, or None if dateutil would raise
+    """
+    word, year = value.split()
+    if year[0] == '0':
+        # dateutil reads zero-padded numbers as days or two-digit years; leave
+        # those rare cases to dateutil itself
+        return _parse_with_dateutil(value, today)
+    year = int(year)
+    month = _MONTHS.get(word)
+    weekday = None
+    if month is None:
+        weekday = _WEEKDAYS.get(word)
+        if weekday is None and word != 'and':
+            return None
+        month = today.month
+    try:
+        day = min(today.day, calendar.monthrange(year, month)[1])
+        parsed = date(year, month, day)
+    except (ValueError, calendar.IllegalMonthError):
+        return None
+    if weekday is not None:
+        try:
+            parsed += timedelta(days=(weekday - parsed.weekday()) % 7)
+        except OverflowError:
+            return None
+    return parsed
+
+class ResumeFeatureExtractor:
+    """
+    Extracts the job-independent features of a resume: years of experience,
+    education score and whether the resume has an education section.
+
+    All patterns are compiled once when the extractor is built, the text is
+    lowercased once per resume, and education levels are tried highest first
+    so the scan stops at the first level found. Month-year ranges are parsed
+    with parse_month_year instead of dateutil.
+    """
+
+    def __init__(self):
+        # "<n> years of experience". The "experience of <n> years" form never
+        # yields a number this pattern misses, so it does not need a scan of its own.
+        self._years_pattern = re.compile(
+            r'(\d{1,2})\+?\s*(?:years?|yrs?)(?:\s+of\s+)?(?:experience|exp)?'
+        )
+        self._year_range_pattern = re.compile(r'(\b\d{4}\b)[\s–\-to]{1,5}(\b\d{4}\b)')
+        self._month_range_pattern = re.compile(
+            r'([a-zA-Z]{3,9}\s\d{4})\s*(?:to|–|-)\s*([a-zA-Z]{3,9}\s\d{4})'
+        )
+        self._section_pattern = re.compile(
+            r'^\s*(?:' + '|'.join(EDUCATION_SECTIONS) + r')[:\s]*$', re.MULTILINE
+        )
+        self._education_patterns = [
+            (re.compile(pattern), score) for pattern, score in EDUCATION_LEVELS
+        ]
+
+    def years_experience(self, lowered, today=None):
+        """
+        Detect years of experience in lowercased resume text.
+
+        Args:
+            lowered (str): Lowercased resume text
+            today (date, optional): Reference date (defaults to today)
+
+        Returns:
+            int: Largest number of years found, 0 if none
+        """
+        today = today or date.today()
+        max_years = 0
+        for match in self._years_pattern.findall(lowered):
+            max_years = max(max_years, int(match))
+        for start, end in self._year_range_pattern.findall(lowered):
+            start, end = int(start), int(end)
+            if 1980 < start < end <= today.year:
+                max_years = max(max_years, end - start)
+        for start_str, end_str in self._month_range_pattern.findall(lowered):
+            start = parse_month_year(start_str, today)
+            end = parse_month_year(end_str, today)
+            if start is None or end is None:
+                continue
+            diff_years = (end - start).days / 365.0
+            if 0 < diff_years < 50:
+                max_years = max(max_years, round(diff_years))
+        return int(max_years)
+
+    def education_level(self, lowered):
+        """
+        Detect the highest education level in lowercased resume text.
+
+        Args:
+            lowered (str): Lowercased resume text
+
+        Returns:
+            float: Score of the highest level found, 0.0 if none
+        """
+        for pattern, score in self._education_patterns:
+            if pattern.search(lowered):
+                return score
+        return 0.0
+
+    def has_education_section(self, lowered):
+        """
+        Check whether lowercased resume text has an education section header.
+
+        Args:
+            lowered (str): Lowercased resume text
+
+        Returns:
+            bool: True if a header such as "Education:" is on a line of its own
+        """
+        return self._section_pattern.search(lowered) is not None
+
+    def extract(self, text):
+        """
+        Extract all job-independent features of a resume.
+
+        Args:
+            text (str): Resume text
+
+        Returns:
+            dict: 'years_experience' (int, as detected), 'education_score'
+                (float, with the default for substantial resumes applied) and
+                'has_education_section' (bool)
+        """
+        if not text:
+            return {'years_experience': 0, 'education_score': 0.0, 'has_education_section': False}
+        lowered = text.lower()
+        education_score = self.education_level(lowered)
+        if education_score == 0.0 and len(text) > SUBSTANTIAL_RESUME_LENGTH:
+            education_score = DEFAULT_EDUCATION_SCORE
+        return {
+            'years_experience': self.years_experience(lowered),
+            'education_score': education_score,
+            'has_education_section': self.has_education_section(lowered),
+        }
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+def get_feature_extractor():
+    """
+    Return this process's feature extractor, compiling it on first use.
+
+    Returns:
+        ResumeFeatureExtractor: The shared extractor
+    """
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = ResumeFeatureExtractor()
+    return _extractor
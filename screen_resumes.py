@@ -0,0 +1,321 @@
+import os
+import csv
+import sys
+import glob
+import json
+import time
+import signal
+import logging
+import argparse
+
+from utils import extract_job_terms
+from result_export import EXPORT_FORMATS, ResultWriter, export_format
+from resource_limits import configure_limits
+from resume_archives import ARCHIVE_EXTENSIONS, iter_resume_inputs
+from parallel_resume_screener import iter_resumes_parallel, job_version
+
+logger = logging.getLogger(__name__)
+
+# Exit codes, so cron and wrappers can tell outcomes apart
+EXIT_OK = 0
+EXIT_FAILURE = 1           # Unexpected error; the checkpoint is kept
+EXIT_USAGE = 2             # Bad arguments (argparse uses 2 as well)
+EXIT_NO_INPUT = 3          # No resumes matched the inputs
+EXIT_CHECKPOINT_MISMATCH = 4  # Checkpoint belongs to another job description
+EXIT_INTERRUPTED = 130     # SIGINT/SIGTERM; rerun to resume from the checkpoint
+
+RESUME_EXTENSIONS = ('.txt', '.pdf')
+
+# Columns of the checkpoint spool; scores are written with repr() so they
+# read back bit for bit
+SPOOL_COLUMNS = ('file_name', 'final_score', 'keyword_match_ratio', 'matching_keywords',
+                 'years_experience', 'experience_score', 'education_score', 'skipped')
+
+def find_resumes(inputs):
+    """
+    Expand directories (recursively) and glob patterns into resume paths.
+
+    Args:
+        inputs (list): Directories, files or glob patterns
+
+    Returns:
+        list: Sorted, de-duplicated .txt/.pdf and archive (see
+            resume_archives.ARCHIVE_EXTENSIONS) paths
+    """
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.update(os.path.join(root, name) for name in files
+                             if name.lower().endswith(RESUME_EXTENSIONS + ARCHIVE_EXTENSIONS))
+        else:
+            paths.update(path for path in glob.glob(item, recursive=True)
+                         if os.path.isfile(path) and path.lower().endswith(RESUME_EXTENSIONS + ARCHIVE_EXTENSIONS))
+    return sorted(paths)
+
+class Checkpoint:
+    """
+    Crash-safe record of the resumes scored so far.
+
+    Results are appended to a CSV spool next to the output and flushed to disk
+    in batches; a small JSON file records which job description they belong
+    to. After a crash the spool is read back (dropping a torn last line) and
+    those files are skipped.
+    """
+
+    def __init__(self, output_path):
+        self.spool_path = output_path + '.partial.csv'
+        self.meta_path = output_path + '.checkpoint.json'
+        self._file = None
+        self._writer = None
+
+    def exists(self):
+        return os.path.exists(self.meta_path)
+
+    def job_version(self):
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['job_version']
+
+    def start(self, version):
+        """Begin a fresh checkpoint for a job, discarding any previous one."""
+        self.discard()
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'job_version': version, 'started': time.strftime('%Y-%m-%dT%H:%M:%S%z')}, f)
+        self._open()
+
+    def load(self):
+        """
+        Read back the results of an interrupted run.
+
+        Returns:
+            list: Result dicts in the shape format_results expects
+        """
+        if not os.path.exists(self.spool_path):
+            self._open()
+            return []
+        # A crash can leave a partially written last row behind
+        with open(self.spool_path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+        results = []
+        with open(self.spool_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                result = {
+                    'final_score': float(row['final_score']),
+                    'keyword_match_ratio': float(row['keyword_match_ratio']),
+                    'matching_keywords': _load_keywords(row['matching_keywords']),
+                    'years_experience': int(row['years_experience']),
+                    'experience_score': float(row['experience_score']),
+                    'education_score': float(row['education_score']),
+                    'file_name': row['file_name'],
+                }
+                # Spools written before skipped rows existed have no such column
+                if row.get('skipped'):
+                    result['skipped'] = row['skipped']
+                results.append(result)
+        self._open()
+        return results
+
+    def _open(self):
+        new = not os.path.exists(self.spool_path) or os.path.getsize(self.spool_path) == 0
+        self._file = open(self.spool_path, 'a', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        if new:
+            self._writer.writerow(SPOOL_COLUMNS)
+
+    def append(self, results):
+        """Append scored results and make them durable."""
+        for result in results:
+            self._writer.writerow((
+                result['file_name'], repr(result['final_score']), repr(result['keyword_match_ratio']),
+                # Phrase terms contain spaces, so the list is stored as JSON
+                json.dumps(sorted(result['matching_keywords'])),
+                result['years_experience'], repr(result['experience_score']),
+                repr(result['education_score']), result.get('skipped', ''),
+            ))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        self.close()
+        for path in (self.spool_path, self.meta_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+def _load_keywords(value):
+    # Spools written before phrase matching existed hold space-separated keywords
+    if value.startswith('['):
+        return json.loads(value)
+    return value.split()
+
+def write_results(results, output_path, output_format, top=None):
+    """
+    Write the ranked results atomically.
+
+    Results are ranked in place and streamed to the file in chunks, so no
+    DataFrame or CSV string of the whole run is built.
+
+    Args:
+        results (list): Result dicts (sorted in place by final score)
+        output_path (str): Destination file
+        output_format (str): One of result_export.EXPORT_FORMATS
+        top (int, optional): Only write the best N resumes
+
+    Returns:
+        int: Number of results written
+    """
+    results.sort(key=lambda result: result['final_score'], reverse=True)
+    tmp_path = output_path + '.tmp'
+    with ResultWriter(tmp_path, output_format) as writer:
+        writer.write_many(results[:top] if top else results)
+    os.replace(tmp_path, output_path)
+    return writer.rows_written
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def screen_directory(job_description, paths, output_path, output_format='csv', processes=None,
+                     chunksize=None, flush_every=500, top=None, restart=False, phrase_matching=False):
+    """
+    Score resume files with the parallel engine and write ranked results.
+
+    Results are checkpointed as they arrive, so rerunning after a crash or
+    interruption only scores the files that are not done yet.
+
+    Args:
+        job_description (str): Job description text
+        paths (list): Resume file and archive paths; archive members are
+            streamed to the workers without being extracted
+        output_path (str): Where to write the ranked results
+        output_format (str): 'csv', 'parquet' or 'arrow'
+        processes (int, optional): Number of workers (defaults to the usable CPUs)
+        chunksize (int, optional): Tasks sent to a worker at a time
+        flush_every (int): Results per checkpoint write
+        top (int, optional): Only write the best N resumes
+        restart (bool): Ignore an existing checkpoint
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+
+    Returns:
+        int: Exit code
+    """
+    version = job_version(extract_job_terms(job_description, phrase_matching))
+    checkpoint = Checkpoint(output_path)
+    results = []
+    if checkpoint.exists() and not restart:
+        if checkpoint.job_version() != version:
+            logger.error("Checkpoint %s was written for a different job description; "
+                         "use --restart to discard it", checkpoint.meta_path)
+            return EXIT_CHECKPOINT_MISMATCH
+        results = checkpoint.load()
+        logger.info("Resuming from checkpoint: %d resumes already scored", len(results))
+    else:
+        checkpoint.start(version)
+
+    done = {result['file_name'] for result in results}
+    # Archives are read lazily by the pool's task feeder, so members are parsed while
+    # later ones are still being decompressed, with a bounded number in flight
+    pending = (resume for resume in iter_resume_inputs(paths) if resume['name'] not in done)
+    logger.info("Scoring resumes from %d inputs (%d resumes already done)", len(paths), len(done))
+
+    start_time = time.time()
+    batch = []
+    scored = 0
+    stream = iter_resumes_parallel(job_description, pending, processes, chunksize,
+                                   phrase_matching=phrase_matching)
+    try:
+        for result in stream:
+            batch.append(result)
+            if len(batch) >= flush_every:
+                checkpoint.append(batch)
+                results.extend(batch)
+                scored += len(batch)
+                batch = []
+                elapsed = time.time() - start_time
+                logger.info("Scored %d resumes (%.1f resumes/s)", scored,
+                            scored / elapsed if elapsed > 0 else 0.0)
+    finally:
+        stream.close()
+        # Keep whatever finished before an error or interruption
+        if batch:
+            checkpoint.append(batch)
+            results.extend(batch)
+        checkpoint.close()
+
+    skipped = sum(1 for result in results if result.get('skipped'))
+    if skipped:
+        logger.warning("%d resumes were skipped for exceeding the per-file limits", skipped)
+    written = write_results(results, output_path, output_format, top)
+    checkpoint.discard()
+    logger.info("Wrote %d ranked resumes to %s in %.1f seconds", written, output_path,
+                time.time() - start_time)
+    return EXIT_OK
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Screen a directory of resumes against a job description without the UI.")
+    parser.add_argument('job', help="Job description .txt file")
+    parser.add_argument('inputs', nargs='+',
+                        help="Resume directories, files, ZIP/tar archives or glob patterns")
+    parser.add_argument('-o', '--output', required=True,
+                        help="Ranked results file (.csv, .parquet or .arrow/.feather)")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default=None,
+                        help="Output format (default: from the output file extension)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: usable CPUs, honoring affinity and cgroup quota)")
+    parser.add_argument('--chunksize', type=int, default=None, help="Resumes sent to a worker at a time")
+    parser.add_argument('--flush-every', type=int, default=500, help="Results per checkpoint write")
+    parser.add_argument('--top', type=int, default=None, help="Only write the best N resumes")
+    parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint")
+    parser.add_argument('--phrases', action='store_true',
+                        help='Match multi-word skills ("machine learning", "Node.js") as single keywords')
+    parser.add_argument('--file-timeout', type=float, default=None,
+                        help="Seconds to parse and score one file before it is skipped (0: no limit)")
+    parser.add_argument('--file-memory-mb', type=int, default=None,
+                        help="Memory one file may use before it is skipped (0: no limit)")
+    parser.add_argument('--max-pages', type=int, default=None, help="Only extract this many PDF pages")
+    parser.add_argument('--max-member-mb', type=int, default=None,
+                        help="Skip archive members larger than this (0: no limit)")
+    parser.add_argument('--worker-max-tasks', type=int, default=None,
+                        help="Replace a worker after this many tasks (0: never)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log progress")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stderr, format='%(asctime)s %(levelname)s %(message)s')
+    logger.setLevel(logging.INFO if args.verbose else logging.WARNING)
+    configure_limits(file_timeout=args.file_timeout, file_memory_mb=args.file_memory_mb,
+                     max_pages=args.max_pages, max_member_mb=args.max_member_mb,
+                     worker_max_tasks=args.worker_max_tasks)
+    output_format = args.format or export_format(args.output)
+
+    try:
+        with open(args.job, 'r', encoding='utf-8') as f:
+            job_description = f.read()
+    except OSError as e:
+        logger.error("Cannot read job description: %s", e)
+        return EXIT_USAGE
+
+    paths = find_resumes(args.inputs)
+    if not paths:
+        logger.error("No .txt or .pdf resumes or archives found in %s", ', '.join(args.inputs))
+        return EXIT_NO_INPUT
+
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        return screen_directory(job_description, paths, args.output, output_format, args.workers,
+                                args.chunksize, args.flush_every, args.top, args.restart, args.phrases)
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; rerun the same command to resume from the checkpoint")
+        return EXIT_INTERRUPTED
+    except Exception:
+        logger.exception("Screening failed; rerun the same command to resume from the checkpoint")
+        return EXIT_FAILURE
+
+if __name__ == '__main__':
+    sys.exit(main())
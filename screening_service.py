@@ -0,0 +1,822 @@
+import os
+import sys
+import hmac
+import json
+import time
+import queue
+import base64
+import socket
+import signal
+import hashlib
+import logging
+import ipaddress
+import argparse
+import threading
+import http.client
+import socketserver
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import DEFAULT_WEIGHTS, extract_job_terms, format_results
+from parallel_resume_screener import available_cpus, get_pool, job_version, warm_workers
+from pipeline_executor import ScreeningPipeline
+
+logger = logging.getLogger(__name__)
+
+# Where clients find the service: "host:port", or "unix:/path/to.sock" for a Unix socket.
+# The app offers its "Screening service" mode when this variable is set.
+SERVICE_ENV = 'RESUME_SCREENER_SERVICE'
+DEFAULT_ADDRESS = '127.0.0.1:7651'
+
+# Requests for the same job arriving within this many seconds of the first one
+# are scored in the same batch
+DEFAULT_BATCH_WINDOW = 0.02
+
+# Upper bound on one request body
+MAX_REQUEST_BYTES = 256 * 1024 * 1024
+
+# Compiled job matchers kept for repeated job descriptions
+JOB_CACHE_SIZE = 64
+
+# Recent requests and batches that latency percentiles are computed over
+LATENCY_WINDOW = 1000
+
+def service_address():
+    """
+    Returns:
+        str or None: Address of the screening service clients should use, if
+            one is configured through RESUME_SCREENER_SERVICE
+    """
+    return os.environ.get(SERVICE_ENV) or None
+
+def _default_token():
+    return os.environ.get('RESUME_SCREENER_TOKEN', '')
+
+def _unix_path(address):
+    # "unix:/run/screener.sock" or a bare path selects a Unix socket
+    if address.startswith('unix:'):
+        return address[len('unix:'):]
+    if address.startswith(('/', './')):
+        return address
+    return None
+
+def _host_port(address):
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def _is_loopback(host):
+    try:
+        return all(ipaddress.ip_address(info[4][0]).is_loopback for info in socket.getaddrinfo(host, None))
+    except (OSError, ValueError):
+        return False
+
+class ServiceError(RuntimeError):
+    """The screening service rejected a request or failed to score it."""
+
+class _Request:
+    __slots__ = ('job_description', 'job_keywords', 'resumes', 'corpus', 'top', 'weights', 'key',
+                 'submitted', 'started', 'done', 'response', 'error')
+
+    def __init__(self):
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+class _Batch:
+    def __init__(self, key):
+        self.key = key
+        self.created = time.perf_counter()
+        self.requests = []
+
+def _percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+
+    def rank(fraction):
+        return values[min(int(fraction * len(values)), len(values) - 1)]
+
+    return {'count': len(values), 'p50': rank(0.5), 'p95': rank(0.95), 'p99': rank(0.99), 'max': values[-1]}
+
+def _plain_result(result, name):
+    # JSON-friendly copy of a scoring result
+    plain = {
+        'file_name': name,
+        'final_score': float(result['final_score']),
+        'keyword_match_ratio': float(result['keyword_match_ratio']),
+        'matching_keywords': sorted(result['matching_keywords']),
+        'years_experience': int(result['years_experience']),
+        'experience_score': float(result['experience_score']),
+        'education_score': float(result['education_score']),
+    }
+    if result.get('skipped'):
+        plain['skipped'] = result['skipped']
+    return plain
+
+def _top(results, k):
+    # Best first; ties go to the resume that came first, as in TopKRanker
+    order = sorted(range(len(results)), key=lambda index: (-results[index]['final_score'], index))
+    return [results[index] for index in order[:k]]
+
+class ScreeningService:
+    """
+    Long-running screening engine shared by every client of the service.
+
+    It holds the warm worker pool, an LRU of compiled job matchers and the
+    parsed-text cache, so a request pays none of the start-up costs of a
+    fresh script run. Requests are grouped into batches by job (its
+    extracted terms), source (uploaded resumes or a corpus file) and weights.
+    A request that arrives while a matching batch is still waiting joins it.
+    Each distinct resume in the batch is scored once, and every request gets
+    its own results back. Batches wait at most batch_window seconds to
+    collect requests, then run one at a time on a single dispatcher thread.
+    They all share one pool, whose task handler feeds its workers one map at
+    a time, so a second dispatcher would only queue behind the first; the
+    service gets its concurrency from coalescing requests instead.
+
+    Requests may name files ('path' resumes and corpus files) for the
+    service to open. With path_root set, those must lie under it.
+    make_server turns paths off for a TCP service without a path_root.
+    """
+
+    def __init__(self, processes=None, batch_window=DEFAULT_BATCH_WINDOW, text_cache=None, path_root=None):
+        """
+        Args:
+            processes (int, optional): Most workers of the shared pool a batch
+                uses (defaults to available_cpus())
+            batch_window (float): Seconds a new batch waits for more requests
+            text_cache (ResumeTextCache, optional): Parsed-text cache
+                (defaults to resume_cache.get_default_cache())
+            path_root (str, optional): Only open files requests name under
+                this directory
+        """
+        if text_cache is None:
+            from resume_cache import get_default_cache
+            text_cache = get_default_cache()
+        self.processes = processes or available_cpus()
+        self.batch_window = batch_window
+        self.text_cache = text_cache
+        self.path_root = os.path.realpath(path_root) if path_root else None
+        self.accept_paths = True
+        self.started = time.time()
+        self.counters = {
+            'requests': 0,
+            'coalesced': 0,        # Requests that joined a batch opened by another request
+            'batches': 0,
+            'errors': 0,
+            'resumes_scored': 0,
+            'resumes_shared': 0,   # Resumes sent by several requests of a batch, scored once
+        }
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._job_hits = 0
+        self._job_misses = 0
+        self._open = {}
+        self._running = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._queue_waits = deque(maxlen=LATENCY_WINDOW)
+        self._batch_times = deque(maxlen=LATENCY_WINDOW)
+        self._batches = queue.Queue()
+        self._dispatcher = threading.Thread(target=self._dispatch, name='screening-dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    def warm_up(self):
+        """Start the pool workers before the first request."""
+        get_pool().set_job(frozenset())
+
+    def job_terms(self, job_description, phrase_matching=False):
+        """
+        Return the compiled job terms, reusing them for a repeated job.
+
+        Args:
+            job_description (str): Job description text
+            phrase_matching (bool): Match multi-word skills as single keywords
+
+        Returns:
+            set or JobMatcher: Job keywords (see utils.extract_job_terms)
+        """
+        key = (job_description, bool(phrase_matching))
+        with self._lock:
+            if key in self._jobs:
+                self._jobs.move_to_end(key)
+                self._job_hits += 1
+                return self._jobs[key]
+        terms = extract_job_terms(job_description, phrase_matching)
+        with self._lock:
+            self._job_misses += 1
+            self._jobs[key] = terms
+            while len(self._jobs) > JOB_CACHE_SIZE:
+                self._jobs.popitem(last=False)
+        return terms
+
+    def _parse(self, payload):
+        if not isinstance(payload, dict):
+            raise ValueError("The request body must be a JSON object")
+        request = _Request()
+        request.job_description = payload.get('job_description')
+        if not isinstance(request.job_description, str) or not request.job_description.strip():
+            raise ValueError("'job_description' is required")
+        resumes, corpus = payload.get('resumes'), payload.get('corpus')
+        if (resumes is None) == (corpus is None):
+            raise ValueError("Send exactly one of 'resumes' and 'corpus'")
+        top = payload.get('top')
+        if top is not None and (not isinstance(top, int) or top < 1):
+            raise ValueError("'top' must be a positive integer")
+        phrase_matching = bool(payload.get('phrase_matching', False))
+        weights = payload.get('weights')
+
+        if corpus is not None:
+            if phrase_matching:
+                raise ValueError("Phrase matching is not available for corpus files")
+            if not isinstance(corpus, str):
+                raise ValueError("'corpus' must be a path")
+            if weights is not None and (
+                    not isinstance(weights, dict) or set(weights) != set(DEFAULT_WEIGHTS) or
+                    not all(isinstance(value, (int, float)) and not isinstance(value, bool)
+                            for value in weights.values())):
+                raise ValueError(f"'weights' must give a number for each of {', '.join(DEFAULT_WEIGHTS)}")
+            request.corpus = self._resolve_path(corpus)
+            if not os.path.isfile(request.corpus):
+                raise ValueError(f"Corpus file {corpus!r} not found")
+            request.resumes = None
+        else:
+            if weights is not None:
+                raise ValueError("'weights' are only supported for corpus files")
+            if not isinstance(resumes, list):
+                raise ValueError("'resumes' must be a list")
+            request.corpus = None
+            request.resumes = [self._parse_resume(resume) for resume in resumes]
+        request.top = top
+        request.weights = weights
+        request.job_keywords = self.job_terms(request.job_description, phrase_matching)
+        request.key = ('corpus' if corpus is not None else 'resumes', job_version(request.job_keywords),
+                       request.corpus, tuple(sorted(weights.items())) if weights else None)
+        return request
+
+    def _parse_resume(self, resume):
+        if not isinstance(resume, dict) or not isinstance(resume.get('name'), str):
+            raise ValueError("Every resume needs a 'name'")
+        if isinstance(resume.get('text'), str):
+            return {'name': resume['name'], 'text': resume['text']}
+        if isinstance(resume.get('content'), str):
+            # Batches rename resumes, so the type cannot come from the name later
+            file_type = resume.get('type') or resume['name'].rsplit('.', 1)[-1].lower()
+            return {'name': resume['name'], 'content': base64.b64decode(resume['content']), 'type': file_type}
+        if isinstance(resume.get('path'), str):
+            return {'name': resume['name'], 'path': self._resolve_path(resume['path'])}
+        raise ValueError(f"Resume {resume['name']!r} needs 'text', 'content' (base64) or 'path'")
+
+    def _resolve_path(self, path):
+        if not self.accept_paths:
+            raise ValueError("This service does not open files by path; send 'text' or 'content'")
+        resolved = os.path.realpath(path)
+        if self.path_root is not None and os.path.commonpath([resolved, self.path_root]) != self.path_root:
+            raise ValueError(f"{path!r} is outside the directory this service reads files from")
+        return resolved
+
+    def submit(self, payload):
+        """
+        Screen one request, batched with concurrent requests for the same job.
+
+        Args:
+            payload (dict): 'job_description' and either 'resumes' (dicts
+                with 'name' and 'text', base64 'content' (with an optional
+                'type') or a 'path' the service can read) or 'corpus' (path
+                of a tokenized_corpus file); optional 'top', 'phrase_matching'
+                and, for corpora, 'weights'
+
+        Returns:
+            dict: 'results' (result dicts, in request order or best first
+                with 'top'), 'batch_size' (requests scored together),
+                'queue_seconds' and 'seconds' (total latency)
+        """
+        request = self._parse(payload)
+        with self._lock:
+            self.counters['requests'] += 1
+            batch = self._open.get(request.key)
+            if batch is None:
+                batch = self._open[request.key] = _Batch(request.key)
+                self._batches.put(batch)
+            else:
+                self.counters['coalesced'] += 1
+            batch.requests.append(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.response
+
+    def _dispatch(self):
+        while True:
+            batch = self._batches.get()
+            if batch is None:
+                return
+            delay = batch.created + self.batch_window - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            with self._lock:
+                # Later requests for this job start a new batch
+                del self._open[batch.key]
+                self._running += 1
+                self.counters['batches'] += 1
+            started = time.perf_counter()
+            for request in batch.requests:
+                request.started = started
+            try:
+                outputs = self._run(batch)
+                error = None
+            except Exception as e:
+                logger.exception("Batch of %d requests failed", len(batch.requests))
+                outputs, error = None, e
+            finished = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                self._batch_times.append(finished - started)
+                for index, request in enumerate(batch.requests):
+                    self._latencies.append(finished - request.submitted)
+                    self._queue_waits.append(started - request.submitted)
+                    if error is not None:
+                        self.counters['errors'] += 1
+                        request.error = error if isinstance(error, ValueError) else ServiceError(str(error))
+                    else:
+                        request.response = {
+                            'results': outputs[index],
+                            'batch_size': len(batch.requests),
+                            'queue_seconds': started - request.submitted,
+                            'seconds': finished - request.submitted,
+                        }
+            for request in batch.requests:
+                request.done.set()
+
+    def _run(self, batch):
+        if batch.requests[0].corpus is not None:
+            return self._run_corpus(batch)
+        return self._run_resumes(batch)
+
+    def _run_resumes(self, batch):
+        # Score each distinct resume of the batch once
+        distinct = {}
+        identities = []
+        for request in batch.requests:
+            request_identities = []
+            for resume in request.resumes:
+                identity = self._identity(resume)
+                if identity not in distinct:
+                    distinct[identity] = dict(resume, name=str(len(distinct)))
+                request_identities.append(identity)
+            identities.append(request_identities)
+        first = batch.requests[0]
+        pipeline = ScreeningPipeline(first.job_description, self.processes, text_cache=self.text_cache,
+                                     job_keywords=first.job_keywords)
+        by_name = {resume['name']: identity for identity, resume in distinct.items()}
+        scored = {}
+        for result in pipeline.run(list(distinct.values())):
+            scored[by_name[result.pop('file_name')]] = result
+        total = sum(len(request_identities) for request_identities in identities)
+        with self._lock:
+            self.counters['resumes_scored'] += len(distinct)
+            self.counters['resumes_shared'] += total - len(distinct)
+        logger.info("Scored %d distinct resumes for %d requests", len(distinct), len(batch.requests))
+
+        outputs = []
+        for request, request_identities in zip(batch.requests, identities):
+            results = [_plain_result(scored[identity], resume['name'])
+                       for identity, resume in zip(request_identities, request.resumes)]
+            outputs.append(_top(results, request.top) if request.top else results)
+        return outputs
+
+    @staticmethod
+    def _identity(resume):
+        if 'text' in resume:
+            return 'text:' + hashlib.sha256(resume['text'].encode('utf-8', 'surrogatepass')).hexdigest()
+        if 'content' in resume:
+            return f"content:{resume['type']}:" + hashlib.sha256(resume['content']).hexdigest()
+        return 'path:' + resume['path']
+
+    def _run_corpus(self, batch):
+        # numpy is only needed for corpus files
+        from tokenized_corpus import open_corpus
+        first = batch.requests[0]
+        corpus = open_corpus(first.corpus)
+        tops = [request.top for request in batch.requests]
+        k = max(tops) if all(tops) else None
+        parallel = self.processes > 1
+        if k:
+            if parallel:
+                rows = get_pool().map_corpus(corpus.path, len(corpus), first.job_keywords, k, first.weights,
+                                             workers=self.processes).rows()
+            else:
+                rows = corpus.rank(first.job_keywords, k, first.weights)
+            results = [_plain_result({
+                'final_score': row[0], 'keyword_match_ratio': row[1], 'years_experience': row[2],
+                'experience_score': row[3], 'education_score': row[4], 'matching_keywords': row[7],
+            }, row[6]) for row in rows]
+        else:
+            if parallel:
+                parts = get_pool().map_corpus(corpus.path, len(corpus), first.job_keywords,
+                                              weights=first.weights, workers=self.processes)
+            else:
+                parts = [corpus.score(first.job_keywords, first.weights)]
+            results = []
+            for columns in parts:
+                for values in zip(*columns.values()):
+                    result = dict(zip(columns, values))
+                    results.append(_plain_result(result, result['file_name']))
+        with self._lock:
+            self.counters['resumes_scored'] += len(corpus)
+        # With k, results are already best first
+        return [results[:request.top] if k else _top(results, request.top) if request.top else results
+                for request in batch.requests]
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Queue depth, request/batch counters, latency, queue wait
+                and batch time percentiles (seconds) over recent requests,
+                job matcher and parsed-text cache stats and warm workers
+        """
+        with self._lock:
+            metrics = {
+                'uptime_seconds': time.time() - self.started,
+                'queue_depth': sum(len(batch.requests) for batch in self._open.values()),
+                'queued_batches': len(self._open),
+                'running_batches': self._running,
+                **self.counters,
+                'latency_seconds': _percentiles(self._latencies),
+                'queue_wait_seconds': _percentiles(self._queue_waits),
+                'batch_seconds': _percentiles(self._batch_times),
+                'job_cache': {'entries': len(self._jobs), 'hits': self._job_hits, 'misses': self._job_misses},
+            }
+        metrics['warm_workers'] = warm_workers()
+        metrics['text_cache'] = self.text_cache.stats()
+        return metrics
+
+    def close(self):
+        """Stop the dispatcher once the queued batches have run."""
+        self._batches.put(None)
+        self._dispatcher.join()
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ResumeScreeningService/1'
+
+    def _reply(self, status, body):
+        data = json.dumps(body, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        token = self.server.token
+        if not token:
+            return True
+        if hmac.compare_digest(self.headers.get('Authorization', ''), f'Bearer {token}'):
+            return True
+        # A rejected request's body is never read, so it must not be taken
+        # for the next request on this connection
+        self.close_connection = True
+        self._reply(401, {'error': "Missing or wrong token"})
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path == '/health':
+            self._reply(200, {'status': 'ok'})
+        elif self.path == '/metrics':
+            self._reply(200, self.server.service.metrics())
+        else:
+            self._reply(404, {'error': f"No such endpoint {self.path}"})
+
+    def do_POST(self):
+        # Checked before reading a body of up to MAX_REQUEST_BYTES
+        if not self._authorized():
+            return
+        if self.path != '/screen':
+            self.close_connection = True
+            self._reply(404, {'error': f"No such endpoint {self.path}"})
+            return
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self._reply(411, {'error': "Content-Length is required"})
+            return
+        if int(length) > MAX_REQUEST_BYTES:
+            self.close_connection = True
+            self._reply(413, {'error': f"Requests are limited to {MAX_REQUEST_BYTES} bytes"})
+            return
+        body = self.rfile.read(int(length))
+        try:
+            response = self.server.service.submit(json.loads(body))
+        except (ValueError, UnicodeDecodeError) as e:
+            self._reply(400, {'error': str(e)})
+        except Exception as e:
+            self._reply(500, {'error': str(e)})
+        else:
+            self._reply(200, response)
+
+    def address_string(self):
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        logger.debug("%s " + format, self.address_string(), *args)
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        super().server_bind()
+        # Only this user may submit work
+        os.chmod(self.server_address, 0o600)
+
+def make_server(address, service, token=None):
+    """
+    Bind the HTTP front end of a service.
+
+    A Unix socket is only reachable by this user. Over TCP, requests may only
+    name files when the service has a path_root, and a token is required
+    unless the address is a loopback one.
+
+    Args:
+        address (str): "host:port", or "unix:/path" for a Unix socket
+        service (ScreeningService): Engine that runs the requests
+        token (str, optional): Shared secret clients must send as a bearer
+            token (defaults to RESUME_SCREENER_TOKEN; empty disables it)
+
+    Returns:
+        socketserver.BaseServer: Server to run with serve_forever()
+
+    Raises:
+        ValueError: For a non-loopback TCP address without a token
+    """
+    token = _default_token() if token is None else token
+    path = _unix_path(address)
+    if path is None:
+        host, port = _host_port(address)
+        if not token and not _is_loopback(host):
+            raise ValueError(f"Refusing to listen on {address} without a token; set RESUME_SCREENER_TOKEN")
+        service.accept_paths = service.path_root is not None
+    if path is not None:
+        if os.path.exists(path):
+            # A socket left behind by a previous run
+            os.unlink(path)
+        server = _UnixHTTPServer(path, _Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+        server.daemon_threads = True
+    server.service = service
+    server.token = token
+    return server
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+class ScreeningClient:
+    """Client of a running screening service."""
+
+    def __init__(self, address=None, token=None, timeout=None):
+        """
+        Args:
+            address (str, optional): Service address (defaults to
+                RESUME_SCREENER_SERVICE, then DEFAULT_ADDRESS)
+            token (str, optional): Bearer token (defaults to RESUME_SCREENER_TOKEN)
+            timeout (float, optional): Socket timeout in seconds
+        """
+        self.address = address or service_address() or DEFAULT_ADDRESS
+        self.token = _default_token() if token is None else token
+        self.timeout = timeout
+
+    def _connection(self):
+        path = _unix_path(self.address)
+        if path is not None:
+            return _UnixHTTPConnection(path, self.timeout)
+        host, port = _host_port(self.address)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _request(self, method, path, payload=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        connection = self._connection()
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            data = json.loads(response.read() or b'{}')
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise ServiceError(f"{response.status}: {data.get('error', response.reason)}")
+        return data
+
+    def screen(self, job_description, resumes=None, corpus=None, top=None, phrase_matching=False, weights=None):
+        """
+        Screen resumes or a corpus file on the service.
+
+        Args:
+            job_description (str): Job description text
+            resumes (list, optional): Dictionaries with 'name' and 'text',
+                'content' (raw bytes, with an optional 'type') or 'path'
+            corpus (str, optional): Tokenized corpus file the service can read
+            top (int, optional): Only return the best N resumes
+            phrase_matching (bool): Match multi-word skills as single keywords
+            weights (dict, optional): Component weights (corpus files only)
+
+        Returns:
+            dict: The service's response (see ScreeningService.submit)
+        """
+        payload = {'job_description': job_description, 'top': top, 'phrase_matching': phrase_matching}
+        if corpus is not None:
+            payload['corpus'] = os.path.abspath(corpus)
+            payload['weights'] = weights
+        else:
+            payload['resumes'] = [
+                dict(resume, content=base64.b64encode(resume['content']).decode('ascii'))
+                if 'content' in resume else resume
+                for resume in resumes
+            ]
+        return self._request('POST', '/screen', payload)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: The service's metrics (see ScreeningService.metrics)
+        """
+        return self._request('GET', '/metrics')
+
+    def health(self):
+        """
+        Returns:
+            bool: Whether the service answers
+        """
+        try:
+            return self._request('GET', '/health').get('status') == 'ok'
+        except (OSError, ServiceError):
+            return False
+
+def screen_with_service(job_description, resumes, top=None, phrase_matching=False, address=None):
+    """
+    Screen resumes on the screening service.
+
+    Args:
+        job_description (str): Job description text
+        resumes (list): Dictionaries with 'name' and 'text', 'content' or 'path'
+        top (int, optional): Only return the best N resumes
+        phrase_matching (bool): Match multi-word skills as single keywords
+        address (str, optional): Service address
+
+    Returns:
+        tuple: (DataFrame with results, seconds until the response arrived,
+            the response without its results)
+    """
+    start_time = time.time()
+    response = ScreeningClient(address).screen(job_description, resumes, top=top,
+                                               phrase_matching=phrase_matching)
+    results = response.pop('results')
+    return format_results(results), time.time() - start_time, response
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def serve(address=DEFAULT_ADDRESS, processes=None, batch_window=DEFAULT_BATCH_WINDOW, token=None, path_root=None):
+    """
+    Run the screening service until interrupted.
+
+    Args:
+        address (str): "host:port", or "unix:/path" for a Unix socket
+        processes (int, optional): Pool workers
+        batch_window (float): Seconds a new batch waits for more requests
+        token (str, optional): Bearer token clients must send
+        path_root (str, optional): Only open files requests name under this
+            directory (required for paths over TCP)
+
+    Raises:
+        ValueError: For a non-loopback TCP address without a token
+    """
+    service = ScreeningService(processes, batch_window, path_root=path_root)
+    try:
+        server = make_server(address, service, token)
+    except BaseException:
+        service.close()
+        raise
+    service.warm_up()
+    logger.info("Screening service listening on %s with %d workers", address, service.processes)
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down")
+    finally:
+        server.server_close()
+        service.close()
+        path = _unix_path(address)
+        if path is not None and os.path.exists(path):
+            os.unlink(path)
+
+def _submitted(resume, by_path):
+    # Files go as content unless the service is trusted to read them itself
+    if 'path' not in resume:
+        return resume
+    if by_path:
+        return dict(resume, path=os.path.abspath(resume['path']))
+    with open(resume['path'], 'rb') as f:
+        return {'name': resume['name'], 'content': f.read()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run or use the local resume screening service.")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log progress")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    server = subparsers.add_parser('serve', help="Run the service")
+    server.add_argument('--listen', default=service_address() or DEFAULT_ADDRESS,
+                        help="host:port or unix:/path/to.sock (default: $RESUME_SCREENER_SERVICE or %(default)s)")
+    server.add_argument('--workers', type=int, default=None, help="Pool workers a batch may use (default: usable CPUs)")
+    server.add_argument('--batch-window', type=float, default=DEFAULT_BATCH_WINDOW,
+                        help="Seconds a batch waits for more requests for the same job")
+    server.add_argument('--path-root', default=None,
+                        help="Only open resume and corpus files under this directory (needed for paths over TCP)")
+
+    submit = subparsers.add_parser('submit', help="Screen resumes or a corpus on the service")
+    submit.add_argument('job', help="Job description .txt file")
+    submit.add_argument('inputs', nargs='*', help="Resume directories, files, ZIP/tar archives or glob patterns")
+    submit.add_argument('--corpus', help="Tokenized corpus file to screen instead of inputs")
+    submit.add_argument('-o', '--output', required=True, help="Ranked results file (.csv, .parquet or .arrow)")
+    submit.add_argument('--top', type=int, default=None, help="Only write the best N resumes")
+    submit.add_argument('--phrases', action='store_true',
+                        help='Match multi-word skills ("machine learning", "Node.js") as single keywords')
+    submit.add_argument('--by-path', action='store_true',
+                        help="Send file paths for the service to read instead of the files' contents")
+
+    metrics = subparsers.add_parser('metrics', help="Print the service's metrics as JSON")
+    for subparser in (submit, metrics):
+        subparser.add_argument('--service', default=None,
+                               help="Service address (default: $RESUME_SCREENER_SERVICE or %s)" % DEFAULT_ADDRESS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stderr, format='%(asctime)s %(levelname)s %(message)s')
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    if args.command == 'serve':
+        try:
+            serve(args.listen, args.workers, args.batch_window, path_root=args.path_root)
+        except ValueError as e:
+            logger.error("%s", e)
+            return 2
+        return 0
+
+    client = ScreeningClient(args.service)
+    if args.command == 'metrics':
+        try:
+            print(json.dumps(client.metrics(), indent=2))
+        except (OSError, ServiceError) as e:
+            logger.error("Screening service at %s failed: %s", client.address, e)
+            return 1
+        return 0
+
+    from screen_resumes import find_resumes, write_results
+    from resume_archives import iter_resume_inputs
+    from result_export import export_format
+    if bool(args.inputs) == bool(args.corpus):
+        parser.error("give either resume inputs or --corpus")
+    try:
+        with open(args.job, 'r', encoding='utf-8') as f:
+            job_description = f.read()
+    except OSError as e:
+        logger.error("Cannot read job description: %s", e)
+        return 2
+    if args.corpus:
+        resumes = None
+    else:
+        paths = find_resumes(args.inputs)
+        if not paths:
+            logger.error("No .txt or .pdf resumes or archives found in %s", ', '.join(args.inputs))
+            return 3
+        try:
+            resumes = [_submitted(resume, args.by_path) for resume in iter_resume_inputs(paths)]
+        except OSError as e:
+            logger.error("Cannot read resume: %s", e)
+            return 2
+    try:
+        response = client.screen(job_description, resumes, args.corpus, args.top, args.phrases)
+    except (OSError, ServiceError) as e:
+        logger.error("Screening service at %s failed: %s", client.address, e)
+        return 1
+    written = write_results(response['results'], args.output, export_format(args.output))
+    logger.info("Wrote %d ranked resumes to %s (%.2f seconds, batched with %d requests)", written,
+                args.output, response['seconds'], response['batch_size'] - 1)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,51 +1,116 @@
 import time
-from utils import extract_keywords, score_resume, format_results
+import logging
+from utils import extract_job_terms, score_resume_within_limits, format_results
+from instrumentation import build_report, collect_stage_timings
+from ranking import TopKRanker
 
-def process_resumes_serial(job_description, resumes):
+logger = logging.getLogger(__name__)
+
+def process_resumes_serial(job_description, resumes, profile=False, phrase_matching=False,
+                           deduplicate=False, duplicate_groups=None):
     """
     Process resumes serially (one by one).
-    
+
     Args:
         job_description (str): Job description text
         resumes (list): List of dictionaries containing resume data
             Each dict should have 'text' and 'name' keys
-            
+        profile (bool): Also return a per-stage profiling report
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+        deduplicate (bool): Score only one resume per group of near-duplicates
+            and copy its result to the others (see near_duplicates)
+        duplicate_groups (dict, optional): find_near_duplicates output already
+            computed for resumes; deduplicates with these groups
+
     Returns:
-        tuple: (DataFrame with results, execution time in seconds)
+        tuple: (DataFrame with results, execution time in seconds), plus the
+            profiling report from instrumentation.build_report if profile is set
     """
-    print("\n======== SERIAL RESUME PROCESSING ========")
-    print(f"Job description length: {len(job_description)} characters")
-    print(f"Number of resumes to process: {len(resumes)}")
-    
+    logger.info("Serial processing of %d resumes (job description: %d characters)",
+                len(resumes), len(job_description))
+
+    # Drop timings recorded before this run (e.g. while parsing uploads)
+    collect_stage_timings()
     start_time = time.time()
-    
+
     # Extract keywords from job description
-    print("Extracting keywords from job description...")
-    job_keywords = extract_keywords(job_description)
-    
+    job_keywords = extract_job_terms(job_description, phrase_matching)
+
+    # Skip scoring near-duplicates of resumes earlier in the batch
+    to_score = resumes
+    deduplicate = deduplicate or duplicate_groups is not None
+    if deduplicate:
+        # numpy is only needed for deduplication
+        from near_duplicates import deduplicate_resumes, propagate_scores
+        to_score, groups = deduplicate_resumes(resumes, groups=duplicate_groups)
+
     # Process each resume
     results = []
-    for i, resume in enumerate(resumes):
-        resume_text = resume['text']
-        file_name = resume['name']
-        
-        print(f"\nProcessing resume {i+1}/{len(resumes)}: {file_name}")
-        print(f"Resume text length: {len(resume_text)} characters")
-        
-        # Score the resume
-        result = score_resume(resume_text, job_keywords)
-        result['file_name'] = file_name
-        
+    for i, resume in enumerate(to_score):
+        logger.debug("Processing resume %d/%d: %s", i + 1, len(to_score), resume['name'])
+
+        # Score the resume (within the per-file time and memory limits)
+        result = score_resume_within_limits(resume, job_keywords)
+
         results.append(result)
-        print(f"Completed scoring for {file_name}")
-    
+
+    if deduplicate:
+        results = propagate_scores(results, resumes, groups)
+
     # Calculate execution time
     execution_time = time.time() - start_time
-    print(f"\nSerial processing completed in {execution_time:.4f} seconds")
-    
+    logger.info("Serial processing completed in %.4f seconds", execution_time)
+
     # Format results into a DataFrame
-    print("Formatting results...")
     results_df = format_results(results)
-    print(f"Formatted {len(results_df)} results")
-    
+
+    if profile:
+        report = build_report('serial', execution_time, len(resumes), collect_stage_timings())
+        return results_df, execution_time, report
     return results_df, execution_time
+
+def iter_resumes_serial(job_description, resumes, cancel_event=None, phrase_matching=False):
+    """
+    Process resumes serially, yielding each result as soon as it is scored.
+
+    Args:
+        job_description (str): Job description text
+        resumes (iterable): Dictionaries containing resume data
+            Each dict should have 'text' and 'name' keys
+        cancel_event (threading.Event, optional): Set to stop the run early
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+
+    Yields:
+        dict: Scoring result dicts (with 'file_name'), in input order
+    """
+    job_keywords = extract_job_terms(job_description, phrase_matching)
+    for resume in resumes:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        yield score_resume_within_limits(resume, job_keywords)
+
+def rank_resumes_serial(job_description, resumes, k=10, phrase_matching=False):
+    """
+    Rank resumes serially, keeping only the top K candidates in memory.
+
+    Args:
+        job_description (str): Job description text
+        resumes (iterable): Dictionaries containing resume data
+            Each dict should have 'text' and 'name' keys
+        k (int): Number of candidates to return
+        phrase_matching (bool): Match compound terms and multi-word skills
+            as single keywords (see utils.extract_job_terms)
+
+    Returns:
+        tuple: (DataFrame with the top K results, execution time in seconds)
+    """
+    start_time = time.time()
+    ranker = TopKRanker(k)
+    for index, result in enumerate(iter_resumes_serial(job_description, resumes,
+                                                                   phrase_matching=phrase_matching)):
+        ranker.offer(result, index)
+    execution_time = time.time() - start_time
+    logger.info("Ranked %d resumes in %.4f seconds", ranker.seen, execution_time)
+    return format_results(ranker.results()), execution_time
@@ -0,0 +1,336 @@
+import numpy as np
+from multiprocessing import shared_memory
+from resource_limits import SKIP_REASONS
+
+# Fixed layout of one scoring result in a SharedResultTable
+RESULT_DTYPE = np.dtype([
+    ('final_score', np.float64),
+    ('keyword_match_ratio', np.float64),
+    ('years_experience', np.int32),
+    ('experience_score', np.float64),
+    ('education_score', np.float64),
+    # Index into resource_limits.SKIP_REASONS (0: scored normally)
+    ('skipped', np.uint8),
+])
+
+def _attach(name):
+    """
+    Open an existing block without making this process responsible for it:
+    the creating process owns the block and unlinks it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block with the
+        # resource tracker. Pool workers share their parent's tracker (see
+        # ResumeScreeningPool._start), where this is a no-op and the owner's
+        # unlink() clears the registration.
+        return shared_memory.SharedMemory(name=name)
+
+class SharedResumeCorpus:
+    """
+    All resume texts of a batch packed into one shared memory block.
+
+    Layout: an int64 count N, N + 1 int64 byte offsets, then the UTF-8 texts
+    back to back. Workers attach by name and decode only the slices they are
+    asked to score, so texts never travel through the pool's pipes.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        count = int(np.ndarray((1,), dtype=np.int64, buffer=shm.buf)[0])
+        self.offsets = np.ndarray((count + 1,), dtype=np.int64, buffer=shm.buf, offset=8)
+        self._data_start = 8 * (count + 2)
+
+    @staticmethod
+    def _encode(texts):
+        encoded = [text.encode('utf-8', errors='surrogatepass') for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        return encoded, offsets, 8 * (len(encoded) + 2) + int(offsets[-1])
+
+    @staticmethod
+    def _pack(shm, encoded, offsets):
+        np.ndarray((1,), dtype=np.int64, buffer=shm.buf)[0] = len(encoded)
+        np.ndarray(offsets.shape, dtype=np.int64, buffer=shm.buf, offset=8)[:] = offsets
+        shm.buf[8 * (len(encoded) + 2):8 * (len(encoded) + 2) + int(offsets[-1])] = b''.join(encoded)
+
+    @classmethod
+    def create(cls, texts):
+        """
+        Pack texts into a new shared memory block.
+
+        Args:
+            texts (list): Resume texts
+
+        Returns:
+            SharedResumeCorpus: The owning handle (call unlink() when done)
+        """
+        encoded, offsets, size = cls._encode(texts)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        cls._pack(shm, encoded, offsets)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attach to a corpus created in another process.
+
+        Args:
+            name (str): Shared memory block name
+
+        Returns:
+            SharedResumeCorpus: A read-only view (call close() when done)
+        """
+        return cls(_attach(name), owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def text(self, index):
+        """
+        Decode one resume text.
+
+        Args:
+            index (int): Position of the resume in the batch
+
+        Returns:
+            str: Resume text
+        """
+        start = self._data_start + int(self.offsets[index])
+        end = self._data_start + int(self.offsets[index + 1])
+        return str(self._shm.buf[start:end], 'utf-8', 'surrogatepass')
+
+    def release(self):
+        # Drop our numpy views so the mapping can be closed
+        self.offsets = None
+
+    def close(self):
+        self.release()
+        self._shm.close()
+
+    def unlink(self):
+        self.close()
+        if self._owner:
+            self._shm.unlink()
+
+class SharedResultTable:
+    """
+    Fixed-layout scoring results in shared memory, one row per resume.
+
+    Each row holds the numeric scores (RESULT_DTYPE) and a bitmask over the
+    sorted job keywords marking which of them the resume matched. Workers
+    write their rows in place and only a row count travels back to the parent.
+    """
+
+    def __init__(self, shm, count, num_keywords, owner):
+        self._shm = shm
+        self._owner = owner
+        self.num_keywords = num_keywords
+        self.mask_bytes = (num_keywords + 7) // 8
+        self.rows = np.ndarray((count,), dtype=RESULT_DTYPE, buffer=shm.buf)
+        self.masks = np.ndarray((count, self.mask_bytes), dtype=np.uint8, buffer=shm.buf,
+                                offset=count * RESULT_DTYPE.itemsize)
+
+    @staticmethod
+    def _size(count, num_keywords):
+        return max(count * (RESULT_DTYPE.itemsize + (num_keywords + 7) // 8), 1)
+
+    @classmethod
+    def create(cls, count, num_keywords):
+        """
+        Args:
+            count (int): Number of resumes in the batch
+            num_keywords (int): Number of job keywords
+
+        Returns:
+            SharedResultTable: The owning handle (call unlink() when done)
+        """
+        shm = shared_memory.SharedMemory(create=True, size=cls._size(count, num_keywords))
+        return cls(shm, count, num_keywords, owner=True)
+
+    @classmethod
+    def attach(cls, name, count, num_keywords):
+        return cls(_attach(name), count, num_keywords, owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def write(self, index, result, keyword_positions):
+        """
+        Store one scoring result.
+
+        Args:
+            index (int): Row to write
+            result (dict): score_resume result
+            keyword_positions (dict): job keyword -> bit position
+        """
+        self.rows[index] = (
+            result['final_score'], result['keyword_match_ratio'], result['years_experience'],
+            result['experience_score'], result['education_score'],
+            SKIP_REASONS.index(result.get('skipped', '')),
+        )
+        mask = self.masks[index]
+        mask[:] = 0
+        for keyword in result['matching_keywords']:
+            position = keyword_positions[keyword]
+            mask[position >> 3] |= 0x80 >> (position & 7)
+
+    def matching_keywords(self, terms):
+        """
+        Decode the keyword bitmasks.
+
+        Args:
+            terms (list): Job keywords in sorted order (bit order)
+
+        Returns:
+            list: One list of matching keywords per row
+        """
+        terms = np.array(terms, dtype=object)
+        bits = np.unpackbits(self.masks, axis=1, count=self.num_keywords).astype(bool)
+        return [terms[row].tolist() for row in bits]
+
+    def columns(self, terms, file_names):
+        """
+        Copy the table out as columns in the shape format_results expects.
+
+        Args:
+            terms (list): Job keywords in sorted order (bit order)
+            file_names (list): Resume names, in row order
+
+        Returns:
+            dict: Column name -> values
+        """
+        columns = {
+            'final_score': self.rows['final_score'].copy(),
+            'keyword_match_ratio': self.rows['keyword_match_ratio'].copy(),
+            'matching_keywords': self.matching_keywords(terms),
+            'years_experience': self.rows['years_experience'].astype(np.int64),
+            'experience_score': self.rows['experience_score'].copy(),
+            'education_score': self.rows['education_score'].copy(),
+            'file_name': list(file_names),
+        }
+        skipped = self.rows['skipped']
+        if skipped.any():
+            columns['skipped'] = [SKIP_REASONS[code] for code in skipped]
+        return columns
+
+    def release(self):
+        self.rows = None
+        self.masks = None
+
+    def close(self):
+        self.release()
+        self._shm.close()
+
+    def unlink(self):
+        self.close()
+        if self._owner:
+            self._shm.unlink()
+
+class SharedArena:
+    """
+    Shared memory blocks reused by successive shared-memory batches.
+
+    Creating, mapping and unlinking two blocks per batch costs more than
+    pickling a small batch, so the texts and the result table of each batch
+    are written into the same two blocks, which only grow when a batch does
+    not fit. The block names then stay the same from batch to batch, and
+    each worker attaches once (see attached()). One batch may use the arena
+    at a time. The blocks hold the last batch until the arena is closed.
+    """
+
+    def __init__(self):
+        self._corpus = None
+        self._table = None
+
+    @staticmethod
+    def _fit(block, size):
+        if block is not None and block.size >= size:
+            return block
+        if block is not None:
+            block.close()
+            block.unlink()
+        # Grow geometrically so a slowly growing batch size does not remap every time
+        return shared_memory.SharedMemory(create=True, size=max(size, 2 * block.size if block else 0, 1))
+
+    def corpus(self, texts):
+        """
+        Args:
+            texts (list): Resume texts
+
+        Returns:
+            SharedResumeCorpus: The texts, packed into the arena's text block
+        """
+        encoded, offsets, size = SharedResumeCorpus._encode(texts)
+        self._corpus = self._fit(self._corpus, size)
+        SharedResumeCorpus._pack(self._corpus, encoded, offsets)
+        return SharedResumeCorpus(self._corpus, owner=False)
+
+    def table(self, count, num_keywords):
+        """
+        Args:
+            count (int): Number of resumes in the batch
+            num_keywords (int): Number of job keywords
+
+        Returns:
+            SharedResultTable: A result table in the arena's result block
+        """
+        self._table = self._fit(self._table, SharedResultTable._size(count, num_keywords))
+        return SharedResultTable(self._table, count, num_keywords, owner=False)
+
+    def close(self):
+        for block in (self._corpus, self._table):
+            if block is not None:
+                block.close()
+                block.unlink()
+        self._corpus = self._table = None
+
+# Blocks this worker has attached to, by name, with the views built on them
+_attached = {}
+
+def attached(corpus_name, table_name, count, num_keywords):
+    """
+    Return views of a batch's blocks, attaching to each block only once.
+
+    Views are cached per batch shape. They read the block's memory directly,
+    so a later batch of the same shape written into the same blocks is seen
+    through them. Blocks that are no longer in use are closed.
+
+    Args:
+        corpus_name (str): Name of the SharedResumeCorpus block
+        table_name (str): Name of the SharedResultTable block
+        count (int): Number of resumes in the batch
+        num_keywords (int): Number of job keywords
+
+    Returns:
+        tuple: (SharedResumeCorpus, SharedResultTable)
+    """
+    for name in list(_attached):
+        if name not in (corpus_name, table_name):
+            # The arena grew and unlinked this block
+            shm, cached = _attached.pop(name)
+            for view in cached.values():
+                view.release()
+            shm.close()
+    views = []
+    for name, shape in ((corpus_name, count), (table_name, (count, num_keywords))):
+        if name not in _attached:
+            _attached[name] = (_attach(name), {})
+        shm, cached = _attached[name]
+        if shape not in cached:
+            for view in cached.values():
+                view.release()
+            cached.clear()
+            if name == corpus_name:
+                cached[shape] = SharedResumeCorpus(shm, owner=False)
+            else:
+                cached[shape] = SharedResultTable(shm, count, num_keywords, owner=False)
+        views.append(cached[shape])
+    return tuple(views)
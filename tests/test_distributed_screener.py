@@ -0,0 +1,89 @@
+import os
+import sys
+import socket
+import threading
+import subprocess
+
+import pandas as pd
+import pytest
+
+from distributed_screener import DistributedCoordinator, _recv, _send, run_worker
+from result_export import columnar_export_available
+from serial_resume_screener import rank_resumes_serial
+from utils import format_results
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = os.path.join(REPO, 'sample_resumes')
+JOB = os.path.join(REPO, 'test_data', 'sample_job_description.txt')
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _run_cluster(output, top):
+    # Coordinator and worker run as separate CLI processes, as on two hosts
+    port = _free_port()
+    env = dict(os.environ, RESUME_SCREENER_TOKEN='smoke-test')
+    script = os.path.join(REPO, 'distributed_screener.py')
+    coordinator = subprocess.Popen(
+        [sys.executable, script, 'coordinator', JOB, SAMPLES, '-o', str(output), '--top', str(top),
+         '--shard-size', '7', '--listen', f'127.0.0.1:{port}', '--timeout', '120'],
+        cwd=REPO, env=env)
+    worker = subprocess.Popen([sys.executable, script, 'worker', f'127.0.0.1:{port}'], cwd=REPO, env=env)
+    try:
+        assert coordinator.wait(timeout=180) == 0
+        assert worker.wait(timeout=30) == 0
+    finally:
+        for process in (coordinator, worker):
+            if process.poll() is None:
+                process.kill()
+
+@pytest.mark.parametrize('extension', ['csv', 'parquet', 'arrow'])
+def test_coordinator_cli_writes_top_k(tmp_path, extension):
+    if extension != 'csv' and not columnar_export_available():
+        pytest.skip("pyarrow is not installed")
+    output = tmp_path / f'top.{extension}'
+    _run_cluster(output, top=5)
+
+    if extension == 'csv':
+        results = pd.read_csv(output)
+    elif extension == 'parquet':
+        results = pd.read_parquet(output)
+    else:
+        results = pd.read_feather(output)
+    assert len(results) == 5
+    assert results['Final Score (%)'].is_monotonic_decreasing
+    assert not (tmp_path / f'top.{extension}.tmp').exists()
+
+def _text_resumes(count=30):
+    skills = ['python django sql', 'java spring', 'python machine learning', 'sql reporting', 'go kubernetes']
+    return [{'name': f'resume{i}.txt',
+             'text': f'Engineer with {i % 12} years of experience in {skills[i % len(skills)]}. '
+                     f'{"Master of Science." if i % 3 == 0 else ""}'}
+            for i in range(count)]
+
+def _drop_after_first_shard(host, port, token):
+    # Takes a shard like a worker would, then disappears without answering
+    with socket.create_connection((host, port), timeout=30) as sock:
+        _send(sock, {'type': 'hello', 'token': token, 'host': 'flaky', 'pid': 0})
+        assert _recv(sock)['type'] == 'welcome'
+        assert _recv(sock)['type'] == 'shard'
+
+def test_dropped_shard_is_retried_and_ranking_matches_serial():
+    job = 'Python developer with SQL and machine learning experience. Master degree preferred.'
+    resumes = _text_resumes()
+    coordinator = DistributedCoordinator(job, resumes, k=5, shard_size=7, port=0, token='in-process')
+    served = threading.Thread(target=coordinator.serve, args=(120,), daemon=True)
+    served.start()
+    host, port = coordinator.address
+
+    _drop_after_first_shard(host, port, 'in-process')
+    run_worker(host, port, 'in-process')
+    served.join(30)
+
+    assert not served.is_alive()
+    assert coordinator.stats['retries'] == 1
+    assert coordinator.stats['lost_workers'] == 1
+    expected, _ = rank_resumes_serial(job, resumes, k=5)
+    pd.testing.assert_frame_equal(format_results(coordinator.results()), expected)
@@ -0,0 +1,26 @@
+from keyword_matcher import JobMatcher
+from utils import score_resume
+
+JOB = 'Experience with Node.js and/or CI/CD, e.g. scikit-learn, 2019-2020. Machine learning required.'
+RESUME = 'Built Node.js services and CI/CD pipelines; trained scikit-learn and machine learning models.'
+
+def test_compound_and_phrase_terms():
+    matcher = JobMatcher(JOB)
+    assert {'node.js', 'ci/cd', 'scikit-learn', 'machine learning'} <= matcher.terms
+    # Words that only occur inside a term are not keywords of their own
+    assert not {'node', 'js', 'ci', 'cd', 'scikit', 'learn', 'machine', 'learning'} & matcher.terms
+
+def test_filler_compounds_are_not_terms():
+    matcher = JobMatcher(JOB)
+    assert not {'and/or', 'e.g', '2019-2020', '2019', '2020'} & matcher.terms
+    assert matcher.terms == {'experience', 'node.js', 'ci/cd', 'scikit-learn', 'machine learning', 'required'}
+
+def test_resume_with_every_skill_scores_against_real_terms():
+    matcher = JobMatcher(JOB)
+    result = score_resume(RESUME, matcher)
+    assert result['matching_keywords'] == {'node.js', 'ci/cd', 'scikit-learn', 'machine learning'}
+    assert result['keyword_match_ratio'] == 4 / 6
+
+def test_split_words_do_not_match_a_compound():
+    matcher = JobMatcher(JOB)
+    assert matcher.match('Learned some machine shop skills and node basics.') == set()
@@ -0,0 +1,54 @@
+import threading
+
+from parallel_resume_screener import ResumeScreeningPool
+
+PYTHON_JOB = frozenset({'python', 'django', 'sql'})
+JAVA_JOB = frozenset({'java', 'spring', 'sql'})
+
+def _resumes(prefix, count=24):
+    skills = ['python django', 'java spring', 'sql', 'python sql', 'java sql']
+    return [{'name': f'{prefix}{i}', 'text': f'Developer with 5 years of experience in {skills[i % len(skills)]}.'}
+            for i in range(count)]
+
+def _finishes(target, timeout=60):
+    # A pool whose task handler is stuck would hang the test run instead of failing it
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+def _by_name(results):
+    return {result['file_name']: result['final_score'] for result in results}
+
+def test_interleaved_streams_share_one_pool():
+    pool = ResumeScreeningPool(1)
+    first, second = _resumes('a'), _resumes('b')
+    streamed = {}
+
+    def interleave():
+        # Take one result from each stream in turn, as two sessions would
+        streams = {'first': pool.imap_unordered(first, PYTHON_JOB, max_in_flight=2),
+                   'second': pool.imap_unordered(second, JAVA_JOB, max_in_flight=2)}
+        streamed.update(first=[], second=[])
+        while streams:
+            for name, stream in list(streams.items()):
+                result = next(stream, None)
+                if result is None:
+                    del streams[name]
+                else:
+                    streamed[name].append(result)
+
+    assert _finishes(interleave)
+    assert _by_name(streamed['first']) == _by_name(pool.map(first, PYTHON_JOB))
+    assert _by_name(streamed['second']) == _by_name(pool.map(second, JAVA_JOB))
+    pool.close()
+
+def test_abandoned_stream_does_not_block_the_pool():
+    pool = ResumeScreeningPool(1)
+    abandoned = pool.imap_unordered(_resumes('a'), PYTHON_JOB, max_in_flight=1)
+    next(abandoned)
+    scored = []
+    assert _finishes(lambda: scored.extend(pool.map(_resumes('b'), JAVA_JOB)))
+    assert len(scored) == 24
+    abandoned.close()
+    pool.close()
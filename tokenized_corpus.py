@@ -0,0 +1,528 @@
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import bisect
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from array import array
+
+import numpy as np
+from utils import FEATURE_VERSION, extract_keywords, load_resume_text, combine_scores, format_results
+from feature_store import compute_features
+from resource_limits import DEFAULT_LIMITS, ResourceLimitExceeded, file_guard
+from ranking import TopKRanker
+from instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'RSCORPUS'
+FORMAT_VERSION = 1
+
+# The JSON header (section offsets and sizes) is padded to this many bytes
+_HEADER_SIZE = 4096
+# Sections start on cache-line boundaries
+_ALIGNMENT = 64
+# Resumes matched per vectorized block, which bounds the temporary arrays
+_BLOCK_ROWS = 65536
+# Token ids copied from the ingest spool at a time
+_COPY_TOKENS = 1 << 22
+
+# Sections of the corpus file, in file order
+_SECTIONS = (
+    ('vocabulary_offsets', '<i8'),   # V + 1 byte offsets into 'vocabulary'
+    ('vocabulary', 'u1'),            # UTF-8 terms, sorted, concatenated
+    ('token_offsets', '<i8'),        # N + 1 offsets into 'token_ids'
+    ('token_ids', '<u4'),            # Distinct keyword ids of each resume
+    ('years_experience', '<i8'),
+    ('experience_score', '<f8'),
+    ('education_score', '<f8'),
+    ('name_offsets', '<i8'),         # N + 1 byte offsets into 'names'
+    ('names', 'u1'),                 # UTF-8 resume names, concatenated
+)
+
+def _aligned(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+class CorpusBuilder:
+    """
+    Writes a tokenized corpus file one resume at a time.
+
+    Keyword ids are handed out in first-seen order and spooled to a temporary
+    file, so ingest memory does not grow with the size of the texts; on
+    close() the vocabulary is sorted, the ids are renumbered to match and the
+    sections are written out. The file only replaces `path` once complete.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._vocabulary = {}
+        self._spool = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path)))
+        self._token_counts = array('q')
+        self._years = array('q')
+        self._experience = array('d')
+        self._education = array('d')
+        self._names = []
+
+    def __len__(self):
+        return len(self._names)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._spool.close()
+        return False
+
+    def add(self, name, features):
+        """
+        Add a resume.
+
+        Args:
+            name (str): Resume name
+            features (dict): feature_store.compute_features output
+        """
+        vocabulary = self._vocabulary
+        keywords = features['keywords']
+        ids = np.fromiter((vocabulary.setdefault(term, len(vocabulary)) for term in keywords),
+                          dtype=np.uint32, count=len(keywords))
+        self._spool.write(ids.tobytes())
+        self._token_counts.append(len(ids))
+        self._years.append(int(features['years_experience']))
+        self._experience.append(features['experience_score'])
+        self._education.append(features['education_score'])
+        self._names.append(name.encode('utf-8', 'surrogatepass'))
+
+    def close(self):
+        """Write the corpus file."""
+        terms = [term.encode('utf-8', 'surrogatepass') for term in self._vocabulary]
+        order = sorted(range(len(terms)), key=terms.__getitem__)
+        renumber = np.empty(len(terms), dtype=np.uint32)
+        renumber[order] = np.arange(len(terms), dtype=np.uint32)
+        sorted_terms = [terms[i] for i in order]
+
+        token_offsets = _offsets(np.frombuffer(self._token_counts, dtype=np.int64))
+        sections = {
+            'vocabulary_offsets': _offsets([len(term) for term in sorted_terms]),
+            'vocabulary': b''.join(sorted_terms),
+            'token_offsets': token_offsets,
+            'token_ids': None,  # Copied from the spool below
+            'years_experience': np.frombuffer(self._years, dtype=np.int64),
+            'experience_score': np.frombuffer(self._experience, dtype=np.float64),
+            'education_score': np.frombuffer(self._education, dtype=np.float64),
+            'name_offsets': _offsets([len(name) for name in self._names]),
+            'names': b''.join(self._names),
+        }
+        layout = {}
+        offset = _HEADER_SIZE
+        for name, dtype in _SECTIONS:
+            data = sections[name]
+            length = int(token_offsets[-1]) if data is None else len(data)
+            layout[name] = [offset, length]
+            offset = _aligned(offset + length * np.dtype(dtype).itemsize)
+        header = json.dumps({
+            'feature_version': FEATURE_VERSION,
+            'resumes': len(self._names),
+            'vocabulary_size': len(terms),
+            'sections': layout,
+        }).encode('ascii')
+        preamble = MAGIC + struct.pack('<II', FORMAT_VERSION, len(header))
+        if len(preamble) + len(header) > _HEADER_SIZE:
+            raise ValueError("Corpus header does not fit in its reserved space")
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(preamble + header)
+            for name, dtype in _SECTIONS:
+                f.seek(layout[name][0])
+                data = sections[name]
+                if data is not None:
+                    f.write(data if isinstance(data, bytes) else np.ascontiguousarray(data, dtype=dtype).tobytes())
+                    continue
+                self._spool.seek(0)
+                while True:
+                    chunk = self._spool.read(_COPY_TOKENS * 4)
+                    if not chunk:
+                        break
+                    f.write(renumber[np.frombuffer(chunk, dtype=np.uint32)].astype('<u4').tobytes())
+            f.truncate(offset)
+        os.replace(tmp_path, self.path)
+        self._spool.close()
+        logger.info("Wrote corpus %s: %d resumes, %d terms, %d keyword ids, %.1f MB", self.path,
+                    len(self._names), len(terms), int(token_offsets[-1]), offset / 1e6)
+
+class _Vocabulary:
+    # Sequence view of the sorted vocabulary, for bisect
+    def __init__(self, offsets, data):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return self._data[self._offsets[index]:self._offsets[index + 1]].tobytes()
+
+class TokenizedCorpus:
+    """
+    Read-only, memory-mapped view of a corpus file written by CorpusBuilder.
+
+    Opening a corpus maps the file and wraps each section in a numpy array
+    without copying, so even a very large pool opens in milliseconds and
+    processes that open the same file share its pages through the OS page
+    cache instead of each holding Python strings and sets. Each resume is
+    stored as its distinct keywords (as extract_keywords finds them) plus its
+    job-independent features, which is everything keyword scoring needs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a tokenized resume corpus")
+        format_version, header_length = struct.unpack_from('<II', self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self._mmap[start:start + header_length])
+        if format_version != FORMAT_VERSION or header['feature_version'] != FEATURE_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} was built by another version of the screener; rebuild it")
+        for name, dtype in _SECTIONS:
+            offset, length = header['sections'][name]
+            setattr(self, '_' + name, np.frombuffer(self._mmap, dtype=dtype, count=length, offset=offset))
+        self.vocabulary_size = header['vocabulary_size']
+        self._terms = _Vocabulary(self._vocabulary_offsets, self._vocabulary)
+
+    def __len__(self):
+        return len(self._years_experience)
+
+    def close(self):
+        for name, _ in _SECTIONS:
+            setattr(self, '_' + name, None)
+        self._terms = None
+        self._mmap.close()
+
+    def names(self, start=0, stop=None):
+        """
+        Args:
+            start (int): First resume
+            stop (int, optional): End of the range (defaults to the end)
+
+        Returns:
+            list: Names of the resumes in the range
+        """
+        stop = len(self) if stop is None else stop
+        offsets = self._name_offsets[start:stop + 1].tolist()
+        data = self._names[offsets[0]:offsets[-1]].tobytes()
+        base = offsets[0]
+        return [data[offsets[i] - base:offsets[i + 1] - base].decode('utf-8', 'surrogatepass')
+                for i in range(stop - start)]
+
+    def _job_index(self, job_keywords):
+        # Position of each vocabulary id in the sorted job terms (-1 for other terms)
+        terms = sorted(job_keywords)
+        index = np.full(self.vocabulary_size, -1, dtype=np.int32)
+        for position, term in enumerate(terms):
+            encoded = term.encode('utf-8', 'surrogatepass')
+            term_id = bisect.bisect_left(self._terms, encoded)
+            if term_id < self.vocabulary_size and self._terms[term_id] == encoded:
+                index[term_id] = position
+        return terms, index
+
+    def _match(self, job_index, start, stop):
+        # Per-resume match counts, plus the job-term position of every keyword in the range
+        offsets = self._token_offsets[start:stop + 1]
+        positions = job_index[self._token_ids[offsets[0]:offsets[-1]]]
+        hits = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum(positions >= 0, out=hits[1:])
+        local = offsets - offsets[0]
+        return hits[local[1:]] - hits[local[:-1]], positions
+
+    def _scores(self, job_keywords, weights, start, stop):
+        terms, job_index = self._job_index(job_keywords)
+        counts = np.concatenate([self._match(job_index, block, min(block + _BLOCK_ROWS, stop))[0]
+                                 for block in range(start, stop, _BLOCK_ROWS)] or [np.zeros(0, np.int64)])
+        ratios = counts / len(job_keywords) if job_keywords else np.zeros(stop - start)
+        finals = combine_scores(ratios, self._experience_score[start:stop],
+                                self._education_score[start:stop], weights)
+        return terms, job_index, ratios, finals
+
+    def _check_keywords(self, job_keywords):
+        if not isinstance(job_keywords, (set, frozenset)):
+            raise ValueError("A tokenized corpus stores single keywords; phrase matching is not supported")
+
+    def score(self, job_keywords, weights=None, start=0, stop=None):
+        """
+        Score a range of the corpus against a job.
+
+        Args:
+            job_keywords (set): Set of keywords extracted from job description
+            weights (dict, optional): Component weights (see utils.combine_scores)
+            start (int): First resume
+            stop (int, optional): End of the range (defaults to the end)
+
+        Returns:
+            dict: Result columns in the shape format_results expects
+        """
+        self._check_keywords(job_keywords)
+        stop = len(self) if stop is None else stop
+        with stage('keyword_match'):
+            terms, job_index, ratios, finals = self._scores(job_keywords, weights, start, stop)
+            terms = np.array(terms, dtype=object)
+            matching_keywords = []
+            for block in range(start, stop, _BLOCK_ROWS):
+                counts, positions = self._match(job_index, block, min(block + _BLOCK_ROWS, stop))
+                # Sorting (resume, position) pairs lists each resume's keywords in job-term order
+                rows = np.repeat(np.arange(len(counts)), counts)
+                positions = positions[positions >= 0]
+                matched = terms[positions[np.lexsort((positions, rows))]].tolist()
+                bounds = _offsets(counts).tolist()
+                matching_keywords.extend(matched[bounds[i]:bounds[i + 1]] for i in range(len(counts)))
+        return {
+            'final_score': finals,
+            'keyword_match_ratio': ratios,
+            'matching_keywords': matching_keywords,
+            'years_experience': self._years_experience[start:stop],
+            'experience_score': self._experience_score[start:stop],
+            'education_score': self._education_score[start:stop],
+            'file_name': self.names(start, stop),
+        }
+
+    def rank(self, job_keywords, k, weights=None, start=0, stop=None):
+        """
+        Find the top K resumes of a range of the corpus.
+
+        Every resume is scored with vectorized passes over the mapped arrays;
+        names and matching keywords are only decoded for the top K.
+
+        Args:
+            job_keywords (set): Set of keywords extracted from job description
+            k (int): Number of candidates to keep
+            weights (dict, optional): Component weights (see utils.combine_scores)
+            start (int): First resume
+            stop (int, optional): End of the range (defaults to the end)
+
+        Returns:
+            list: Compact rows (see ranking.TopKRanker.rows), best first; ties
+                go to the resume that comes first
+        """
+        self._check_keywords(job_keywords)
+        stop = len(self) if stop is None else stop
+        with stage('keyword_match'):
+            terms, job_index, ratios, finals = self._scores(job_keywords, weights, start, stop)
+            if k < len(finals):
+                cutoff = np.partition(finals, len(finals) - k)[len(finals) - k]
+                candidates = np.flatnonzero(finals >= cutoff)
+            else:
+                candidates = np.arange(len(finals))
+            top = candidates[np.lexsort((candidates, -finals[candidates]))][:k]
+            rows = []
+            for row in top.tolist():
+                index = start + row
+                ids = self._token_ids[self._token_offsets[index]:self._token_offsets[index + 1]]
+                positions = job_index[ids]
+                rows.append((
+                    float(finals[row]), float(ratios[row]), int(self._years_experience[index]),
+                    float(self._experience_score[index]), float(self._education_score[index]), index,
+                    self.names(index, index + 1)[0],
+                    tuple(sorted(terms[position] for position in positions[positions >= 0].tolist())),
+                ))
+        return rows
+
+_open_corpora = {}
+_open_corpora_lock = threading.Lock()
+
+def open_corpus(path):
+    """
+    Return an open corpus for a path, reusing this process's mapping.
+
+    A file that was rebuilt since it was opened is mapped again.
+
+    Args:
+        path (str): Corpus file
+
+    Returns:
+        TokenizedCorpus: The mapped corpus
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    with _open_corpora_lock:
+        cached = _open_corpora.get(path)
+        if cached is None or cached[0] != identity:
+            _open_corpora[path] = (identity, TokenizedCorpus(path))
+        return _open_corpora[path][1]
+
+def _ingest_resume(resume):
+    """
+    Compute the stored features of one resume (run in ingest workers).
+
+    Args:
+        resume (dict): 'name' and 'text', 'content' or 'path' (see
+            utils.load_resume_text)
+
+    Returns:
+        tuple: (name, feature dict), or (name, None) when the file is over
+            its per-file limits
+    """
+    try:
+        with file_guard():
+            return resume['name'], compute_features(load_resume_text(resume, DEFAULT_LIMITS['max_pages']))
+    except ResourceLimitExceeded as e:
+        logger.warning("Leaving %s out of the corpus: %s", resume['name'], e)
+        return resume['name'], None
+
+def build_corpus(resumes, path, processes=None, chunksize=64):
+    """
+    Tokenize resumes once and write them to a corpus file.
+
+    Args:
+        resumes (iterable): Dictionaries with 'name' and 'text', 'content'
+            or 'path' (parsed during ingest; see utils.load_resume_text)
+        path (str): Corpus file to write
+        processes (int, optional): Ingest worker processes (in-process if
+            not above 1)
+        chunksize (int): Resumes sent to an ingest worker at a time
+
+    Returns:
+        dict: 'resumes' written, 'skipped' and 'seconds' taken
+    """
+    start_time = time.time()
+    skipped = 0
+    with CorpusBuilder(path) as builder:
+        if processes and processes > 1:
+            pool = multiprocessing.Pool(processes)
+            features = pool.imap(_ingest_resume, resumes, chunksize)
+        else:
+            pool = None
+            features = map(_ingest_resume, resumes)
+        try:
+            for name, resume_features in features:
+                if resume_features is None:
+                    skipped += 1
+                else:
+                    builder.add(name, resume_features)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        written = len(builder)
+    return {'resumes': written, 'skipped': skipped, 'seconds': time.time() - start_time}
+
+def _concatenate_columns(parts):
+    # Join the result columns of consecutive ranges
+    if not parts:
+        return None
+    return {name: np.concatenate([part[name] for part in parts]) if isinstance(values, np.ndarray)
+            else [value for part in parts for value in part[name]]
+            for name, values in parts[0].items()}
+
+def process_resumes_from_corpus(job_description, corpus_path, k=None, weights=None, processes=None,
+                                chunksize=None):
+    """
+    Score a tokenized corpus against a job.
+
+    Nothing is tokenized or parsed: the job's keywords are looked up in the
+    corpus vocabulary and matched against the stored keyword ids. With
+    processes above 1, ranges of the corpus are scored on the warm pool,
+    whose workers map the same file.
+
+    Args:
+        job_description (str): Job description text
+        corpus_path (str): Corpus file written by build_corpus
+        k (int, optional): Only return the top K resumes
+        weights (dict, optional): Component weights (see utils.combine_scores)
+        processes (int, optional): Most workers of the shared pool to use
+            (scored in this process if not above 1)
+        chunksize (int, optional): Resumes per pool task
+
+    Returns:
+        tuple: (DataFrame with results, execution time in seconds)
+    """
+    start_time = time.time()
+    job_keywords = extract_keywords(job_description)
+    corpus = open_corpus(corpus_path)
+    logger.info("Scoring %d resumes from corpus %s", len(corpus), corpus_path)
+    if processes and processes > 1:
+        from parallel_resume_screener import get_pool
+        output = get_pool().map_corpus(corpus.path, len(corpus), job_keywords, k, weights, chunksize,
+                                       workers=processes)
+        results = output.results() if k else _concatenate_columns(output) or corpus.score(job_keywords, weights)
+    elif k:
+        ranker = TopKRanker(k)
+        ranker.merge(corpus.rank(job_keywords, k, weights), len(corpus))
+        results = ranker.results()
+    else:
+        results = corpus.score(job_keywords, weights)
+    execution_time = time.time() - start_time
+    logger.info("Corpus scoring completed in %.4f seconds", execution_time)
+    return format_results(results), execution_time
+
+def main(argv=None):
+    from screen_resumes import find_resumes
+    from resume_archives import iter_resume_inputs
+    from result_export import EXPORT_FORMATS, ResultWriter, export_format
+
+    parser = argparse.ArgumentParser(description="Build and screen memory-mapped tokenized resume corpora.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Tokenize resumes into a corpus file")
+    build.add_argument('corpus', help="Corpus file to write")
+    build.add_argument('inputs', nargs='+', help="Resume directories, files, ZIP/tar archives or glob patterns")
+    build.add_argument('--workers', type=int, default=None, help="Ingest worker processes")
+    screen = subparsers.add_parser('screen', help="Rank a corpus against a job description")
+    screen.add_argument('corpus', help="Corpus file written by 'build'")
+    screen.add_argument('job', help="Job description .txt file")
+    screen.add_argument('-o', '--output', required=True, help="Ranked results file (.csv, .parquet or .arrow)")
+    screen.add_argument('--format', choices=EXPORT_FORMATS, default=None,
+                        help="Output format (default: from the output file extension)")
+    screen.add_argument('--top', type=int, default=None, help="Only write the best N resumes")
+    screen.add_argument('--workers', type=int, default=None, help="Pool workers (default: this process only)")
+    for subparser in (build, screen):
+        subparser.add_argument('-v', '--verbose', action='store_true', help="Log progress")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stderr, format='%(asctime)s %(levelname)s %(message)s')
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    if args.command == 'build':
+        paths = find_resumes(args.inputs)
+        if not paths:
+            logger.error("No .txt or .pdf resumes or archives found in %s", ', '.join(args.inputs))
+            return 3
+        stats = build_corpus(iter_resume_inputs(paths), args.corpus, args.workers)
+        logger.info("Built %s from %d resumes (%d skipped) in %.1f seconds", args.corpus,
+                    stats['resumes'], stats['skipped'], stats['seconds'])
+        return 0
+
+    try:
+        with open(args.job, 'r', encoding='utf-8') as f:
+            job_description = f.read()
+    except OSError as e:
+        logger.error("Cannot read job description: %s", e)
+        return 2
+    results_df, execution_time = process_resumes_from_corpus(job_description, args.corpus, args.top,
+                                                             processes=args.workers)
+    tmp_path = args.output + '.tmp'
+    with ResultWriter(tmp_path, args.format or export_format(args.output)) as writer:
+        writer.write_frame(results_df)
+    os.replace(tmp_path, args.output)
+    logger.info("Wrote %d ranked resumes to %s (scored in %.2f seconds)", writer.rows_written, args.output,
+                execution_time)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
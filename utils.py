@@ -1,152 +1,215 @@
+import io
 import re
 import os
-import pandas as pd
-from io import StringIO
-from pdfminer.high_level import extract_text
-from dateutil import parser
-from datetime import datetime
-import nltk
-import string
+import logging
+from resume_features import get_feature_extractor
+from instrumentation import stage
+from english_stopwords import ENGLISH_STOPWORDS
+from keyword_matcher import JobMatcher, tokenize
+from resource_limits import DEFAULT_LIMITS, ResourceLimitExceeded, file_guard
+
+logger = logging.getLogger(__name__)
 
 # Custom tokenizer to avoid NLTK tokenizer dependency
 def custom_tokenize(text):
-    for punct in string.punctuation:
-        text = text.replace(punct, ' ')
-    return [token.lower() for token in text.split() if token.strip()]
-
-try:
-    from nltk.corpus import stopwords
-    stopwords.words('english')
-except (LookupError, ImportError):
-    nltk.download('stopwords', quiet=True)
-    from nltk.corpus import stopwords
+    return tokenize(text)
 
 def extract_keywords(text):
-    print("\n===== KEYWORD EXTRACTION =====")
-    print(f"Input text length: {len(text) if text else 0} characters")
+    logger.debug("Extracting keywords from %d characters", len(text) if text else 0)
     if not text:
-        print("No text provided. Returning empty set.")
         return set()
     tokens = custom_tokenize(text)
-    print(f"Tokenized into {len(tokens)} tokens")
-    stop_words = set(stopwords.words('english'))
-    print(f"Using {len(stop_words)} stopwords for filtering")
+    stop_words = ENGLISH_STOPWORDS
     keywords = [word for word in tokens if word not in stop_words and len(word) > 1]
     unique_keywords = set(keywords)
-    print(f"Extracted {len(unique_keywords)} unique keywords")
-    print(f"Sample keywords (up to 10): {list(unique_keywords)[:10]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Tokenized into %d tokens, %d unique keywords after removing %d stopwords",
+                     len(tokens), len(unique_keywords), len(stop_words))
+        logger.debug("Sample keywords (up to 10): %s", list(unique_keywords)[:10])
     return unique_keywords
 
+def extract_job_terms(job_description, phrase_matching=False):
+    """
+    Extract what resumes are matched against for a job description.
+
+    Args:
+        job_description (str): Job description text
+        phrase_matching (bool): Treat compound terms ("Node.js") and known
+            multi-word skills ("machine learning") as single keywords
+
+    Returns:
+        set or JobMatcher: Job keywords, accepted by score_resume
+    """
+    if phrase_matching:
+        return JobMatcher(job_description)
+    return extract_keywords(job_description)
+
 def extract_years_experience(text):
-    text = text.lower()
-    max_years = 0
-    patterns = [
-        r'(\d{1,2})\+?\s*(?:years?|yrs?)(?:\s+of\s+)?(?:experience|exp)?',
-        r'(?:experience|exp)(?:\s+of\s+)?(\d{1,2})\+?\s*(?:years?|yrs?)'
-    ]
-    for pattern in patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            try:
-                years = int(match)
-                max_years = max(max_years, years)
-            except:
-                continue
-    range_patterns = re.findall(r'(\b\d{4}\b)[\s–\-to]{1,5}(\b\d{4}\b)', text)
-    for start, end in range_patterns:
-        try:
-            start, end = int(start), int(end)
-            if 1980 < start < end <= datetime.now().year:
-                max_years = max(max_years, end - start)
-        except:
-            continue
-    full_date_ranges = re.findall(r'([a-zA-Z]{3,9}\s\d{4})\s*(?:to|–|-)\s*([a-zA-Z]{3,9}\s\d{4})', text)
-    for start_str, end_str in full_date_ranges:
-        try:
-            start = parser.parse(start_str)
-            end = parser.parse(end_str)
-            diff_years = (end - start).days / 365.0
-            if 0 < diff_years < 50:
-                max_years = max(max_years, round(diff_years))
-        except:
-            continue
-    return int(max_years)
+    return get_feature_extractor().years_experience(text.lower())
 
 def extract_education_level(text):
-    print("\n===== EDUCATION LEVEL EXTRACTION =====")
-    print(f"Input text length: {len(text) if text else 0} characters")
     if not text:
-        print("No text provided. Returning 0.0 score.")
         return 0.0
-    education_patterns = {
-        r'ph\.?d\.?|doctor(?:ate|al)|d\.?phil\.?': 1.0,
-        r'master|m\.?s\.?|m\.?b\.?a\.?|m\.?eng\.?|m\.?sc\.?|m\.?c\.?a\.?|post.?graduate|graduate degree': 0.8,
-        r'bachelor|b\.?s\.?|b\.?a\.?|b\.?eng\.?|b\.?sc\.?|b\.?tech\.?|b\.?c\.?a\.?|college degree|undergraduate|university degree': 0.6,
-        r'associate|a\.?s\.?|a\.?a\.?|a\.?a\.?s\.?|community college|technical college': 0.4,
-        r'high school|diploma|ged|secondary school|higher secondary|12th|hsc': 0.2,
-    }
-    education_sections = [
-        "education", "academic background", "academic qualification",
-        "qualification", "academic history", "academic profile"
-    ]
-    print(f"Checking for education section headers: {education_sections}")
-    has_education_section = any(re.search(r'^\s*' + section + r'[:\s]*$', text.lower(), re.MULTILINE) for section in education_sections)
-    print(f"Resume has education section: {has_education_section}")
-    max_score = 0.0
-    print("Checking for education level patterns:")
-    for pattern, score in education_patterns.items():
-        if re.search(pattern, text.lower()):
-            print(f"Found education pattern '{pattern}' with score {score}")
-            max_score = max(max_score, score)
-    if max_score > 0:
-        print(f"Highest education level found with score: {max_score}")
-    else:
-        print("No specific education level detected")
-        if len(text) > 500:
-            max_score = 0.6
-            print(f"Assigning default education score for substantial resume: {max_score} (Bachelor's level)")
+    extractor = get_feature_extractor()
+    lowered = text.lower()
+    max_score = extractor.education_level(lowered)
+    if max_score == 0 and len(text) > 500:
+        max_score = 0.6
+        logger.debug("No education level detected; assigning default score %s (Bachelor's level)", max_score)
+    logger.debug("Education score: %s (education section: %s)", max_score, extractor.has_education_section(lowered))
     return max_score
 
-def parse_resume_text(file_content, file_type):
-    if file_type == 'txt':
-        if isinstance(file_content, bytes):
-            return file_content.decode('utf-8', errors='ignore')
-        return file_content
-    elif file_type == 'pdf':
-        try:
-            return extract_text(file_content)
-        except Exception as e:
-            print(f"Error extracting text from PDF: {e}")
-            return ""
-    return ""
-
-def score_resume(resume_text, job_keywords):
-    print("\n\n========== RESUME SCORING PROCESS ==========")
-    print(f"Resume text length: {len(resume_text) if resume_text else 0} characters")
-    print(f"Job keywords: {len(job_keywords)} keywords provided")
-    resume_keywords = extract_keywords(resume_text)
-    if job_keywords:
-        matching_keywords = resume_keywords.intersection(job_keywords)
-        keyword_match_ratio = len(matching_keywords) / len(job_keywords)
-        print(f"Found {len(matching_keywords)} matching keywords out of {len(job_keywords)}")
-        print(f"Keyword match ratio: {keyword_match_ratio:.4f} ({keyword_match_ratio*100:.2f}%)")
+# Bump whenever parse_resume_text changes its output, so cached texts are invalidated
+EXTRACTOR_VERSION = 1
+
+# Bump whenever extract_keywords or score_resume_features change their output,
+# so stored resume features are recomputed
+FEATURE_VERSION = 1
+
+# Weights of the keyword match, experience and education components of the final score
+DEFAULT_WEIGHTS = {'keyword_match': 0.5, 'experience': 0.3, 'education': 0.2}
+
+def combine_scores(keyword_match_ratio, experience_score, education_score, weights=None):
+    """
+    Weight the three score components into a final score.
+
+    Works on plain floats as well as numpy arrays of scores.
+
+    Args:
+        keyword_match_ratio (float): Fraction of job keywords found in the resume
+        experience_score (float): Experience component (0 to 1)
+        education_score (float): Education component (0 to 1)
+        weights (dict, optional): 'keyword_match', 'experience' and
+            'education' weights (defaults to DEFAULT_WEIGHTS)
+
+    Returns:
+        float: Final score
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    return ((weights['keyword_match'] * keyword_match_ratio) + (weights['experience'] * experience_score)
+            + (weights['education'] * education_score))
+
+def parse_resume_text(file_content, file_type, max_pages=0):
+    with stage('parse'):
+        if file_type == 'txt':
+            if isinstance(file_content, bytes):
+                return file_content.decode('utf-8', errors='ignore')
+            return file_content
+        elif file_type == 'pdf':
+            # pdfminer is only needed for PDFs, so it is imported on first use
+            from pdfminer.high_level import extract_text
+            if isinstance(file_content, bytes):
+                # Parse in memory instead of going through a temporary file
+                file_content = io.BytesIO(file_content)
+            try:
+                return extract_text(file_content, maxpages=max_pages)
+            except Exception as e:
+                logger.warning("Error extracting text from PDF: %s", e)
+                return ""
+        return ""
+
+def read_resume_file(path, max_pages=0):
+    """
+    Read a resume file from disk and extract its text.
+
+    Args:
+        path (str): Path of a .txt or .pdf resume
+        max_pages (int): Only extract this many PDF pages (0 for all)
+
+    Returns:
+        str: Text of the resume ("" if the file cannot be read)
+    """
+    file_type = path.rsplit('.', 1)[-1].lower()
+    if file_type == 'pdf':
+        return parse_resume_text(path, file_type, max_pages)
+    try:
+        with open(path, 'rb') as f:
+            file_content = f.read()
+    except OSError as e:
+        logger.warning("Error reading %s: %s", path, e)
+        return ""
+    return parse_resume_text(file_content, file_type)
+
+def load_resume_text(resume, max_pages=0):
+    """
+    Get the text of a resume dict, parsing it if necessary.
+
+    Args:
+        resume (dict): 'name' and one of 'text', 'content' (raw bytes of a
+            .txt or .pdf file, e.g. an archive member, whose type is 'type'
+            or else the extension of 'name') or 'path'
+        max_pages (int): Only extract this many PDF pages (0 for all)
+
+    Returns:
+        str: Text of the resume
+    """
+    if 'text' in resume:
+        return resume['text']
+    if 'content' in resume:
+        file_type = resume.get('type') or resume['name'].rsplit('.', 1)[-1].lower()
+        return parse_resume_text(resume['content'], file_type, max_pages)
+    return read_resume_file(resume['path'], max_pages)
+
+def score_resume_features(resume_text):
+    """
+    Compute the job-independent part of a resume's score.
+
+    Args:
+        resume_text (str): Resume text
+
+    Returns:
+        dict: 'years_experience', 'experience_score' and 'education_score'
+    """
+    extractor = get_feature_extractor()
+    with stage('experience'):
+        lowered = resume_text.lower()
+        years_experience = extractor.years_experience(lowered)
+        if years_experience == 0 and len(resume_text) > 500:
+            # Substantial resume with no detected experience
+            years_experience = 5
+        experience_score = min(years_experience / 10.0, 1.0)
+    with stage('education'):
+        education_score = extractor.education_level(lowered)
+        if education_score == 0 and len(resume_text) > 500:
+            education_score = 0.6
+    return {
+        'years_experience': years_experience,
+        'experience_score': experience_score,
+        'education_score': education_score
+    }
+
+def score_resume(resume_text, job_keywords, weights=None):
+    logger.debug("Scoring resume of %d characters against %d job keywords",
+                 len(resume_text) if resume_text else 0, len(job_keywords))
+    if isinstance(job_keywords, JobMatcher):
+        # The matcher tokenizes and matches in a single pass
+        with stage('keyword_match'):
+            matching_keywords = job_keywords.match(resume_text)
+            if job_keywords:
+                keyword_match_ratio = len(matching_keywords) / len(job_keywords)
+            else:
+                keyword_match_ratio = 0
     else:
-        keyword_match_ratio = 0
-        matching_keywords = set()
-        print("No job keywords provided. Keyword match ratio set to 0.")
-    years_experience = extract_years_experience(resume_text)
-    if years_experience == 0 and len(resume_text) > 500:
-        print("Assigning default experience value (5 years) for substantial resume with no detected experience")
-        years_experience = 5
-    experience_score = min(years_experience / 10.0, 1.0)
-    print(f"Years of experience: {years_experience}")
-    print(f"Experience score: {experience_score:.4f} ({experience_score*100:.2f}%)")
-    education_score = extract_education_level(resume_text)
-    print(f"Education score: {education_score:.4f} ({education_score*100:.2f}%)")
-    final_score = (0.5 * keyword_match_ratio) + (0.3 * experience_score) + (0.2 * education_score)
-    print(f"Final score calculation: 0.5 * {keyword_match_ratio:.4f} + 0.3 * {experience_score:.4f} + 0.2 * {education_score:.4f}")
-    print(f"Final score: {final_score:.4f} ({final_score*100:.2f}%)")
-    print("============================================\n")
+        with stage('tokenize'):
+            resume_keywords = extract_keywords(resume_text)
+        with stage('keyword_match'):
+            if job_keywords:
+                matching_keywords = resume_keywords.intersection(job_keywords)
+                keyword_match_ratio = len(matching_keywords) / len(job_keywords)
+            else:
+                keyword_match_ratio = 0
+                matching_keywords = set()
+    features = score_resume_features(resume_text)
+    years_experience = features['years_experience']
+    experience_score = features['experience_score']
+    education_score = features['education_score']
+    final_score = combine_scores(keyword_match_ratio, experience_score, education_score, weights)
+    if logger.isEnabledFor(logging.DEBUG):
+        weights = weights or DEFAULT_WEIGHTS
+        logger.debug("Final score %.4f = %s * %.4f (%d matching keywords) + %s * %.4f (%d years) + %s * %.4f",
+                     final_score, weights['keyword_match'], keyword_match_ratio, len(matching_keywords),
+                     weights['experience'], experience_score, years_experience,
+                     weights['education'], education_score)
     return {
         'final_score': final_score,
         'keyword_match_ratio': keyword_match_ratio,
@@ -156,21 +219,83 @@ def score_resume(resume_text, job_keywords):
         'education_score': education_score
     }
 
+def skipped_result(reason):
+    """
+    Result row for a file that was not scored.
+
+    Args:
+        reason (str): One of resource_limits.SKIP_REASONS
+
+    Returns:
+        dict: Zero scores with the reason under 'skipped'
+    """
+    return {
+        'final_score': 0.0,
+        'keyword_match_ratio': 0.0,
+        'matching_keywords': set(),
+        'years_experience': 0,
+        'experience_score': 0.0,
+        'education_score': 0.0,
+        'skipped': reason,
+    }
+
+def score_resume_within_limits(resume, job_keywords, limits=None, keep_text=False):
+    """
+    Parse (if needed) and score one resume under the per-file limits.
+
+    A file that runs past its time budget or grows the process's memory past
+    its cap is reported as a skipped row instead of stalling or failing the
+    batch (see resource_limits.FileGuard).
+
+    Args:
+        resume (dict): 'name' and 'text', 'content' or 'path' (see
+            load_resume_text)
+        job_keywords (set or JobMatcher): Job keywords (see extract_job_terms)
+        limits (dict, optional): Limits as in resource_limits.DEFAULT_LIMITS
+        keep_text (bool): Also return the text parsed here under 'text'
+            (not for resumes given as 'text', nor for skipped ones)
+
+    Returns:
+        dict: score_resume result (or skipped_result) with 'file_name'
+    """
+    limits = limits or DEFAULT_LIMITS
+    try:
+        with file_guard(limits):
+            resume_text = load_resume_text(resume, limits['max_pages'])
+            result = score_resume(resume_text, job_keywords)
+            if keep_text and 'text' not in resume:
+                result['text'] = resume_text
+    except ResourceLimitExceeded as e:
+        logger.warning("Skipping %s: %s", resume['name'], e)
+        result = skipped_result(e.reason)
+    result['file_name'] = resume['name']
+    return result
+
 def format_results(results):
-    df = pd.DataFrame(results)
-    df = df.sort_values('final_score', ascending=False)
-    df['matching_keywords'] = df['matching_keywords'].apply(lambda x: ', '.join(sorted(x)))
-    df['final_score'] = (df['final_score'] * 100).round(2)
-    df['keyword_match_ratio'] = (df['keyword_match_ratio'] * 100).round(2)
-    df['experience_score'] = (df['experience_score'] * 100).round(2)
-    df['education_score'] = (df['education_score'] * 100).round(2)
-    df = df.rename(columns={
-        'final_score': 'Final Score (%)',
-        'keyword_match_ratio': 'Keyword Match (%)',
-        'matching_keywords': 'Matching Keywords',
-        'years_experience': 'Years of Experience',
-        'experience_score': 'Experience Score (%)',
-        'education_score': 'Education Score (%)',
-        'file_name': 'Resume'
-    })
+    import pandas as pd
+    with stage('format'):
+        df = pd.DataFrame(results)
+        df = df.sort_values('final_score', ascending=False)
+        df['matching_keywords'] = df['matching_keywords'].apply(lambda x: ', '.join(sorted(x)))
+        df['final_score'] = (df['final_score'] * 100).round(2)
+        df['keyword_match_ratio'] = (df['keyword_match_ratio'] * 100).round(2)
+        df['experience_score'] = (df['experience_score'] * 100).round(2)
+        df['education_score'] = (df['education_score'] * 100).round(2)
+        if 'skipped' in df:
+            df['skipped'] = df['skipped'].fillna('')
+        if 'duplicate_of' in df:
+            df['duplicate_of'] = df['duplicate_of'].fillna('')
+            df['duplicates'] = df['duplicates'].fillna(0).astype(int)
+        df = df.rename(columns={
+            'final_score': 'Final Score (%)',
+            'keyword_match_ratio': 'Keyword Match (%)',
+            'matching_keywords': 'Matching Keywords',
+            'years_experience': 'Years of Experience',
+            'experience_score': 'Experience Score (%)',
+            'education_score': 'Education Score (%)',
+            'file_name': 'Resume',
+            'skipped': 'Skipped',
+            'duplicates': 'Near-Duplicates',
+            'duplicate_of': 'Duplicate Of'
+        })
     return df